@@ -0,0 +1,36 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Benchmarks of the SDK, run with `make benchmarks` or one at a time with `python -m benchmarks.X`.
+"""
+
+import time
+import tracemalloc
+from typing import Any, Callable
+
+
+def measure(
+    name: str,
+    operation: Callable[[], Any],
+    iterations: int,
+    memory: bool = False,
+):
+    """
+    Prints the mean wall clock time of operation over `iterations` calls, after one call to warm up,
+    and with `memory` set, the peak memory allocated by a further call.
+    """
+    operation()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = (time.perf_counter() - start) / iterations
+    result = f"{name:>28}: {elapsed * 1_000_000:12.2f} us"
+
+    if memory:
+        tracemalloc.start()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result += f", {peak / 1024:10.1f} KiB peak"
+    print(result)
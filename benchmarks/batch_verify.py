@@ -0,0 +1,57 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares verifying a batch of signatures one at a time with verify_signatures, on the default
+executor and on thread pools of a few sizes:
+
+    python -m benchmarks.batch_verify
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from benchmarks import measure
+from endless_sdk import ed25519, secp256k1_ecdsa
+from endless_sdk.batch_verify import SignatureCheck, verify_signatures
+
+SIGNATURES = 1_024
+ITERATIONS = 5
+
+
+def signature_checks(private_key: Any) -> List[SignatureCheck]:
+    checks: List[SignatureCheck] = []
+    for index in range(SIGNATURES):
+        data = f"transaction {index}".encode()
+        checks.append((data, private_key.public_key(), private_key.sign(data)))
+    return checks
+
+
+def one_at_a_time(checks: List[SignatureCheck]) -> List[bool]:
+    return [public_key.verify(data, signature) for data, public_key, signature in checks]
+
+
+def main():
+    print(f"{os.cpu_count()} cores, {secp256k1_ecdsa.backend.__class__.__name__}")
+    for name, private_key in [
+        ("ed25519", ed25519.PrivateKey.random()),
+        ("secp256k1", secp256k1_ecdsa.PrivateKey.random()),
+    ]:
+        checks = signature_checks(private_key)
+        assert all(one_at_a_time(checks))
+        assert all(verify_signatures(checks))
+
+        measure(f"{name}, one at a time", lambda: one_at_a_time(checks), ITERATIONS)
+        measure(f"{name}, batch", lambda: verify_signatures(checks), ITERATIONS)
+        for threads in [2, 4]:
+            with ThreadPoolExecutor(threads) as executor:
+                measure(
+                    f"{name}, batch, {threads} threads",
+                    lambda: verify_signatures(checks, executor),
+                    ITERATIONS,
+                )
+
+
+if __name__ == "__main__":
+    main()
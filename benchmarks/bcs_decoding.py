@@ -0,0 +1,104 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures decoding BCS in time and in peak memory allocated, for a batch of signed transactions,
+a vector of integers and a bundle of modules as published by a package, copying bytes out of the
+input and, for modules, returning views into it:
+
+    python -m benchmarks.bcs_decoding
+"""
+
+from benchmarks import measure
+from endless_sdk import ed25519
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.bcs import Deserializer, Serializer
+from endless_sdk.transactions import (
+    EntryFunction,
+    RawTransaction,
+    SignedTransaction,
+    TransactionArgument,
+    TransactionPayload,
+)
+
+TRANSACTIONS = 1_000
+INTEGERS = 10_000
+MODULES = 50
+MODULE_SIZE = 32_768
+ITERATIONS = 20
+
+
+def signed_transactions() -> bytes:
+    key = ed25519.PrivateKey.random()
+    transactions = []
+    for sequence_number in range(TRANSACTIONS):
+        payload = TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [
+                    TransactionArgument(
+                        AccountAddress.from_str("0x2"), Serializer.struct
+                    ),
+                    TransactionArgument(sequence_number, Serializer.u128),
+                ],
+            )
+        )
+        raw_transaction = RawTransaction(
+            AccountAddress.from_str("0x1"), sequence_number, payload, 2_000, 100, 0, 4
+        )
+        transactions.append(
+            SignedTransaction(raw_transaction, raw_transaction.sign(key))
+        )
+    serializer = Serializer()
+    serializer.sequence(transactions, Serializer.struct)
+    return serializer.output()
+
+
+def integers() -> bytes:
+    serializer = Serializer()
+    serializer.sequence(list(range(INTEGERS)), Serializer.u64)
+    return serializer.output()
+
+
+def module_bundle() -> bytes:
+    modules = [bytes([index]) * MODULE_SIZE for index in range(MODULES)]
+    serializer = Serializer()
+    serializer.sequence(modules, Serializer.to_bytes)
+    return serializer.output()
+
+
+def main():
+    transactions = signed_transactions()
+    values = integers()
+    modules = module_bundle()
+
+    measure(
+        "transactions",
+        lambda: Deserializer(transactions).sequence(SignedTransaction.deserialize),
+        ITERATIONS,
+        memory=True,
+    )
+    measure(
+        "integers",
+        lambda: Deserializer(values).sequence(Deserializer.u64),
+        ITERATIONS,
+        memory=True,
+    )
+    measure(
+        "modules",
+        lambda: Deserializer(modules).sequence(Deserializer.to_bytes),
+        ITERATIONS,
+        memory=True,
+    )
+    measure(
+        "modules, views",
+        lambda: Deserializer(modules, views=True).sequence(Deserializer.to_bytes),
+        ITERATIONS,
+        memory=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares the codecs generated from BCS schemas with the hand-written serialize and deserialize
+methods they replaced, for a signed coin transfer with a type argument:
+
+    python -m benchmarks.bcs_schema
+"""
+
+from benchmarks import measure
+from endless_sdk import ed25519
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.authenticator import Authenticator, Ed25519Authenticator
+from endless_sdk.bcs import Deserializer, Serializer
+from endless_sdk.transactions import (
+    EntryFunction,
+    ModuleId,
+    RawTransaction,
+    SignedTransaction,
+    TransactionArgument,
+    TransactionPayload,
+)
+from endless_sdk.type_tag import StructTag, TypeTag
+
+ITERATIONS = 20_000
+
+
+# The hand-written codecs, as they were before the schemas
+
+
+def serialize_address(serializer: Serializer, address: AccountAddress):
+    serializer.fixed_bytes(address.address)
+
+
+def deserialize_address(deserializer: Deserializer) -> AccountAddress:
+    return AccountAddress(deserializer.fixed_bytes(AccountAddress.LENGTH))
+
+
+def serialize_type_tag(serializer: Serializer, tag: TypeTag):
+    serializer.uleb128(tag.value.variant())
+    struct_tag = tag.value
+    serialize_address(serializer, struct_tag.address)
+    serializer.str(struct_tag.module)
+    serializer.str(struct_tag.name)
+    serializer.sequence(struct_tag.type_args, serialize_type_tag)
+
+
+def deserialize_type_tag(deserializer: Deserializer) -> TypeTag:
+    assert deserializer.uleb128() == TypeTag.STRUCT
+    address = deserialize_address(deserializer)
+    module = deserializer.str()
+    name = deserializer.str()
+    type_args = deserializer.sequence(deserialize_type_tag)
+    return TypeTag(StructTag(address, module, name, type_args))
+
+
+def serialize_raw_transaction(transaction: RawTransaction, serializer: Serializer):
+    serialize_address(serializer, transaction.sender)
+    serializer.u64(transaction.sequence_number)
+    serializer.uleb128(transaction.payload.variant)
+    function = transaction.payload.value
+    serialize_address(serializer, function.module.address)
+    serializer.str(function.module.name)
+    serializer.str(function.function)
+    serializer.sequence(function.ty_args, serialize_type_tag)
+    serializer.sequence(function.args, Serializer.to_bytes)
+    serializer.u64(transaction.max_gas_amount)
+    serializer.u64(transaction.gas_unit_price)
+    serializer.u64(transaction.expiration_timestamps_secs)
+    serializer.u8(transaction.chain_id)
+
+
+def deserialize_raw_transaction(deserializer: Deserializer) -> RawTransaction:
+    sender = deserialize_address(deserializer)
+    sequence_number = deserializer.u64()
+    assert deserializer.uleb128() == TransactionPayload.SCRIPT_FUNCTION
+    module = ModuleId(deserialize_address(deserializer), deserializer.str())
+    function = deserializer.str()
+    ty_args = deserializer.sequence(deserialize_type_tag)
+    args = deserializer.sequence(Deserializer.to_bytes)
+    payload = TransactionPayload(EntryFunction(module, function, ty_args, args))
+    return RawTransaction(
+        sender,
+        sequence_number,
+        payload,
+        deserializer.u64(),
+        deserializer.u64(),
+        deserializer.u64(),
+        deserializer.u8(),
+    )
+
+
+def serialize_signed_transaction(
+    transaction: SignedTransaction, serializer: Serializer
+):
+    serialize_raw_transaction(transaction.transaction, serializer)
+    serializer.uleb128(transaction.authenticator.variant)
+    authenticator = transaction.authenticator.authenticator
+    serializer.struct(authenticator.public_key)
+    serializer.struct(authenticator.signature)
+
+
+def deserialize_signed_transaction(deserializer: Deserializer) -> SignedTransaction:
+    transaction = deserialize_raw_transaction(deserializer)
+    assert deserializer.uleb128() == Authenticator.ED25519
+    key = deserializer.struct(ed25519.PublicKey)
+    signature = deserializer.struct(ed25519.Signature)
+    return SignedTransaction(
+        transaction, Authenticator(Ed25519Authenticator(key, signature))
+    )
+
+
+def signed_transaction() -> SignedTransaction:
+    payload = TransactionPayload(
+        EntryFunction.natural(
+            "0x1::coin",
+            "transfer",
+            [TypeTag(StructTag.from_str("0x1::endless_coin::EndlessCoin"))],
+            [
+                TransactionArgument(AccountAddress.from_str("0x2"), Serializer.struct),
+                TransactionArgument(1_000, Serializer.u64),
+            ],
+        )
+    )
+    raw_transaction = RawTransaction(
+        AccountAddress.from_str("0x1"), 0, payload, 2_000, 100, 2**32, 4
+    )
+    key = ed25519.PrivateKey.random()
+    return SignedTransaction(raw_transaction, raw_transaction.sign(key))
+
+
+def main():
+    transaction = signed_transaction()
+    encoded = transaction.bytes()
+
+    def handwritten_encode() -> bytes:
+        serializer = Serializer()
+        serialize_signed_transaction(transaction, serializer)
+        return serializer.output()
+
+    assert handwritten_encode() == encoded
+    assert deserialize_signed_transaction(Deserializer(encoded)).bytes() == encoded
+
+    measure("encode, hand-written", handwritten_encode, ITERATIONS)
+    measure("encode, schema", transaction.bytes, ITERATIONS)
+    measure(
+        "decode, hand-written",
+        lambda: deserialize_signed_transaction(Deserializer(encoded)),
+        ITERATIONS,
+    )
+    measure(
+        "decode, schema",
+        lambda: SignedTransaction.deserialize(Deserializer(encoded)),
+        ITERATIONS,
+    )
+
+
+if __name__ == "__main__":
+    main()
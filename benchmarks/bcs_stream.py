@@ -0,0 +1,75 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures decoding a dump of signed transactions from a file in time and in peak memory
+allocated, reading the whole file into memory first against streaming it with bcs_stream:
+
+    python -m benchmarks.bcs_stream
+"""
+
+import tempfile
+
+from benchmarks import measure
+from endless_sdk import ed25519
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.bcs import Deserializer, Serializer
+from endless_sdk.bcs_stream import read_items
+from endless_sdk.transactions import (
+    EntryFunction,
+    RawTransaction,
+    SignedTransaction,
+    TransactionArgument,
+    TransactionPayload,
+)
+
+TRANSACTIONS = 20_000
+
+
+def write_dump(path: str):
+    key = ed25519.PrivateKey.random()
+    payload = TransactionPayload(
+        EntryFunction.natural(
+            "0x1::endless_account",
+            "transfer",
+            [],
+            [
+                TransactionArgument(AccountAddress.from_str("0x2"), Serializer.struct),
+                TransactionArgument(1_000, Serializer.u128),
+            ],
+        )
+    )
+    raw_transaction = RawTransaction(
+        AccountAddress.from_str("0x1"), 0, payload, 2_000, 100, 0, 4
+    )
+    encoded = SignedTransaction(raw_transaction, raw_transaction.sign(key)).bytes()
+    with open(path, "wb") as dump:
+        for _ in range(TRANSACTIONS):
+            dump.write(encoded)
+
+
+def read_whole(path: str) -> int:
+    with open(path, "rb") as dump:
+        deserializer = Deserializer(dump.read())
+    count = 0
+    while deserializer.remaining() > 0:
+        SignedTransaction.deserialize(deserializer)
+        count += 1
+    return count
+
+
+def read_streamed(path: str) -> int:
+    with open(path, "rb") as dump:
+        return sum(1 for _ in read_items(dump, SignedTransaction.deserialize))
+
+
+def main():
+    with tempfile.NamedTemporaryFile() as file:
+        write_dump(file.name)
+        assert read_whole(file.name) == read_streamed(file.name) == TRANSACTIONS
+        measure("whole file", lambda: read_whole(file.name), 1, memory=True)
+        measure("streamed", lambda: read_streamed(file.name), 1, memory=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares encoding and decoding vectors of integers, as passed to batch payouts, packed whole by
+Serializer.sequence and Deserializer.sequence against one element at a time:
+
+    python -m benchmarks.bcs_vectors
+"""
+
+from typing import Callable, List
+
+from benchmarks import measure
+from endless_sdk.bcs import Deserializer, Serializer
+
+LENGTH = 10_000
+ITERATIONS = 50
+
+
+def per_element_encode(values: List[int], encode: Callable) -> bytes:
+    serializer = Serializer()
+    serializer.uleb128(len(values))
+    for value in values:
+        encode(serializer, value)
+    return serializer.output()
+
+
+def per_element_decode(data: bytes, decode: Callable) -> List[int]:
+    deserializer = Deserializer(data)
+    return [decode(deserializer) for _ in range(deserializer.uleb128())]
+
+
+def vector_encode(values: List[int], encode: Callable) -> bytes:
+    serializer = Serializer()
+    serializer.sequence(values, encode)
+    return serializer.output()
+
+
+def main():
+    for name, encode, decode, maximum in [
+        ("u8", Serializer.u8, Deserializer.u8, 2**8 - 1),
+        ("u64", Serializer.u64, Deserializer.u64, 2**64 - 1),
+        ("u128", Serializer.u128, Deserializer.u128, 2**128 - 1),
+    ]:
+        values = [index * maximum // LENGTH for index in range(LENGTH)]
+        data = vector_encode(values, encode)
+        assert per_element_encode(values, encode) == data
+        assert Deserializer(data).sequence(decode) == values
+
+        measure(
+            f"{name} encode, per element",
+            lambda: per_element_encode(values, encode),
+            ITERATIONS,
+        )
+        measure(f"{name} encode", lambda: vector_encode(values, encode), ITERATIONS)
+        measure(
+            f"{name} decode, per element",
+            lambda: per_element_decode(data, decode),
+            ITERATIONS,
+        )
+        measure(
+            f"{name} decode", lambda: Deserializer(data).sequence(decode), ITERATIONS
+        )
+
+
+if __name__ == "__main__":
+    main()
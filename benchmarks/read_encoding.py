@@ -0,0 +1,125 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares reading account resources as JSON, with the standard library and the fastest available
+codec, and as BCS, in bytes transferred and in client CPU time spent per read, including the HTTP
+round trip through httpx.
+
+By default, the node is simulated in-process with resources shaped like coin stores. Pass a node
+url and an account address to measure against a real node instead:
+
+    python -m benchmarks.read_encoding [node_url account_address]
+"""
+
+import asyncio
+import copy
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.async_client import BCS_CONTENT_TYPE, RestClient
+from endless_sdk.bcs import Serializer
+from endless_sdk.json_codec import JsonCodec, fastest
+from endless_sdk.type_tag import StructTag
+
+RESOURCES = 500
+ITERATIONS = 50
+
+
+def synthetic_resources() -> Tuple[List[Dict[str, Any]], bytes]:
+    json_resources = []
+    bcs_resources: Dict[StructTag, bytes] = {}
+    for index in range(RESOURCES):
+        address = AccountAddress.from_str(f"0x{index + 1:064x}")
+        resource_type = f"0x1::coin::CoinStore<{address}::coin{index}::Coin>"
+        json_resources.append(
+            {
+                "type": resource_type,
+                "data": {
+                    "coin": {"value": str(index * 1_000_000)},
+                    "frozen": False,
+                    "deposit_events": {
+                        "counter": str(index),
+                        "guid": {"id": {"addr": str(address), "creation_num": "2"}},
+                    },
+                },
+            }
+        )
+        serializer = Serializer()
+        serializer.u64(index * 1_000_000)
+        serializer.bool(False)
+        serializer.u64(index)
+        address.serialize(serializer)
+        serializer.u64(2)
+        bcs_resources[StructTag.from_str(resource_type)] = serializer.output()
+
+    serializer = Serializer()
+    serializer.map(bcs_resources, Serializer.struct, Serializer.to_bytes)
+    return json_resources, serializer.output()
+
+
+def simulated_client() -> RestClient:
+    json_resources, bcs_resources = synthetic_resources()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("Accept") == BCS_CONTENT_TYPE:
+            return httpx.Response(200, content=bcs_resources)
+        return httpx.Response(200, json=json_resources)
+
+    client = RestClient("http://node/v1")
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+async def measure(
+    name: str, read: Callable[[], Awaitable[Any]], transferred: Callable[[], int]
+):
+    await read()
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        result = await read()
+    elapsed = (time.process_time() - start) / ITERATIONS
+    print(
+        f"{name:>5}: {len(result):>6} resources, {transferred():>9} bytes, "
+        f"{elapsed * 1000:8.2f} ms CPU per read"
+    )
+
+
+async def main():
+    if len(sys.argv) == 3:
+        client = RestClient(sys.argv[1])
+        address = AccountAddress.from_str_relaxed(sys.argv[2])
+    else:
+        client = simulated_client()
+        address = AccountAddress.from_str("0x1")
+
+    # Bytes of the most recent response body per format
+    sizes: Dict[bool, int] = {}
+
+    async def record_size(response: httpx.Response):
+        await response.aread()
+        bcs = response.request.headers.get("Accept") == BCS_CONTENT_TYPE
+        sizes[bcs] = len(response.content)
+
+    client.client.event_hooks["response"].append(record_size)
+    await measure(
+        "json", lambda: client.account_resources(address), lambda: sizes[False]
+    )
+    if type(fastest()) is not JsonCodec:
+        client.client_config = copy.copy(client.client_config)
+        client.client_config.json_codec = fastest()
+        await measure(
+            "fast", lambda: client.account_resources(address), lambda: sizes[False]
+        )
+    await measure(
+        "bcs", lambda: client.account_resources_bcs(address), lambda: sizes[True]
+    )
+    await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures the per-transaction overhead of building the message to sign, RawTransaction.keyed, and
+of signing it, against the previous construction that hashed the domain separator on every call
+and copied the message through a bytearray:
+
+    python -m benchmarks.signing
+"""
+
+import hashlib
+
+from benchmarks import measure
+from endless_sdk import ed25519, secp256k1_ecdsa
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.bcs import Serializer
+from endless_sdk.transactions import (
+    EntryFunction,
+    RawTransaction,
+    TransactionArgument,
+    TransactionPayload,
+)
+
+ITERATIONS = 20_000
+
+
+def transaction() -> RawTransaction:
+    payload = TransactionPayload(
+        EntryFunction.natural(
+            "0x1::endless_account",
+            "transfer",
+            [],
+            [
+                TransactionArgument(AccountAddress.from_str("0x2"), Serializer.struct),
+                TransactionArgument(1_000, Serializer.u128),
+            ],
+        )
+    )
+    return RawTransaction(
+        AccountAddress.from_str("0x1"), 0, payload, 2_000, 100, 2**32, 4
+    )
+
+
+def previous_keyed(raw_transaction: RawTransaction) -> bytes:
+    ser = Serializer()
+    raw_transaction.serialize(ser)
+    hasher = hashlib.sha3_256()
+    hasher.update(b"ENDLESS::RawTransaction")
+    prehash = bytearray(hasher.digest())
+    prehash.extend(ser.output())
+    return bytes(prehash)
+
+
+def main():
+    raw_transaction = transaction()
+    assert previous_keyed(raw_transaction) == raw_transaction.keyed()
+
+    measure("keyed, previous", lambda: previous_keyed(raw_transaction), ITERATIONS)
+    measure("keyed", raw_transaction.keyed, ITERATIONS)
+
+    for name, key in [
+        ("ed25519", ed25519.PrivateKey.random()),
+        ("secp256k1", secp256k1_ecdsa.PrivateKey.random()),
+    ]:
+        iterations = ITERATIONS // 10
+        measure(
+            f"{name} sign, previous",
+            lambda: key.sign(previous_keyed(raw_transaction)),
+            iterations,
+        )
+        measure(f"{name} sign", lambda: key.sign(raw_transaction.keyed()), iterations)
+
+
+if __name__ == "__main__":
+    main()
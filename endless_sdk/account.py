@@ -91,7 +91,6 @@ class Account:
     def sign_transaction(
         self, transaction: RawTransactionInternal
     ) -> AccountAuthenticator:
-        print(self.private_key)
         return transaction.sign(self.private_key)
 
     def public_key(self) -> asymmetric_crypto.PublicKey:
@@ -10,6 +10,7 @@ from dataclasses import dataclass
 
 from . import asymmetric_crypto, asymmetric_crypto_wrapper, ed25519
 from .bcs import Deserializer, Serializer
+from .bcs_schema import FixedBytes, Schema
 
 
 class AuthKeyScheme:
@@ -32,6 +33,8 @@ class AccountAddress:
     address: bytes
     LENGTH: int = 32
 
+    schema = Schema(address=FixedBytes(LENGTH))
+
     def __init__(self, address: bytes):
         self.address = address
 
@@ -260,10 +263,10 @@ class AccountAddress:
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> AccountAddress:
-        return AccountAddress(deserializer.fixed_bytes(AccountAddress.LENGTH))
+        return AccountAddress.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        serializer.fixed_bytes(self.address)
+        AccountAddress.schema.encode(serializer, self)
 
 
 """
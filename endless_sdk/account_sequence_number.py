@@ -124,10 +124,10 @@ class AccountSequenceNumber:
 
     async def _resync(self, check: Callable[[AccountSequenceNumber], bool]):
         """Forces a resync with the upstream, this should be called within the lock"""
-        start_time = await self._client.current_timestamp()
+        start_time = await self._client.approximate_timestamp()
         failed = False
         while check(self):
-            ledger_time = await self._client.current_timestamp()
+            ledger_time = await self._client.approximate_timestamp()
             if ledger_time - start_time > self._maximum_wait_time:
                 logging.warn(
                     f"Waited over {self._maximum_wait_time} seconds for a transaction to commit, resyncing {self._account}"
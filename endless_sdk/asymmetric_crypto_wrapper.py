@@ -4,9 +4,10 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple, cast
+from typing import List, Optional, Tuple, cast
 
 from . import asymmetric_crypto, ed25519, secp256k1_ecdsa
+from .batch_verify import SignatureCheck
 from .bcs import Deserializer, Serializer
 
 
@@ -123,23 +124,25 @@ class MultiPublicKey(asymmetric_crypto.PublicKey):
         return f"{self.threshold}-of-{len(self.keys)} Multi key"
 
     def verify(self, data: bytes, signature: asymmetric_crypto.Signature) -> bool:
-        try:
-            total_sig = cast(MultiSignature, signature)
-            assert self.threshold <= len(
-                total_sig.signatures
-            ), f"Insufficient signatures, {self.threshold} > {len(total_sig.signatures)}"
-
-            for idx, signature in total_sig.signatures:
-                assert (
-                    len(self.keys) > idx
-                ), f"Signature index exceeds available keys {len(self.keys)} < {idx}"
-                assert self.keys[idx].verify(
-                    data, signature
-                ), "Unable to verify signature"
-
-        except Exception:
-            return False
-        return True
+        checks = self.signature_checks(data, signature)
+        return checks is not None and all(k.verify(d, s) for (d, k, s) in checks)
+
+    def signature_checks(
+        self, data: bytes, signature: asymmetric_crypto.Signature
+    ) -> Optional[List[SignatureCheck]]:
+        """
+        The individual signatures to verify, unwrapped, see batch_verify, or None if there are
+        fewer signatures than the threshold or signatures for keys that do not exist.
+        """
+        total_sig = cast(MultiSignature, signature)
+        if len(total_sig.signatures) < self.threshold:
+            return None
+        checks: List[SignatureCheck] = []
+        for idx, signature in total_sig.signatures:
+            if idx >= len(self.keys):
+                return None
+            checks.append((data, self.keys[idx].public_key, signature.signature))
+        return checks
 
     @staticmethod
     def from_crypto_bytes(indata: bytes) -> MultiPublicKey:
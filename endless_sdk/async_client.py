@@ -3,23 +3,58 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import asyncio
+import json
 import logging
 import time
+import unittest
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 import pdb
 import httpx
 import python_graphql_client
 import pdb
 from .account import Account
 from .account_address import AccountAddress
-from .authenticator import Authenticator, MultiAgentAuthenticator
-from .bcs import Serializer
+from .authenticator import (
+    AccountAuthenticator,
+    Authenticator,
+    MultiAgentAuthenticator,
+)
+from .bcs import Deserializer, Serializer
+from .chain_metadata import ChainMetadata
+from .endpoint_pool import EndpointPool
+from .gas_amount_cache import GasAmountCache
+from .json_codec import JsonCodec
 from .metadata import Metadata
+from .pagination import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_PAGE_SIZE,
+    paginate,
+    paginate_cursor,
+)
+from .poll_schedule import PollSchedule
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .retry_policy import RetryPolicy
+from .signing_executor import SigningExecutor
+from .single_flight import SingleFlight
 from .transactions import (
     EntryFunction,
     MultiAgentRawTransaction,
     RawTransaction,
+    RawTransactionInternal,
     SignedTransaction,
     TransactionArgument,
     TransactionPayload,
@@ -27,6 +62,7 @@ from .transactions import (
 from .type_tag import StructTag, TypeTag
 
 U64_MAX = 18446744073709551615
+BCS_CONTENT_TYPE = "application/x-bcs"
 from endless_sdk.bcs import encoder 
 
 @dataclass
@@ -39,43 +75,106 @@ class ClientConfig:
     transaction_wait_in_seconds: int = 20
     http2: bool = False
     api_key: Optional[str] = None
+    retry_policy: Optional[RetryPolicy] = None
+    rate_limiter: Optional[RateLimiter] = None
+    coalesce_reads: bool = True
+    response_cache: Optional[ResponseCache] = None
+    json_codec: JsonCodec = JsonCodec()
+    poll_schedule: PollSchedule = PollSchedule()
+    # Chain metadata older than this many seconds is reloaded in a task when next used
+    metadata_refresh_interval: float = 10.0
+    # If set, a background task refreshes chain metadata instead, until close() is called
+    metadata_background_refresh: bool = False
+    # If set, transactions are priced with the node's estimate for this GasPriceTier by default
+    gas_price_tier: Optional[str] = None
+    # If set, max gas amounts of entry function calls are derived from simulating them
+    gas_amount_cache: Optional[GasAmountCache] = None
+    # If set, transactions are signed in its pools rather than on the event loop
+    signing_executor: Optional[SigningExecutor] = None
 
 
 class IndexerClient:
-    """A wrapper around the Endless Indexer Service on Hasura"""
+    """
+    A wrapper around the Endless Indexer Service on Hasura
+
+    If a json_codec is given, queries are sent over a persistent httpx client and responses are
+    decoded with that codec, rather than through python_graphql_client.
+    """
 
     client: python_graphql_client.GraphqlClient
+    http_client: Optional[httpx.AsyncClient]
+    json_codec: Optional[JsonCodec]
 
-    def __init__(self, indexer_url: str, bearer_token: Optional[str] = None):
+    def __init__(
+        self,
+        indexer_url: str,
+        bearer_token: Optional[str] = None,
+        json_codec: Optional[JsonCodec] = None,
+    ):
         headers = {}
         if bearer_token:
             headers["Authorization"] = f"Bearer {bearer_token}"
+        self.indexer_url = indexer_url
         self.client = python_graphql_client.GraphqlClient(
             endpoint=indexer_url, headers=headers
         )
+        self.json_codec = json_codec
+        self.http_client = None
+        if json_codec is not None:
+            self.http_client = httpx.AsyncClient(headers=headers)
+
+    async def close(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
 
     async def query(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
-        return await self.client.execute_async(query, variables)
+        if self.http_client is None or self.json_codec is None:
+            return await self.client.execute_async(query, variables)
+
+        body: Dict[str, Any] = {"query": query}
+        if variables:
+            body["variables"] = variables
+        response = await self.http_client.post(
+            self.indexer_url,
+            content=self.json_codec.dumps(body),
+            headers={"Content-Type": "application/json"},
+        )
+        return self.json_codec.loads(response.content)
 
 
 
 class RestClient:
-    """A wrapper around the Endless-core Rest API"""
+    """
+    A wrapper around the Endless-core Rest API
+
+    The client may be given a list of equivalent fullnode urls instead of a single one. Each request
+    is then sent to the healthiest node, as ranked by the EndpointPool, and fails over to the next
+    node on connection errors or 5xx responses. base_url always refers to the first url provided.
+    """
 
     _chain_id: Optional[int]
     client: httpx.AsyncClient
     client_config: ClientConfig
     base_url: str
+    endpoints: EndpointPool
+    metadata: ChainMetadata
+    _single_flight: SingleFlight
 
-    def __init__(self, base_url: str, client_config: ClientConfig = ClientConfig()):
-        self.base_url = base_url
+    def __init__(
+        self,
+        base_url: Union[str, Sequence[str]],
+        client_config: ClientConfig = ClientConfig(),
+    ):
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.endpoints = EndpointPool(urls)
+        self.base_url = self.endpoints.endpoints[0].url
         # Default limits
         limits = httpx.Limits()
         # Default timeouts but do not set a pool timeout, since the idea is that jobs will wait as
         # long as progress is being made.
         timeout = httpx.Timeout(60.0, pool=None)
         # Default headers
-        headers = {Metadata.Endless_HEADER: Metadata.get_endless_header_val()}
+        headers = {Metadata.ENDLESS_HEADER: Metadata.get_endless_header_val()}
         self.client = httpx.AsyncClient(
             http2=client_config.http2,
             limits=limits,
@@ -84,18 +183,44 @@ class RestClient:
         )
         self.client_config = client_config
         self._chain_id = None
+        self.metadata = ChainMetadata(
+            self,
+            client_config.metadata_refresh_interval,
+            client_config.metadata_background_refresh,
+        )
+        self._single_flight = SingleFlight()
         if client_config.api_key:
             self.client.headers["Authorization"] = f"Bearer {client_config.api_key}"
 
     async def close(self):
+        self.metadata.close()
         await self.client.aclose()
 
     async def chain_id(self):
         if not self._chain_id:
-            info = await self.info()
-            self._chain_id = int(info["chain_id"])
+            await self.metadata.load()
+            self._chain_id = self.metadata.chain_id
         return self._chain_id
 
+    async def approximate_timestamp(self) -> float:
+        """
+        The current ledger timestamp in seconds, derived from the local clock and the offset to the
+        ledger observed at the last metadata refresh. Unlike current_timestamp, this usually does
+        not require a request.
+        """
+        return await self.metadata.ledger_timestamp()
+
+    async def gas_unit_price(self, gas_price_tier: Optional[str] = None) -> int:
+        """
+        The gas unit price for new transactions: the node's cached estimate for gas_price_tier, or
+        for the client_config's tier if none is given, otherwise the static gas_unit_price.
+        """
+        if gas_price_tier is None:
+            gas_price_tier = self.client_config.gas_price_tier
+        if gas_price_tier is None:
+            return self.client_config.gas_unit_price
+        return await self.metadata.gas_estimate(gas_price_tier)
+
     #
     # Account accessors
     #
@@ -116,7 +241,7 @@ class RestClient:
         )
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def account_balance(
         self, account_address: AccountAddress, ledger_version: Optional[int] = None
@@ -135,7 +260,7 @@ class RestClient:
             [TransactionArgument(account_address, Serializer.struct)],
             ledger_version,
         )
-        return int(result[0])
+        return int(self.parsed(result)[0])
 
     async def account_sequence_number(
         self, account_address: AccountAddress, ledger_version: Optional[int] = None
@@ -149,6 +274,7 @@ class RestClient:
         """
         try:
             account_res = await self.account(account_address, ledger_version)
+            account_res = self.parsed(account_res)
             return int(account_res["sequence_number"])
         except ApiError as ae:
             if ae.status_code != 404:
@@ -172,15 +298,17 @@ class RestClient:
         :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
         :return: An individual resource from a given account and at a specific ledger version.
         """
-        response = await self._get(
-            endpoint=f"accounts/{account_address}/resource/{resource_type}",
-            params={"ledger_version": ledger_version},
+        endpoint = f"accounts/{account_address}/resource/{resource_type}"
+        response = await self._cached(
+            (endpoint, ledger_version),
+            ledger_version is not None,
+            lambda: self._get(endpoint, params={"ledger_version": ledger_version}),
         )
         if response.status_code == 404:
             raise ResourceNotFound(resource_type, resource_type)
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def account_resources(
         self,
@@ -205,7 +333,63 @@ class RestClient:
             raise AccountNotFound(f"{account_address}", account_address)
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
-        return response.json()
+        return self._loads(response)
+
+    async def account_resource_bcs(
+        self,
+        account_address: AccountAddress,
+        resource_type: str,
+        ledger_version: Optional[int] = None,
+    ) -> bytes:
+        """
+        Retrieves the BCS encoded value of an individual resource from a given account and at a
+        specific ledger version. This avoids encoding and parsing the resource as JSON.
+
+        :param account_address: Address of the account, with or without a '0x' prefix.
+        :param resource_type: Name of struct to retrieve e.g. 0x1::account::Account.
+        :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
+        :return: The BCS encoded resource, to be decoded with a Deserializer.
+        """
+        endpoint = f"accounts/{account_address}/resource/{resource_type}"
+        response = await self._cached(
+            (endpoint, ledger_version, BCS_CONTENT_TYPE),
+            ledger_version is not None,
+            lambda: self._get(
+                endpoint,
+                params={"ledger_version": ledger_version},
+                headers={"Accept": BCS_CONTENT_TYPE},
+            ),
+        )
+        if response.status_code == 404:
+            raise ResourceNotFound(resource_type, resource_type)
+        if response.status_code >= 400:
+            raise ApiError(f"{response.text} - {account_address}", response.status_code)
+        return response.content
+
+    async def account_resources_bcs(
+        self,
+        account_address: AccountAddress,
+        ledger_version: Optional[int] = None,
+    ) -> Dict[StructTag, bytes]:
+        """
+        Retrieves all account resources for a given account and a specific ledger version, BCS
+        encoded. The response is considerably smaller and cheaper to decode than its JSON variant.
+
+        :param account_address: Address of the account, with or without a '0x' prefix.
+        :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
+        :return: The BCS encoded value of each resource by its type.
+        """
+        response = await self._get(
+            endpoint=f"accounts/{account_address}/resources",
+            params={"ledger_version": ledger_version},
+            headers={"Accept": BCS_CONTENT_TYPE},
+        )
+        if response.status_code == 404:
+            raise AccountNotFound(f"{account_address}", account_address)
+        if response.status_code >= 400:
+            raise ApiError(f"{response.text} - {account_address}", response.status_code)
+        deserializer = Deserializer(response.content)
+        return deserializer.map(StructTag.deserialize, Deserializer.to_bytes)
 
     async def account_module(
         self,
@@ -224,14 +408,16 @@ class RestClient:
         :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
         :return: An individual module from a given account and at a specific ledger version
         """
-        response = await self._get(
-            endpoint=f"accounts/{account_address}/module/{module_name}",
-            params={"ledger_version": ledger_version},
+        endpoint = f"accounts/{account_address}/module/{module_name}"
+        response = await self._cached(
+            (endpoint, ledger_version),
+            ledger_version is not None,
+            lambda: self._get(endpoint, params={"ledger_version": ledger_version}),
         )
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     async def account_modules(
         self,
@@ -252,20 +438,58 @@ class RestClient:
         :param start: Cursor specifying where to start for pagination.
         :return: All account modules' bytecode for a given account at a specific ledger version.
         """
-        response = await self._get(
-            endpoint=f"accounts/{account_address}/modules",
-            params={
-                "ledger_version": ledger_version,
-                "limit": limit,
-                "start": start,
-            },
+        endpoint = f"accounts/{account_address}/modules"
+        params = {"ledger_version": ledger_version, "limit": limit, "start": start}
+        response = await self._cached(
+            (endpoint, ledger_version, limit, start),
+            ledger_version is not None,
+            lambda: self._get(endpoint, params=params),
         )
         if response.status_code == 404:
             raise AccountNotFound(f"{account_address}", account_address)
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
+
+    async def iter_account_modules(
+        self,
+        account_address: AccountAddress,
+        ledger_version: Optional[int] = None,
+        max_items: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        """
+        Streams all account modules for a given account, following the cursor returned by the node
+        in the x-endless-cursor header. The next page is fetched while the current one is consumed.
+
+        :param account_address: Address of the account, with or without a '0x' prefix.
+        :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
+        :param max_items: Max number of account modules to retrieve. If not provided, retrieves all of them.
+        :param page_size: Number of account modules to request at a time.
+        """
+
+        async def fetch(
+            cursor: Optional[str], limit: int
+        ) -> Tuple[List[dict], Optional[str]]:
+            response = await self._get(
+                endpoint=f"accounts/{account_address}/modules",
+                params={
+                    "ledger_version": ledger_version,
+                    "limit": limit,
+                    "start": cursor,
+                },
+            )
+            if response.status_code == 404:
+                raise AccountNotFound(f"{account_address}", account_address)
+            if response.status_code >= 400:
+                raise ApiError(
+                    f"{response.text} - {account_address}", response.status_code
+                )
+            return self._parse(response), response.headers.get("x-endless-cursor")
+
+        async for module in paginate_cursor(fetch, max_items, page_size):
+            yield module
 
     #
     # Blocks
@@ -287,16 +511,19 @@ class RestClient:
         :param with_transactions: If set to true, include all transactions in the block.
         :returns: Block information.
         """
-        response = await self._get(
-            endpoint=f"blocks/by_height/{block_height}",
-            params={
-                "with_transactions": with_transactions,
-            },
+        endpoint = f"blocks/by_height/{block_height}"
+        # Committed blocks never change
+        response = await self._cached(
+            (endpoint, with_transactions),
+            True,
+            lambda: self._get(
+                endpoint, params={"with_transactions": with_transactions}
+            ),
         )
         if response.status_code >= 400:
             raise ApiError(f"{response.text}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     async def blocks_by_version(
         self,
@@ -323,7 +550,7 @@ class RestClient:
         if response.status_code >= 400:
             raise ApiError(f"{response.text}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     #
     # Events
@@ -359,7 +586,7 @@ class RestClient:
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     async def events_by_event_handle(
         self,
@@ -389,10 +616,63 @@ class RestClient:
         if response.status_code >= 400:
             raise ApiError(f"{response.text} - {account_address}", response.status_code)
 
-        return response.json()
+        return self._loads(response)
+
+    def iter_events_by_creation_number(
+        self,
+        account_address: AccountAddress,
+        creation_number: int,
+        start: int = 0,
+        end: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> AsyncIterator[dict]:
+        """
+        Streams the events of an event stream by sequence number, from start up to, but excluding,
+        end, or all remaining events if end is not provided. Up to max_in_flight pages are fetched
+        concurrently.
+        """
+        return paginate(
+            lambda offset, limit: self._parsed_call(
+                self.event_by_creation_number(
+                    account_address, creation_number, limit, offset
+                )
+            ),
+            start,
+            end,
+            page_size,
+            max_in_flight,
+        )
+
+    def iter_events_by_event_handle(
+        self,
+        account_address: AccountAddress,
+        event_handle: str,
+        field_name: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> AsyncIterator[dict]:
+        """
+        Streams the events of an event handle by sequence number, from start up to, but excluding,
+        end, or all remaining events if end is not provided. Up to max_in_flight pages are fetched
+        concurrently.
+        """
+        return paginate(
+            lambda offset, limit: self._parsed_call(
+                self.events_by_event_handle(
+                    account_address, event_handle, field_name, limit, offset
+                )
+            ),
+            start,
+            end,
+            page_size,
+            max_in_flight,
+        )
 
     async def current_timestamp(self) -> float:
-        info = await self.info()
+        info = self.parsed(await self.info())
         return float(info["ledger_timestamp"]) / 1_000_000
 
     async def get_table_item(
@@ -403,18 +683,24 @@ class RestClient:
         key: Any,
         ledger_version: Optional[int] = None,
     ) -> Any:
-        response = await self._post(
-            endpoint=f"tables/{handle}/item",
-            data={
-                "key_type": key_type,
-                "value_type": value_type,
-                "key": key,
-            },
-            params={"ledger_version": ledger_version},
+        endpoint = f"tables/{handle}/item"
+        data = {"key_type": key_type, "value_type": value_type, "key": key}
+        response = await self._cached(
+            (
+                endpoint,
+                key_type,
+                value_type,
+                json.dumps(key, sort_keys=True),
+                ledger_version,
+            ),
+            ledger_version is not None,
+            lambda: self._post(
+                endpoint=endpoint, data=data, params={"ledger_version": ledger_version}
+            ),
         )
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def aggregator_value(
         self,
@@ -423,6 +709,7 @@ class RestClient:
         aggregator_path: List[str],
     ) -> int:
         source = await self.account_resource(account_address, resource_type)
+        source = self.parsed(source)
         source_data = data = source["data"]
 
         while len(aggregator_path) > 0:
@@ -461,10 +748,20 @@ class RestClient:
     #
 
     async def info(self) -> Dict[str, str]:
-        response = await self.client.get(self.base_url)
+        response = await self._get("")
+        if response.status_code >= 400:
+            raise ApiError(response.text, response.status_code)
+        return self._loads(response)
+
+    async def estimate_gas_price(self) -> Dict[str, int]:
+        """
+        The node's gas unit price estimates, keyed by deprioritized_gas_estimate, gas_estimate and
+        prioritized_gas_estimate.
+        """
+        response = await self._get("estimate_gas_price")
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()
+        return self._loads(response)
 
     #
     # Transactions
@@ -483,16 +780,18 @@ class RestClient:
                 "estimate_max_gas_amount": "true",
             }
 
-        response = await self.client.post(
-            f"{self.base_url}/transactions/simulate",
+        response = await self._request(
+            "POST",
+            "transactions/simulate",
             params=params,
             headers=headers,
             content=signed_transaction.bytes(),
+            request_class=RateLimiter.VIEW,
         )
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     async def simulate_transaction(
         self,
@@ -511,50 +810,113 @@ class RestClient:
         self, signed_transaction: SignedTransaction
     ) -> str:
         headers = {"Content-Type": "application/x.endless.signed_transaction+bcs"}
-        response = await self.client.post(
-            f"{self.base_url}/transactions",
+        response = await self._request(
+            "POST",
+            "transactions",
             headers=headers,
             content=signed_transaction.bytes(),
+            idempotent=False,
+            txn_hash=signed_transaction.hash(),
+            request_class=RateLimiter.SUBMIT,
         )
-        
+
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()["hash"]
+        return self._parse(response)["hash"]
+
+    async def submit_bcs_transactions_batch(
+        self, signed_transactions: List[SignedTransaction]
+    ) -> List[Union[str, "ApiError"]]:
+        """
+        Submits many signed transactions in a single request to the batch endpoint.
+
+        The node validates each transaction independently, so some may be accepted while others are
+        rejected. The result holds, for each input in order, either the hash of the accepted
+        transaction or an ApiError describing why it was rejected. An ApiError is raised only if the
+        request as a whole fails.
+
+        :param signed_transactions: Transactions to submit, typically no more than the node's
+            configured batch limit of 100.
+        :returns: Per transaction, the transaction hash or the rejection.
+        """
+        if len(signed_transactions) == 0:
+            return []
+        ser = Serializer()
+        ser.sequence(signed_transactions, Serializer.struct)
+        headers = {"Content-Type": "application/x.endless.signed_transaction+bcs"}
+        response = await self._request(
+            "POST",
+            "transactions/batch",
+            headers=headers,
+            content=ser.output(),
+            idempotent=False,
+            request_class=RateLimiter.SUBMIT,
+        )
+        if response.status_code >= 400:
+            raise ApiError(response.text, response.status_code)
+
+        results: List[Union[str, "ApiError"]] = [
+            signed_transaction.hash() for signed_transaction in signed_transactions
+        ]
+        for failure in self._parse(response).get("transaction_failures", []):
+            error = failure["error"]
+            # Reported with the status the node uses when rejecting a single submission
+            results[int(failure["transaction_index"])] = ApiError(
+                error.get("message", str(error)), 400
+            )
+        return results
 
     async def submit_and_wait_for_bcs_transaction(
         self, signed_transaction: SignedTransaction
     ) -> Dict[str, Any]:
         txn_hash = await self.submit_bcs_transaction(signed_transaction)
-        await self.wait_for_transaction(txn_hash)
-        return await self.transaction_by_hash(txn_hash)
+        return await self.wait_for_transaction(txn_hash)
 
     async def transaction_pending(self, txn_hash: str) -> bool:
+        return await self._committed_transaction(txn_hash) is None
+
+    async def _committed_transaction(self, txn_hash: str) -> Optional[Dict[str, Any]]:
+        """Returns the transaction if it is committed, or None if it is still pending."""
         response = await self._get(endpoint=f"transactions/by_hash/{txn_hash}")
         # TODO(@davidiw): consider raising a different error here, since this is an ambiguous state
         if response.status_code == 404:
-            return True
+            return None
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()["type"] == "pending_transaction"
+        data = self._parse(response)
+        if data["type"] == "pending_transaction":
+            return None
+        return data
 
-    async def wait_for_transaction(self, txn_hash: str) -> None:
+    async def wait_for_transaction(
+        self, txn_hash: str, poll_schedule: Optional[PollSchedule] = None
+    ) -> Dict[str, Any]:
         """
         Waits up to the duration specified in client_config for a transaction to move past pending
-        state.
+        state, polling according to `poll_schedule`, or the one in client_config. Returns the
+        committed transaction as of the last poll, raises TransactionFailed if it was committed but
+        did not succeed and TransactionTimeout if it is still pending at the deadline.
         """
 
-        count = 0
-        while await self.transaction_pending(txn_hash):
-            assert (
-                count < self.client_config.transaction_wait_in_seconds
-            ), f"transaction {txn_hash} timed out"
-            await asyncio.sleep(1)
-            count += 1
-
-        response = await self._get(endpoint=f"transactions/by_hash/{txn_hash}")
-        assert (
-            "success" in response.json() and response.json()["success"]
-        ), f"{response.text} - {txn_hash}"
+        if poll_schedule is None:
+            poll_schedule = self.client_config.poll_schedule
+        deadline = time.monotonic() + self.client_config.transaction_wait_in_seconds
+        intervals = poll_schedule.intervals()
+        while True:
+            data = await self._committed_transaction(txn_hash)
+            if data is not None:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TransactionTimeout(f"transaction {txn_hash} timed out", txn_hash)
+            # The last poll happens right at the deadline
+            await asyncio.sleep(min(next(intervals), remaining))
+
+        if not data.get("success"):
+            raise TransactionFailed(
+                f"transaction {txn_hash} failed: {data.get('vm_status')}", data
+            )
+        return data
 
     async def account_transaction_sequence_number_status(
         self, address: AccountAddress, sequence_number: int
@@ -570,20 +932,24 @@ class RestClient:
         if response.status_code >= 400:
             logging.info(f"k {response}")
             raise ApiError(response.text, response.status_code)
-        data = response.json()
+        data = self._parse(response)
         return len(data) == 1 and data[0]["type"] != "pending_transaction"
 
     async def transaction_by_hash(self, txn_hash: str) -> Dict[str, Any]:
         response = await self._get(endpoint=f"transactions/by_hash/{txn_hash}")
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def transaction_by_version(self, version: int) -> Dict[str, Any]:
-        response = await self._get(endpoint=f"transactions/by_version/{version}")
+        endpoint = f"transactions/by_version/{version}"
+        # Committed transactions never change
+        response = await self._cached(
+            (endpoint,), True, lambda: self._get(endpoint=endpoint)
+        )
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def transactions_by_account(
         self,
@@ -614,7 +980,7 @@ class RestClient:
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
 
-        return response.json()
+        return self._loads(response)
 
     async def transactions(
         self,
@@ -641,7 +1007,52 @@ class RestClient:
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
 
-        return response.json()
+        return self._loads(response)
+
+    def iter_transactions_by_account(
+        self,
+        account_address: AccountAddress,
+        start: int = 0,
+        end: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> AsyncIterator[dict]:
+        """
+        Streams the committed transactions of an account by sequence number, from start up to, but
+        excluding, end, or all remaining transactions if end is not provided. Up to max_in_flight
+        pages are fetched concurrently.
+        """
+        return paginate(
+            lambda offset, limit: self._parsed_call(
+                self.transactions_by_account(account_address, limit, offset)
+            ),
+            start,
+            end,
+            page_size,
+            max_in_flight,
+        )
+
+    def iter_transactions(
+        self,
+        start: int = 0,
+        end: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> AsyncIterator[dict]:
+        """
+        Streams committed transactions by ledger version, from start up to, but excluding, end, or
+        up to the latest transaction if end is not provided. Up to max_in_flight pages are fetched
+        concurrently.
+        """
+        return paginate(
+            lambda offset, limit: self._parsed_call(
+                self.transactions(limit, offset)
+            ),
+            start,
+            end,
+            page_size,
+            max_in_flight,
+        )
 
     #
     # Transaction helpers
@@ -652,6 +1063,7 @@ class RestClient:
         sender: Account,
         secondary_accounts: List[Account],
         payload: TransactionPayload,
+        gas_price_tier: Optional[str] = None,
     ) -> SignedTransaction:
         raw_transaction = MultiAgentRawTransaction(
             RawTransaction(
@@ -659,22 +1071,25 @@ class RestClient:
                 await self.account_sequence_number(sender.address()),
                 payload,
                 self.client_config.max_gas_amount,
-                self.client_config.gas_unit_price,
+                await self.gas_unit_price(gas_price_tier),
                 int(time.time()) + self.client_config.expiration_ttl,
                 await self.chain_id(),
             ),
             [x.address() for x in secondary_accounts],
         )
 
+        signatures = await asyncio.gather(
+            *[
+                self.sign_transaction(x, raw_transaction)
+                for x in [sender] + secondary_accounts
+            ]
+        )
         authenticator = Authenticator(
             MultiAgentAuthenticator(
-                sender.sign_transaction(raw_transaction),
+                signatures[0],
                 [
-                    (
-                        x.address(),
-                        x.sign_transaction(raw_transaction),
-                    )
-                    for x in secondary_accounts
+                    (x.address(), signature)
+                    for (x, signature) in zip(secondary_accounts, signatures[1:])
                 ],
             )
         )
@@ -686,6 +1101,7 @@ class RestClient:
         sender: Union[Account, AccountAddress],
         payload: TransactionPayload,
         sequence_number: Optional[int] = None,
+        gas_price_tier: Optional[str] = None,
     ) -> RawTransaction:
         # pdb.set_trace()
         if isinstance(sender, Account):
@@ -698,30 +1114,74 @@ class RestClient:
             if sequence_number is not None
             else await self.account_sequence_number(sender_address)
         )
-        return RawTransaction(
+        raw_transaction = RawTransaction(
             sender_address,
             sequence_number,
             payload,
             self.client_config.max_gas_amount,
-            self.client_config.gas_unit_price,
+            await self.gas_unit_price(gas_price_tier),
             int(time.time()) + self.client_config.expiration_ttl,
             await self.chain_id(),
         )
+        if isinstance(sender, Account):
+            max_gas_amount = await self._max_gas_amount(sender, raw_transaction)
+            if max_gas_amount is not None:
+                raw_transaction.max_gas_amount = max_gas_amount
+        return raw_transaction
+
+    async def _max_gas_amount(
+        self, sender: Account, raw_transaction: RawTransaction
+    ) -> Optional[int]:
+        """
+        The max gas amount for the transaction according to the gas_amount_cache, simulating the
+        transaction if the cache has no fresh entry. None if there is no cache, the payload is not
+        cached or the simulation failed.
+        """
+        cache = self.client_config.gas_amount_cache
+        if cache is None:
+            return None
+        key = cache.key(raw_transaction.payload)
+        if key is None:
+            return None
+
+        async def simulate() -> Optional[Tuple[int, int]]:
+            try:
+                result = await self.simulate_transaction(raw_transaction, sender, True)
+            except (ApiError, httpx.HTTPError) as e:
+                # The transaction is still built, with the configured max gas amount
+                logging.warning(f"Failed to simulate the transaction: {e}")
+                return None
+            result = self.parsed(result)[0]
+            if not result["success"]:
+                return None
+            return (int(result["gas_used"]), int(result["max_gas_amount"]))
+
+        return await cache.gas_amount(key, simulate)
 
     async def create_bcs_signed_transaction(
         self,
         sender: Account,
         payload: TransactionPayload,
         sequence_number: Optional[int] = None,
+        gas_price_tier: Optional[str] = None,
     ) -> SignedTransaction:
         raw_transaction = await self.create_bcs_transaction(
-            sender, payload, sequence_number
+            sender, payload, sequence_number, gas_price_tier
         )
         
-        authenticator = sender.sign_transaction(raw_transaction)
+        authenticator = await self.sign_transaction(sender, raw_transaction)
         
         return SignedTransaction(raw_transaction, authenticator)
 
+    async def sign_transaction(
+        self, account: Account, transaction: RawTransactionInternal
+    ) -> AccountAuthenticator:
+        """Signs with the client_config's signing_executor, if any, otherwise inline."""
+        executor = self.client_config.signing_executor
+        if executor is None:
+            return account.sign_transaction(transaction)
+        return await executor.sign_transaction(account, transaction)
+
     #
     # Transaction wrappers
     #
@@ -835,6 +1295,7 @@ class RestClient:
                 "type_arguments": type_arguments,
                 "arguments": arguments,
             },
+            request_class=RateLimiter.VIEW,
         )
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
@@ -864,20 +1325,30 @@ class RestClient:
         :param ledger_version: Ledger version to get state of account. If not provided, it will be the latest version.
         :returns: Execution result.
         """
-        request = f"{self.base_url}/view"
-        if ledger_version:
-            request = f"{request}?ledger_version={ledger_version}"
-
         view_data = EntryFunction.natural(module, function, ty_args, args)
         ser = Serializer()
         view_data.serialize(ser)
+        content = ser.output()
         headers = {"Content-Type": "application/x.endless.view_function+bcs"}
-        response = await self.client.post(
-            request, headers=headers, content=ser.output()
-        )
+
+        def request() -> Awaitable[httpx.Response]:
+            return self._request(
+                "POST",
+                "view",
+                params={"ledger_version": ledger_version},
+                headers=headers,
+                content=content,
+                request_class=RateLimiter.VIEW,
+            )
+
+        if self.client_config.coalesce_reads:
+            key = ("view", content, ledger_version)
+            response = await self._single_flight.do(key, request)
+        else:
+            response = await request()
         if response.status_code >= 400:
             raise ApiError(response.text, response.status_code)
-        return response.json()
+        return self._loads(response)
 
     async def _post(
         self,
@@ -885,27 +1356,231 @@ class RestClient:
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
+        request_class: str = RateLimiter.READ,
     ) -> httpx.Response:
-        # format params:
-        params = {} if params is None else params
-        params = {key: val for key, val in params.items() if val is not None}
-        return await self.client.post(
-            url=f"{self.base_url}/{endpoint}",
+        codec = self.client_config.json_codec
+        return await self._request(
+            "POST",
+            endpoint,
             params=params,
-            headers=headers,
-            json=data,
+            headers={"Content-Type": "application/json", **(headers or {})},
+            content=None if data is None else codec.dumps(data),
+            request_class=request_class,
         )
 
+    def parsed(self, value: Any) -> Any:
+        """
+        Returns the decoded form of a value returned by this client. Values are only left encoded
+        when client_config.json_codec is a RawCodec.
+        """
+        return self.client_config.json_codec.parsed(value)
+
+    async def _parsed_call(self, call: Awaitable[Any]) -> Any:
+        return self.parsed(await call)
+
+    def _loads(self, response: httpx.Response) -> Any:
+        return self.client_config.json_codec.loads(response.content)
+
+    def _parse(self, response: httpx.Response) -> Any:
+        return self.parsed(self._loads(response))
+
+    async def _cached(
+        self,
+        key: Hashable,
+        pinned: bool,
+        call: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """
+        Serves successful responses from client_config.response_cache, if one is set. Pinned
+        responses are immutable, e.g., read at an explicit ledger version, and never expire.
+        """
+        cache = self.client_config.response_cache
+        if cache is None:
+            return await call()
+
+        # Caches may be shared across clients, which are not necessarily on the same network
+        key = (self.base_url, key)
+        response = cache.get(key)
+        if response is None:
+            response = await call()
+            if response.status_code < 400:
+                cache.put(key, response, pinned)
+        return response
+
     async def _get(
-        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        """
+        Identical concurrent GETs are coalesced into a single request, unless disabled via
+        client_config.coalesce_reads. All callers then share the same response.
+        """
+        if not self.client_config.coalesce_reads:
+            return await self._request("GET", endpoint, params=params, headers=headers)
+
+        params = {} if params is None else params
+        key = (
+            "GET",
+            endpoint,
+            tuple(sorted((k, str(v)) for k, v in params.items() if v is not None)),
+            None if headers is None else tuple(sorted(headers.items())),
+        )
+        return await self._single_flight.do(
+            key,
+            lambda: self._request("GET", endpoint, params=params, headers=headers),
+        )
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        json: Optional[Any] = None,
+        idempotent: bool = True,
+        txn_hash: Optional[str] = None,
+        request_class: str = RateLimiter.READ,
+    ) -> httpx.Response:
+        """
+        Sends a request, retrying transient failures as dictated by client_config.retry_policy.
+
+        A non-idempotent request that failed ambiguously is only retried if txn_hash is provided
+        and the node does not know about that transaction. If the node does know it, the lookup
+        response is returned in place of the submission response.
+
+        :param idempotent: Whether the request can safely be sent more than once.
+        :param txn_hash: The hash of the transaction being submitted, if any.
+        :param request_class: Which of the client_config.rate_limiter buckets to draw from.
+        """
+        policy = self.client_config.retry_policy
+        if policy is None:
+            return await self._send(
+                method,
+                endpoint,
+                params,
+                headers,
+                content,
+                json,
+                idempotent,
+                request_class,
+            )
+        if policy.budget is not None:
+            policy.budget.record_request()
+
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            try:
+                response = await self._send(
+                    method,
+                    endpoint,
+                    params,
+                    headers,
+                    content,
+                    json,
+                    idempotent,
+                    request_class,
+                )
+            except httpx.TransportError as e:
+                error = e
+
+            retry = attempt + 1 < policy.max_attempts and policy.transient(
+                response, error
+            )
+            if retry and not idempotent and not policy.rejected(response, error):
+                retry = False
+                if txn_hash is not None:
+                    try:
+                        lookup = await self._send(
+                            "GET", f"transactions/by_hash/{txn_hash}"
+                        )
+                    except httpx.TransportError:
+                        lookup = None
+                    if lookup is not None and lookup.status_code < 400:
+                        return lookup
+                    retry = lookup is not None and lookup.status_code == 404
+            if retry and policy.budget is not None and not policy.budget.withdraw():
+                retry = False
+
+            if not retry:
+                if error is not None:
+                    raise error
+                assert response is not None
+                return response
+
+            await asyncio.sleep(policy.delay(attempt, response))
+            attempt += 1
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        json: Optional[Any] = None,
+        idempotent: bool = True,
+        request_class: str = RateLimiter.READ,
     ) -> httpx.Response:
+        """
+        Sends a request to the healthiest endpoint, failing over to the others in order of health.
+
+        Idempotent requests fail over on any transport error or 5xx response. Non-idempotent
+        requests, i.e., transaction submission, only fail over if the connection could not be
+        established, since otherwise the node may have already accepted the request.
+
+        :param endpoint: Path relative to the node url, or an empty string for the node url itself.
+        :param idempotent: Whether the request can safely be sent to more than one node.
+        :returns: The first non-5xx response, or the last 5xx response if all endpoints failed.
+        """
+        if self.client_config.rate_limiter is not None:
+            await self.client_config.rate_limiter.acquire(request_class)
+
         # format params:
         params = {} if params is None else params
         params = {key: val for key, val in params.items() if val is not None}
-        return await self.client.get(
-            url=f"{self.base_url}/{endpoint}",
-            params=params,
-        )
+
+        last_response: Optional[httpx.Response] = None
+        last_error: Optional[httpx.TransportError] = None
+        for node in self.endpoints.ranked():
+            url = f"{node.url}/{endpoint}" if endpoint else node.url
+            start = time.monotonic()
+            try:
+                response = await self.client.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=headers,
+                    content=content,
+                    json=json,
+                )
+            except httpx.TransportError as error:
+                self.endpoints.record_failure(node)
+                if not idempotent and not isinstance(
+                    error, (httpx.ConnectError, httpx.ConnectTimeout)
+                ):
+                    raise
+                last_error = error
+                continue
+
+            if response.status_code >= 500:
+                self.endpoints.record_failure(node)
+                last_response = response
+                if not idempotent:
+                    return response
+                continue
+
+            self.endpoints.record_success(node, time.monotonic() - start)
+            return response
+
+        if last_response is not None:
+            return last_response
+        assert last_error is not None
+        raise last_error
 
 
 class FaucetClient:
@@ -957,6 +1632,28 @@ class ApiError(Exception):
         self.status_code = status_code
 
 
+class TransactionTimeout(TimeoutError):
+    """The transaction was not committed within the time allowed for waiting on it"""
+
+    txn_hash: str
+
+    def __init__(self, message: str, txn_hash: str):
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+        self.txn_hash = txn_hash
+
+
+class TransactionFailed(Exception):
+    """The transaction was committed, but its execution did not succeed"""
+
+    transaction: Dict[str, Any]
+
+    def __init__(self, message: str, transaction: Dict[str, Any]):
+        # Call the base class constructor with the parameters it needs
+        super().__init__(message)
+        self.transaction = transaction
+
+
 class AccountNotFound(Exception):
     """The account was not found"""
 
@@ -977,3 +1674,82 @@ class ResourceNotFound(Exception):
         # Call the base class constructor with the parameters it needs
         super().__init__(message)
         self.resource = resource
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def client(self, requests: List[httpx.Request], resources: Dict[StructTag, bytes]):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            await asyncio.sleep(0.01)
+            bcs = request.headers.get("Accept") == BCS_CONTENT_TYPE
+            if request.url.path.endswith("/resources"):
+                ser = Serializer()
+                ser.map(resources, Serializer.struct, Serializer.to_bytes)
+                return httpx.Response(200, content=ser.output())
+            tag = StructTag.from_str(request.url.path.split("/resource/")[1])
+            if tag not in resources:
+                return httpx.Response(404, json={"message": "Resource not found"})
+            if bcs:
+                return httpx.Response(200, content=resources[tag])
+            return httpx.Response(200, json={"type": str(tag), "data": {}})
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    def resources(self) -> Dict[StructTag, bytes]:
+        return {
+            StructTag.from_str("0x1::account::Account"): bytes.fromhex("0100"),
+            StructTag.from_str(
+                "0x1::coin::CoinStore<0x1::endless_coin::EndlessCoin>"
+            ): (bytes.fromhex("e803000000000000")),
+        }
+
+    async def test_account_resources_bcs(self):
+        requests: List[httpx.Request] = []
+        resources = self.resources()
+        client = self.client(requests, resources)
+
+        decoded = await client.account_resources_bcs(AccountAddress.from_str("0x1"))
+        self.assertEqual(decoded, resources)
+        self.assertEqual(requests[0].headers["Accept"], BCS_CONTENT_TYPE)
+        self.assertEqual(requests[0].url.path, "/v1/accounts/0x1/resources")
+        await client.close()
+
+    async def test_account_resource_bcs(self):
+        requests: List[httpx.Request] = []
+        client = self.client(requests, self.resources())
+        address = AccountAddress.from_str("0x1")
+
+        resource = await client.account_resource_bcs(address, "0x1::account::Account")
+        self.assertEqual(resource, bytes.fromhex("0100"))
+        self.assertEqual(requests[0].headers["Accept"], BCS_CONTENT_TYPE)
+        with self.assertRaises(ResourceNotFound):
+            await client.account_resource_bcs(address, "0x1::object::ObjectCore")
+        await client.close()
+
+    async def test_encodings_not_coalesced(self):
+        requests: List[httpx.Request] = []
+        client = self.client(requests, self.resources())
+        address = AccountAddress.from_str("0x1")
+        resource_type = "0x1::account::Account"
+
+        # Concurrent reads of the same path share a request per encoding, never across them
+        results = await asyncio.gather(
+            *[client.account_resource(address, resource_type) for _ in range(5)],
+            *[client.account_resource_bcs(address, resource_type) for _ in range(5)],
+        )
+        self.assertEqual(results[:5], [{"type": resource_type, "data": {}}] * 5)
+        self.assertEqual(results[5:], [bytes.fromhex("0100")] * 5)
+        self.assertEqual(
+            sorted(
+                request.headers.get("Accept") == BCS_CONTENT_TYPE
+                for request in requests
+            ),
+            [False, True],
+        )
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,11 +6,13 @@ from __future__ import annotations
 
 import typing
 import unittest
-from typing import List
+from typing import List, Optional
 
 from . import asymmetric_crypto, asymmetric_crypto_wrapper, ed25519, secp256k1_ecdsa
 from .account_address import AccountAddress
+from .batch_verify import SignatureCheck
 from .bcs import Deserializer, Serializer
+from .bcs_schema import Enum, Schema
 
 
 class Authenticator:
@@ -27,6 +29,17 @@ class Authenticator:
     FEE_PAYER: int = 3
     SINGLE_SENDER: int = 4
 
+    schema = Enum(
+        "authenticator",
+        {
+            ED25519: "Ed25519Authenticator",
+            MULTI_ED25519: "MultiEd25519Authenticator",
+            MULTI_AGENT: "MultiAgentAuthenticator",
+            FEE_PAYER: "FeePayerAuthenticator",
+            SINGLE_SENDER: "SingleSenderAuthenticator",
+        },
+    )
+
     variant: int
     authenticator: typing.Any
 
@@ -66,28 +79,15 @@ class Authenticator:
     def verify(self, data: bytes) -> bool:
         return self.authenticator.verify(data)
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return self.authenticator.signature_checks(data)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> Authenticator:
-        variant = deserializer.uleb128()
-
-        if variant == Authenticator.ED25519:
-            authenticator: typing.Any = Ed25519Authenticator.deserialize(deserializer)
-        elif variant == Authenticator.MULTI_ED25519:
-            authenticator = MultiEd25519Authenticator.deserialize(deserializer)
-        elif variant == Authenticator.MULTI_AGENT:
-            authenticator = MultiAgentAuthenticator.deserialize(deserializer)
-        elif variant == Authenticator.FEE_PAYER:
-            authenticator = FeePayerAuthenticator.deserialize(deserializer)
-        elif variant == Authenticator.SINGLE_SENDER:
-            authenticator = SingleSenderAuthenticator.deserialize(deserializer)
-        else:
-            raise Exception(f"Invalid type: {variant}")
-
-        return Authenticator(authenticator)
+        return Authenticator.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        serializer.uleb128(self.variant)
-        serializer.struct(self.authenticator)
+        Authenticator.schema.encode(serializer, self)
 
 
 class AccountAuthenticator:
@@ -99,6 +99,16 @@ class AccountAuthenticator:
     variant: int
     authenticator: typing.Any
 
+    schema = Enum(
+        "authenticator",
+        {
+            ED25519: "Ed25519Authenticator",
+            MULTI_ED25519: "MultiEd25519Authenticator",
+            SINGLE_KEY: "SingleKeyAuthenticator",
+            MULTI_KEY: "MultiKeyAuthenticator",
+        },
+    )
+
     def __init__(self, authenticator: typing.Any):
         if isinstance(authenticator, Ed25519Authenticator):
             self.variant = AccountAuthenticator.ED25519
@@ -128,32 +138,23 @@ class AccountAuthenticator:
     def verify(self, data: bytes) -> bool:
         return self.authenticator.verify(data)
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return self.authenticator.signature_checks(data)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> AccountAuthenticator:
-        variant = deserializer.uleb128()
-
-        if variant == AccountAuthenticator.ED25519:
-            authenticator: typing.Any = Ed25519Authenticator.deserialize(deserializer)
-        elif variant == AccountAuthenticator.MULTI_ED25519:
-            authenticator = MultiEd25519Authenticator.deserialize(deserializer)
-        elif variant == AccountAuthenticator.SINGLE_KEY:
-            authenticator = SingleKeyAuthenticator.deserialize(deserializer)
-        elif variant == AccountAuthenticator.MULTI_KEY:
-            authenticator = MultiKeyAuthenticator.deserialize(deserializer)
-        else:
-            raise Exception(f"Invalid type: {variant}")
-
-        return AccountAuthenticator(authenticator)
+        return AccountAuthenticator.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        serializer.uleb128(self.variant)
-        serializer.struct(self.authenticator)
+        AccountAuthenticator.schema.encode(serializer, self)
 
 
 class Ed25519Authenticator:
     public_key: ed25519.PublicKey
     signature: ed25519.Signature
 
+    schema = Schema(public_key=ed25519.PublicKey, signature=ed25519.Signature)
+
     def __init__(self, public_key: ed25519.PublicKey, signature: ed25519.Signature):
         self.public_key = public_key
         self.signature = signature
@@ -170,15 +171,15 @@ class Ed25519Authenticator:
     def verify(self, data: bytes) -> bool:
         return self.public_key.verify(data, self.signature)
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return [(data, self.public_key, self.signature)]
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> Ed25519Authenticator:
-        key = deserializer.struct(ed25519.PublicKey)
-        signature = deserializer.struct(ed25519.Signature)
-        return Ed25519Authenticator(key, signature)
+        return Ed25519Authenticator.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        serializer.struct(self.public_key)
-        serializer.struct(self.signature)
+        Ed25519Authenticator.schema.encode(serializer, self)
 
 
 class FeePayerAuthenticator:
@@ -221,6 +222,11 @@ class FeePayerAuthenticator:
             return False
         return all([x[1].verify(data) for x in self.secondary_signers])
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        signers = [self.sender, self.fee_payer[1]]
+        signers += [x[1] for x in self.secondary_signers]
+        return _combined_checks(signers, data)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> FeePayerAuthenticator:
         sender = deserializer.struct(AccountAuthenticator)
@@ -272,6 +278,10 @@ class MultiAgentAuthenticator:
             return False
         return all([x[1].verify(data) for x in self.secondary_signers])
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        signers = [self.sender] + [x[1] for x in self.secondary_signers]
+        return _combined_checks(signers, data)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> MultiAgentAuthenticator:
         sender = deserializer.struct(AccountAuthenticator)
@@ -298,7 +308,10 @@ class MultiEd25519Authenticator:
         self.signature = signature
 
     def verify(self, data: bytes) -> bool:
-        raise NotImplementedError
+        return self.public_key.verify(data, self.signature)
+
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return self.public_key.signature_checks(data, self.signature)
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> MultiEd25519Authenticator:
@@ -326,6 +339,9 @@ class SingleSenderAuthenticator:
     def verify(self, data: bytes) -> bool:
         return self.sender.verify(data)
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return self.sender.signature_checks(data)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> SingleSenderAuthenticator:
         sender = deserializer.struct(AccountAuthenticator)
@@ -355,7 +371,10 @@ class SingleKeyAuthenticator:
             self.signature = asymmetric_crypto_wrapper.Signature(signature)
 
     def verify(self, data: bytes) -> bool:
-        return self.public_key.verify(data, self.signature.signature)
+        return self.public_key.verify(data, self.signature)
+
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return [(data, self.public_key.public_key, self.signature.signature)]
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> SingleKeyAuthenticator:
@@ -383,6 +402,9 @@ class MultiKeyAuthenticator:
     def verify(self, data: bytes) -> bool:
         return self.public_key.verify(data, self.signature)
 
+    def signature_checks(self, data: bytes) -> Optional[List[SignatureCheck]]:
+        return self.public_key.signature_checks(data, self.signature)
+
     @staticmethod
     def deserialize(deserializer: Deserializer) -> MultiKeyAuthenticator:
         public_key = deserializer.struct(asymmetric_crypto_wrapper.MultiPublicKey)
@@ -394,6 +416,18 @@ class MultiKeyAuthenticator:
         serializer.struct(self.signature)
 
 
+def _combined_checks(
+    signers: List[AccountAuthenticator], data: bytes
+) -> Optional[List[SignatureCheck]]:
+    checks: List[SignatureCheck] = []
+    for signer in signers:
+        signer_checks = signer.signature_checks(data)
+        if signer_checks is None:
+            return None
+        checks.extend(signer_checks)
+    return checks
+
+
 class Test(unittest.TestCase):
     def test_multi_key_auth(self):
         expected_output = bytes.fromhex(
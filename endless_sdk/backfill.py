@@ -0,0 +1,259 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Backfills committed transactions over a range of ledger versions by fetching shards of the range
+concurrently and reassembling them in version order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import unittest
+from typing import AsyncIterator, Dict, List, Optional
+
+from .async_client import RestClient
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill:
+    """
+    Streams the transactions with versions in [start, end) in order.
+
+    * The range is split into shards of `shard_size` versions, which `workers` tasks fetch
+      concurrently, one page at a time. Workers run at most `window` shards ahead of the consumer,
+      bounding memory regardless of the length of the range.
+    * A shard that fails is retried from its beginning up to `max_attempts` times with exponential
+      backoff, after which the error is raised to the consumer.
+    * If a `checkpoint_path` is given, the version of the first transaction not yet handed to the
+      consumer is persisted there after every shard. A new Backfill over the same range resumes
+      from that version.
+
+    If end is not given, the range ends at the ledger version at the time run is called.
+    """
+
+    client: RestClient
+    start: int
+    end: Optional[int]
+    shard_size: int
+    page_size: int
+    workers: int
+    window: int
+    max_attempts: int
+    retry_delay: float
+    checkpoint_path: Optional[str]
+
+    def __init__(
+        self,
+        client: RestClient,
+        start: int = 0,
+        end: Optional[int] = None,
+        shard_size: int = 1_000,
+        page_size: int = 100,
+        workers: int = 4,
+        window: Optional[int] = None,
+        max_attempts: int = 3,
+        retry_delay: float = 0.5,
+        checkpoint_path: Optional[str] = None,
+    ):
+        if shard_size < 1 or page_size < 1 or workers < 1 or max_attempts < 1:
+            raise ValueError(
+                "shard_size, page_size, workers and max_attempts must be at least 1"
+            )
+        self.client = client
+        self.start = start
+        self.end = end
+        self.shard_size = shard_size
+        self.page_size = page_size
+        self.workers = workers
+        self.window = 2 * workers if window is None else max(window, workers)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.checkpoint_path = checkpoint_path
+
+    def load_checkpoint(self) -> int:
+        """Returns the version to resume from, which is start if there is no usable checkpoint."""
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return self.start
+        with open(self.checkpoint_path) as file:
+            checkpoint = json.load(file)
+        if checkpoint["start"] != self.start or checkpoint["end"] != self.end:
+            logger.warning(
+                "Ignoring checkpoint %s for a different range", self.checkpoint_path
+            )
+            return self.start
+        return checkpoint["next_version"]
+
+    def save_checkpoint(self, next_version: int):
+        if self.checkpoint_path is None:
+            return
+        checkpoint = {
+            "start": self.start,
+            "end": self.end,
+            "next_version": next_version,
+        }
+        # Write then rename, so that a crash never leaves a partial checkpoint behind
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(checkpoint, file)
+        os.replace(path, self.checkpoint_path)
+
+    async def fetch_shard(self, start: int, end: int) -> List[dict]:
+        for attempt in range(self.max_attempts):
+            try:
+                return [
+                    transaction
+                    async for transaction in self.client.iter_transactions(
+                        start, end, self.page_size, max_in_flight=1
+                    )
+                ]
+            except Exception as e:
+                if attempt + 1 == self.max_attempts:
+                    raise
+                logger.warning("Retrying shard [%d, %d): %s", start, end, e)
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+        raise AssertionError("unreachable")
+
+    async def run(self) -> AsyncIterator[dict]:
+        end = self.end
+        if end is None:
+            info = self.client.parsed(await self.client.info())
+            end = int(info["ledger_version"]) + 1
+        first = self.load_checkpoint()
+        shards = list(range(first, end, self.shard_size))
+
+        results: Dict[int, asyncio.Future] = {
+            shard: asyncio.get_running_loop().create_future() for shard in shards
+        }
+        pending: asyncio.Queue[int] = asyncio.Queue()
+        for shard in shards:
+            pending.put_nowait(shard)
+        # Bounds how far the workers run ahead of the consumer
+        window = asyncio.Semaphore(self.window)
+
+        async def worker():
+            while True:
+                # Taking a permit before a shard guarantees that the earliest shard the consumer
+                # waits for always has a worker
+                await window.acquire()
+                if pending.empty():
+                    window.release()
+                    return
+                shard = pending.get_nowait()
+                try:
+                    shard_end = min(shard + self.shard_size, end)
+                    results[shard].set_result(await self.fetch_shard(shard, shard_end))
+                except Exception as e:
+                    results[shard].set_exception(e)
+                    return
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            for shard in shards:
+                transactions = await results[shard]
+                del results[shard]
+                window.release()
+                for transaction in transactions:
+                    yield transaction
+                self.save_checkpoint(shard + len(transactions))
+                if len(transactions) < min(self.shard_size, end - shard):
+                    # The ledger ends within this shard, so the later shards are empty
+                    return
+        finally:
+            for task in tasks:
+                task.cancel()
+            for result in results.values():
+                if result.done() and not result.cancelled():
+                    result.exception()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def client(self, ledger_version: int, failures: Optional[Dict[int, int]] = None):
+        import httpx
+
+        failures = {} if failures is None else failures
+        self.requests: List[int] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1":
+                return httpx.Response(200, json={"ledger_version": str(ledger_version)})
+            start = int(request.url.params["start"])
+            limit = int(request.url.params["limit"])
+            self.requests.append(start)
+            if failures.get(start, 0) > 0:
+                failures[start] -= 1
+                return httpx.Response(400, json={"message": "failed"})
+            end = min(start + limit, ledger_version + 1)
+            return httpx.Response(
+                200, json=[{"version": str(v)} for v in range(start, end)]
+            )
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    async def test_ordered(self):
+        client = self.client(ledger_version=99)
+        backfill = Backfill(client, 5, shard_size=10, page_size=4, workers=3)
+        versions = [int(t["version"]) async for t in backfill.run()]
+        self.assertEqual(versions, list(range(5, 100)))
+
+        # A range beyond the ledger ends at the last transaction
+        backfill = Backfill(client, 90, 200, shard_size=10, page_size=4, workers=3)
+        versions = [int(t["version"]) async for t in backfill.run()]
+        self.assertEqual(versions, list(range(90, 100)))
+        await client.close()
+
+    async def test_retries(self):
+        from .async_client import ApiError
+
+        client = self.client(ledger_version=49, failures={20: 2})
+        backfill = Backfill(client, 0, 50, shard_size=10, retry_delay=0.001)
+        versions = [int(t["version"]) async for t in backfill.run()]
+        self.assertEqual(versions, list(range(50)))
+        self.assertEqual(self.requests.count(20), 3)
+
+        client = self.client(ledger_version=49, failures={20: 5})
+        backfill = Backfill(client, 0, 50, shard_size=10, retry_delay=0.001)
+        versions = []
+        with self.assertRaises(ApiError):
+            async for transaction in backfill.run():
+                versions.append(int(transaction["version"]))
+        self.assertEqual(versions, list(range(20)))
+        await client.close()
+
+    async def test_checkpoint(self):
+        from .async_client import ApiError
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "backfill.json")
+            client = self.client(ledger_version=49, failures={30: 5})
+            backfill = Backfill(
+                client, 0, 50, shard_size=10, retry_delay=0.001, checkpoint_path=path
+            )
+            with self.assertRaises(ApiError):
+                async for _ in backfill.run():
+                    pass
+            self.assertEqual(backfill.load_checkpoint(), 30)
+
+            # Resumes where the last run stopped
+            client = self.client(ledger_version=49)
+            backfill = Backfill(client, 0, 50, shard_size=10, checkpoint_path=path)
+            versions = [int(t["version"]) async for t in backfill.run()]
+            self.assertEqual(versions, list(range(30, 50)))
+            self.assertEqual(min(self.requests), 30)
+
+            # A checkpoint for another range is ignored
+            backfill = Backfill(client, 10, 50, checkpoint_path=path)
+            self.assertEqual(backfill.load_checkpoint(), 10)
+            await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
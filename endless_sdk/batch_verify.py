@@ -0,0 +1,130 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Verifies many signatures at once, e.g., all signed transactions received by a relayer.
+
+Authenticators expose the individual signatures they consist of via `signature_checks(data)`,
+which returns a list of (message, public key, signature) triples, or None if the authenticator is
+structurally invalid, e.g., a multi-signature below its threshold. An authenticator is valid if all
+of its triples verify.
+"""
+
+from __future__ import annotations
+
+import os
+import typing
+import unittest
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from . import asymmetric_crypto
+
+SignatureCheck = Tuple[bytes, asymmetric_crypto.PublicKey, asymmetric_crypto.Signature]
+
+# Signatures verified per task, large enough to amortize the cost of dispatching a task
+CHUNK_SIZE: int = 64
+
+_default_executor: Optional[ThreadPoolExecutor] = None
+
+
+def default_executor() -> Executor:
+    """A process-wide thread pool with one thread per core, started on first use."""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = ThreadPoolExecutor(
+            os.cpu_count() or 1, thread_name_prefix="verify"
+        )
+    return _default_executor
+
+
+def _verify_chunk(checks: Sequence[SignatureCheck]) -> List[bool]:
+    return [
+        public_key.verify(data, signature) for data, public_key, signature in checks
+    ]
+
+
+def verify_signatures(
+    checks: Sequence[SignatureCheck],
+    executor: Optional[Executor] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[bool]:
+    """
+    Returns whether each (message, public key, signature) triple verifies. Batches larger than one
+    chunk are verified concurrently in the executor, which defaults to the shared default_executor.
+    Both libsodium, for Ed25519, and libsecp256k1, for Secp256k1 when coincurve is installed,
+    release the GIL while verifying, so throughput scales with the number of threads. On a single
+    core the default executor would add only dispatch overhead, so the batch is verified inline.
+    """
+    if len(checks) <= chunk_size:
+        return _verify_chunk(checks)
+    if executor is None:
+        if (os.cpu_count() or 1) == 1:
+            return _verify_chunk(checks)
+        executor = default_executor()
+    chunks = [checks[i : i + chunk_size] for i in range(0, len(checks), chunk_size)]
+    results: List[bool] = []
+    for chunk_results in executor.map(_verify_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+
+def verify_many(
+    authenticators: Sequence[Tuple[Any, bytes]],
+    executor: Optional[Executor] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[bool]:
+    """
+    Returns whether each (authenticator, message) pair verifies, for any authenticator type. All
+    signatures of all authenticators are verified as a single batch.
+    """
+    checks: List[SignatureCheck] = []
+    spans: List[Optional[Tuple[int, int]]] = []
+    for authenticator, data in authenticators:
+        authenticator_checks = authenticator.signature_checks(data)
+        if authenticator_checks is None:
+            spans.append(None)
+            continue
+        spans.append((len(checks), len(checks) + len(authenticator_checks)))
+        checks.extend(authenticator_checks)
+
+    results = verify_signatures(checks, executor, chunk_size)
+    return [span is not None and all(results[span[0] : span[1]]) for span in spans]
+
+
+class Test(unittest.TestCase):
+    def test_verify_signatures(self):
+        from unittest import mock
+
+        from . import ed25519, secp256k1_ecdsa
+
+        checks: List[SignatureCheck] = []
+        expected = []
+        for index in range(100):
+            if index % 10 == 0:
+                private_key: typing.Any = secp256k1_ecdsa.PrivateKey.random()
+            else:
+                private_key = ed25519.PrivateKey.random()
+            data = f"message {index}".encode()
+            signature = private_key.sign(data)
+            valid = index % 7 != 0
+            if not valid:
+                data += b"!"
+            checks.append((data, private_key.public_key(), signature))
+            expected.append(valid)
+
+        self.assertEqual(verify_signatures(checks, chunk_size=8), expected)
+        self.assertEqual(verify_signatures(checks[:5]), expected[:5])
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(verify_signatures(checks, executor, 16), expected)
+
+        # A single core verifies inline rather than in the default executor
+        with mock.patch("os.cpu_count", return_value=1), mock.patch(
+            f"{__name__}.default_executor"
+        ) as default:
+            self.assertEqual(verify_signatures(checks, chunk_size=8), expected)
+        default.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,10 +8,13 @@ This is a simple BCS serializer and deserializer. Learn more at https://github.c
 
 from __future__ import annotations
 
-import io
+import struct
+import sys
 import typing
 import unittest
-from typing import Dict, List
+from array import array
+from struct import Struct
+from typing import Dict, List, NamedTuple
 
 from typing_extensions import Protocol
 
@@ -22,6 +25,12 @@ MAX_U64 = 2**64 - 1
 MAX_U128 = 2**128 - 1
 MAX_U256 = 2**256 - 1
 
+_U16 = Struct("<H")
+_U32 = Struct("<I")
+_U64 = Struct("<Q")
+# Two little endian u64s, the low half first
+_U128 = Struct("<QQ")
+
 
 class Deserializable(Protocol):
     # The following class can be deserialized from a bcs stream.
@@ -46,19 +55,74 @@ class Serializable(Protocol):
     def serialize(self, serializer: Serializer): ...
 
 
+class UnexpectedEndOfInput(Exception):
+    """Raised when a value extends past the end of the input."""
+
+    requested: int
+    found: int
+
+    def __init__(self, requested: int, found: int):
+        super().__init__(
+            f"Unexpected end of input. Requested: {requested}, found: {found}"
+        )
+        self.requested = requested
+        self.found = found
+
+
 class Deserializer:
-    _input: io.BytesIO
+    """
+    Reads BCS from a buffer by moving an offset through it, unpacking fixed width integers in
+    place with struct. With views set, fixed_bytes and to_bytes return memoryviews into the input
+    rather than copies, e.g., to hash or forward the modules of a package without copying them;
+    the views keep the input alive and cannot be decoded with bytes.decode. Sequences of u8 through
+    u128 are unpacked whole with array; to_bytes reads a vector<u8> as bytes, or as a view.
+    """
+
+    _input: typing.Union[bytes, memoryview]
+    _offset: int
     _length: int
 
-    def __init__(self, data: bytes):
-        self._length = len(data)
-        self._input = io.BytesIO(data)
+    def __init__(self, data: bytes, views: bool = False):
+        if views:
+            self._input = memoryview(data).cast("B")
+        elif isinstance(data, bytes):
+            self._input = data
+        else:
+            self._input = bytes(data)
+        self._offset = 0
+        self._length = len(self._input)
 
     def remaining(self) -> int:
-        return self._length - self._input.tell()
+        return self._length - self._offset
+
+    # Low-level access for specialized decoders, such as those generated by bcs_schema
+
+    def buffer(self) -> bytes:
+        """The whole input, from which values are unpacked at the offsets returned by advance."""
+        # A memoryview with views set
+        return typing.cast(bytes, self._input)
+
+    def position(self) -> int:
+        """The offset of the next value in the input."""
+        return self._offset
+
+    def advance(self, length: int) -> int:
+        """Consumes the next `length` bytes of the input and returns their offset."""
+        offset = self._offset
+        end = offset + length
+        if end > self._length:
+            raise UnexpectedEndOfInput(length, self._length - offset)
+        self._offset = end
+        return offset
+
+    def seek(self, position: int):
+        """Moves to a position within the input, e.g., one returned by position."""
+        if not 0 <= position <= self._length:
+            raise ValueError(f"Position {position} is outside of the input")
+        self._offset = position
 
     def bool(self) -> bool:
-        value = int.from_bytes(self._read(1), byteorder="little", signed=False)
+        value = self.u8()
         if value == 0:
             return False
         elif value == 1:
@@ -89,84 +153,125 @@ class Deserializer:
         self,
         value_decoder: typing.Callable[[Deserializer], typing.Any],
     ) -> List[typing.Any]:
+        vector = _VECTOR_DECODERS.get(value_decoder)
+        if vector is not None:
+            return self._vector(vector)
         length = self.uleb128()
-        values: List = []
-        while len(values) < length:
-            values.append(value_decoder(self))
-        return values
+        return [value_decoder(self) for _ in range(length)]
 
     def str(self) -> str:
-        return self.to_bytes().decode()
+        return str(self.to_bytes(), "utf-8")
 
     def struct(self, struct: typing.Any) -> typing.Any:
         return struct.deserialize(self)
 
     def u8(self) -> int:
-        return self._read_int(1)
+        offset = self._offset
+        if offset >= self._length:
+            raise UnexpectedEndOfInput(1, 0)
+        self._offset = offset + 1
+        return self._input[offset]
 
     def u16(self) -> int:
-        return self._read_int(2)
+        return self._unpack(_U16)[0]
 
     def u32(self) -> int:
-        return self._read_int(4)
+        return self._unpack(_U32)[0]
 
     def u64(self) -> int:
-        return self._read_int(8)
+        return self._unpack(_U64)[0]
 
     def u128(self) -> int:
-        return self._read_int(16)
+        low, high = self._unpack(_U128)
+        return low | high << 64
 
     def u256(self) -> int:
-        return self._read_int(32)
+        return int.from_bytes(self._read(32), byteorder="little", signed=False)
 
     def uleb128(self) -> int:
+        data = self._input
+        offset = self._offset
         value = 0
         shift = 0
 
         while value <= MAX_U32:
-            byte = self._read_int(1)
+            if offset >= self._length:
+                self._offset = offset
+                raise UnexpectedEndOfInput(1, 0)
+            byte = data[offset]
+            offset += 1
             value |= (byte & 0x7F) << shift
             if byte & 0x80 == 0:
                 break
             shift += 7
 
+        self._offset = offset
         if value > MAX_U32:
             raise Exception("Unexpectedly large uleb128 value")
 
         return value
 
-    def _read(self, length: int) -> bytes:
-        value = self._input.read(length)
-        if value is None or len(value) < length:
-            actual_length = 0 if value is None else len(value)
-            error = (
-                f"Unexpected end of input. Requested: {length}, found: {actual_length}"
-            )
-            raise Exception(error)
-        return value
+    def _unpack(self, format: Struct) -> typing.Tuple[int, ...]:
+        try:
+            values = format.unpack_from(self._input, self._offset)
+        except struct.error:
+            raise UnexpectedEndOfInput(format.size, self.remaining()) from None
+        self._offset += format.size
+        return values
 
-    def _read_int(self, length: int) -> int:
-        return int.from_bytes(self._read(length), byteorder="little", signed=False)
+    def _vector(self, vector: _Vector) -> List[int]:
+        elements = array(vector.typecode)
+        length = self.uleb128() * vector.width
+        elements.frombytes(self._read(length * elements.itemsize))
+        if _BIG_ENDIAN:
+            elements.byteswap()
+        values = elements.tolist()
+        if vector.width == 1:
+            return values
+        halves = iter(values)
+        return [low | high << 64 for low, high in zip(halves, halves)]
+
+    def _read(self, length: int) -> bytes:
+        offset = self._offset
+        end = offset + length
+        if end > self._length:
+            raise UnexpectedEndOfInput(length, self._length - offset)
+        self._offset = end
+        # A memoryview with views set, which callers may use wherever bytes are read
+        return typing.cast(bytes, self._input[offset:end])
 
 
 class Serializer:
-    _output: io.BytesIO
+    """
+    Writes BCS into a single growable buffer. Integers are packed with struct and the elements of
+    sequences and maps are encoded directly into the buffer, without a serializer per element.
+    Sequences of u8 through u128 are range checked and packed whole, with array.
+    """
+
+    _output: bytearray
 
     def __init__(self):
-        self._output = io.BytesIO()
+        self._output = bytearray()
 
     def output(self) -> bytes:
-        return self._output.getvalue()
+        return bytes(self._output)
+
+    def buffer(self) -> bytearray:
+        """
+        The output written so far, to which specialized encoders, such as those generated by
+        bcs_schema, append encoded values directly.
+        """
+        return self._output
 
     def bool(self, value: bool):
-        self._write_int(int(value), 1)
+        self._output.append(int(value))
 
     def to_bytes(self, value: bytes):
         self.uleb128(len(value))
-        self._output.write(value)
+        self._output += value
 
     def fixed_bytes(self, value):
-        self._output.write(value)
+        self._output += value
 
     def map(
         self,
@@ -174,17 +279,23 @@ class Serializer:
         key_encoder: typing.Callable[[Serializer, typing.Any], None],
         value_encoder: typing.Callable[[Serializer, typing.Any], None],
     ):
-        encoded_values = []
+        self.uleb128(len(values))
+        # Entries are encoded in place, then reordered by their encoded keys
+        output = self._output
+        start = len(output)
+        entries = []
         for key, value in values.items():
-            encoded_values.append(
-                (encoder(key, key_encoder), encoder(value, value_encoder))
-            )
-        encoded_values.sort(key=lambda item: item[0])
-
-        self.uleb128(len(encoded_values))
-        for key, value in encoded_values:
-            self.fixed_bytes(key)
-            self.fixed_bytes(value)
+            entry_start = len(output)
+            key_encoder(self, key)
+            key_end = len(output)
+            value_encoder(self, value)
+            entries.append((output[entry_start:key_end], entry_start, len(output)))
+        entries.sort(key=lambda entry: entry[0])
+
+        encoded = output[start:]
+        del output[start:]
+        for _, entry_start, entry_end in entries:
+            output += encoded[entry_start - start : entry_end - start]
 
     @staticmethod
     def sequence_serializer(
@@ -204,9 +315,13 @@ class Serializer:
         values: typing.List[typing.Any],
         value_encoder: typing.Callable[[Serializer, typing.Any], None],
     ):
+        vector = _VECTOR_ENCODERS.get(value_encoder)
+        if vector is not None:
+            self._vector(values, vector)
+            return
         self.uleb128(len(values))
         for value in values:
-            self.fixed_bytes(encoder(value, value_encoder))
+            value_encoder(self, value)
 
     def str(self, value: str):
         self.to_bytes(value.encode())
@@ -215,56 +330,103 @@ class Serializer:
         value.serialize(self)
 
     def u8(self, value: int):
-        if value > MAX_U8:
+        if not 0 <= value <= MAX_U8:
             raise Exception(f"Cannot encode {value} into u8")
 
-        self._write_int(value, 1)
+        self._output.append(value)
 
     def u16(self, value: int):
-        if value > MAX_U16:
+        if not 0 <= value <= MAX_U16:
             raise Exception(f"Cannot encode {value} into u16")
 
-        self._write_int(value, 2)
+        self._output += _U16.pack(value)
 
     def u32(self, value: int):
-        if value > MAX_U32:
+        if not 0 <= value <= MAX_U32:
             raise Exception(f"Cannot encode {value} into u32")
 
-        self._write_int(value, 4)
+        self._output += _U32.pack(value)
 
     def u64(self, value: int):
-        if value > MAX_U64:
+        if not 0 <= value <= MAX_U64:
             raise Exception(f"Cannot encode {value} into u64")
 
-        self._write_int(value, 8)
+        self._output += _U64.pack(value)
 
     def u128(self, value: int):
-        if value > MAX_U128:
+        if not 0 <= value <= MAX_U128:
             raise Exception(f"Cannot encode {value} into u128")
 
-        self._write_int(value, 16)
+        self._output += _U128.pack(value & MAX_U64, value >> 64)
 
     def u256(self, value: int):
-        if value > MAX_U256:
+        if not 0 <= value <= MAX_U256:
             raise Exception(f"Cannot encode {value} into u256")
 
-        self._write_int(value, 32)
+        self._output += value.to_bytes(32, "little", signed=False)
 
     def uleb128(self, value: int):
-        if value > MAX_U32:
+        if not 0 <= value <= MAX_U32:
             raise Exception(f"Cannot encode {value} into uleb128")
 
+        output = self._output
         while value >= 0x80:
             # Write 7 (lowest) bits of data and set the 8th bit to 1.
-            byte = value & 0x7F
-            self.u8(byte | 0x80)
+            output.append((value & 0x7F) | 0x80)
             value >>= 7
 
         # Write the remaining bits of data and set the highest bit to 0.
-        self.u8(value & 0x7F)
+        output.append(value)
+
+    def _vector(self, values: typing.Sequence[int], vector: _Vector):
+        # Both array and int.to_bytes range check the values while packing them
+        elements: typing.Union[array[int], bytes]
+        try:
+            if vector.width == 1:
+                elements = array(vector.typecode, values)
+                if _BIG_ENDIAN:
+                    elements.byteswap()
+            else:
+                elements = b"".join([v.to_bytes(16, "little") for v in values])
+        except OverflowError:
+            invalid = next(v for v in values if not 0 <= v <= vector.maximum)
+            raise Exception(f"Cannot encode {invalid} into {vector.name}") from None
+        self.uleb128(len(values))
+        self._output += elements
+
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
 
-    def _write_int(self, value: int, length: int):
-        self._output.write(value.to_bytes(length, "little", signed=False))
+def _typecode(size: int) -> str:
+    return next(code for code in "BHILQ" if array(code).itemsize == size)
+
+
+class _Vector(NamedTuple):
+    """
+    The array layout of a vector of fixed width integers, which sequence packs and unpacks whole
+    rather than element by element. A u128 is two u64s, the low half first.
+    """
+
+    typecode: str
+    name: str
+    maximum: int
+    width: int = 1
+
+
+_VECTORS = [
+    (Serializer.u8, Deserializer.u8, _Vector(_typecode(1), "u8", MAX_U8)),
+    (Serializer.u16, Deserializer.u16, _Vector(_typecode(2), "u16", MAX_U16)),
+    (Serializer.u32, Deserializer.u32, _Vector(_typecode(4), "u32", MAX_U32)),
+    (Serializer.u64, Deserializer.u64, _Vector(_typecode(8), "u64", MAX_U64)),
+    (Serializer.u128, Deserializer.u128, _Vector(_typecode(8), "u128", MAX_U128, 2)),
+]
+_VECTOR_ENCODERS: Dict[typing.Callable, _Vector] = {
+    encode: vector for encode, _, vector in _VECTORS
+}
+_VECTOR_DECODERS: Dict[typing.Callable, _Vector] = {
+    decode: vector for _, decode, vector in _VECTORS
+}
 
 
 def encoder(
@@ -323,6 +485,91 @@ class Test(unittest.TestCase):
 
         self.assertEqual(in_value, out_value)
 
+    def test_views(self):
+        ser = Serializer()
+        ser.sequence([b"abc", b"de"], Serializer.to_bytes)
+        ser.str("fgh")
+        data = bytearray(ser.output())
+
+        copies = Deserializer(data)
+        self.assertEqual(copies.sequence(Deserializer.to_bytes), [b"abc", b"de"])
+        der = Deserializer(data, views=True)
+        views = der.sequence(Deserializer.to_bytes)
+        self.assertEqual(der.str(), "fgh")
+
+        # Views share the input rather than copying it
+        self.assertIsInstance(views[0], memoryview)
+        data[3] = ord("x")
+        self.assertEqual(bytes(views[0]), b"axc")
+
+    def test_unexpected_end_of_input(self):
+        ser = Serializer()
+        ser.u32(1)
+        ser.uleb128(300)
+        for read in [
+            Deserializer.u64,
+            Deserializer.u128,
+            lambda der: der.fixed_bytes(7),
+        ]:
+            with self.assertRaises(UnexpectedEndOfInput) as error:
+                read(Deserializer(ser.output()))
+            self.assertEqual(error.exception.found, 6)
+
+        der = Deserializer(ser.output()[:-1])
+        self.assertEqual(der.u32(), 1)
+        with self.assertRaises(UnexpectedEndOfInput):
+            der.uleb128()
+
+    def test_low_level(self):
+        ser = Serializer()
+        ser.u8(1)
+        ser.buffer().extend(_U32.pack(7))
+        self.assertEqual(ser.output(), bytes.fromhex("01 07000000"))
+
+        der = Deserializer(ser.output())
+        self.assertEqual(der.u8(), 1)
+        self.assertEqual(der.position(), 1)
+        self.assertEqual(_U32.unpack_from(der.buffer(), der.advance(4)), (7,))
+        self.assertEqual(der.remaining(), 0)
+        with self.assertRaises(UnexpectedEndOfInput):
+            der.advance(1)
+        der.seek(1)
+        self.assertEqual(der.u32(), 7)
+        with self.assertRaises(ValueError):
+            der.seek(6)
+
+    def test_map_ordering(self):
+        # Entries are ordered by their encoded keys, not by the keys themselves
+        in_value = {300: "a", 2: "b", 1: "c"}
+
+        ser = Serializer()
+        ser.map(in_value, Serializer.uleb128, Serializer.str)
+
+        self.assertEqual(ser.output(), bytes.fromhex("03 01 0163 02 0162 ac02 0161"))
+
+    def test_nested_sequence(self):
+        in_value = [[1, 2], [], [3]]
+
+        ser = Serializer()
+        ser.sequence(in_value, Serializer.sequence_serializer(Serializer.u16))
+        der = Deserializer(ser.output())
+        out_value = der.sequence(lambda der: der.sequence(Deserializer.u16))
+
+        self.assertEqual(in_value, out_value)
+        self.assertEqual(ser.output(), bytes.fromhex("03 02 0100 0200 00 01 0300"))
+
+    def test_out_of_range(self):
+        ser = Serializer()
+        for encode, value in [
+            (ser.u8, MAX_U8 + 1),
+            (ser.u64, MAX_U64 + 1),
+            (ser.u128, -1),
+            (ser.uleb128, MAX_U32 + 1),
+        ]:
+            with self.assertRaises(Exception):
+                encode(value)
+        self.assertEqual(ser.output(), b"")
+
     def test_sequence(self):
         in_value = ["a", "abc", "def", "ghi"]
 
@@ -333,6 +580,35 @@ class Test(unittest.TestCase):
 
         self.assertEqual(in_value, out_value)
 
+    def test_vectors(self):
+        for encode, decode, values, width in [
+            (Serializer.u8, Deserializer.u8, [0, 1, MAX_U8], 1),
+            (Serializer.u16, Deserializer.u16, [0, 0x1234, MAX_U16], 2),
+            (Serializer.u32, Deserializer.u32, [0, 0x12345678, MAX_U32], 4),
+            (Serializer.u64, Deserializer.u64, [0, 2**40 + 5, MAX_U64], 8),
+            (Serializer.u128, Deserializer.u128, [0, 2**64, 2**100 + 7, MAX_U128], 16),
+        ]:
+            ser = Serializer()
+            ser.sequence(values, encode)
+            expected = Serializer()
+            expected.uleb128(len(values))
+            for value in values:
+                expected._output += value.to_bytes(width, "little")
+            self.assertEqual(ser.output(), expected.output())
+
+            der = Deserializer(ser.output(), views=True)
+            self.assertEqual(der.sequence(decode), values)
+            self.assertEqual(der.remaining(), 0)
+
+            for invalid in [-1, values[-1] + 1]:
+                ser = Serializer()
+                with self.assertRaisesRegex(Exception, f"Cannot encode {invalid}"):
+                    ser.sequence(values + [invalid], encode)
+                self.assertEqual(ser.output(), b"")
+
+        with self.assertRaises(UnexpectedEndOfInput):
+            Deserializer(bytes.fromhex("02 0100")).sequence(Deserializer.u16)
+
     def test_sequence_serializer(self):
         in_value = ["a", "abc", "def", "ghi"]
 
@@ -0,0 +1,568 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Declares the BCS layout of a struct once and generates specialized code to serialize and
+deserialize it.
+
+A struct declares its fields in order as a Schema class attribute, with the field names as
+keywords and their BCS types as values:
+
+    class ModuleId:
+        schema = Schema(address=AccountAddress, name=STR)
+
+        def __init__(self, address: AccountAddress, name: str): ...
+
+A field type is one of the primitives below, FixedBytes, Sequence, or a class with serialize and
+deserialize methods, optionally named by a string to refer to classes defined later in the same
+module. Deserializing calls the class with the fields in declaration order. Enums, which wrap the
+value of one of their variants, declare an Enum instead.
+
+On first use, the schema compiles Python source for an encoder and a decoder and caches them.
+The generated code inlines the fields of nested structs that have a schema themselves, packs and
+unpacks consecutive fixed width integers with a single struct call, and writes directly into the
+Serializer buffer, so that there is no method dispatch per field. Classes without a schema, such as
+enums and keys, are called through their serialize and deserialize methods.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+import unittest
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bcs import (
+    MAX_U8,
+    MAX_U16,
+    MAX_U32,
+    MAX_U64,
+    MAX_U128,
+    MAX_U256,
+    Deserializer,
+    Serializer,
+    UnexpectedEndOfInput,
+)
+
+
+class Primitive:
+    name: str
+    # The struct format of fixed width integers, which are packed together with their neighbors
+    format: Optional[str]
+    maximum: Optional[int]
+
+    def __init__(
+        self, name: str, format: Optional[str] = None, maximum: Optional[int] = None
+    ):
+        self.name = name
+        self.format = format
+        self.maximum = maximum
+
+    def __repr__(self) -> str:
+        return self.name.upper()
+
+
+BOOL = Primitive("bool")
+U8 = Primitive("u8", "B", MAX_U8)
+U16 = Primitive("u16", "H", MAX_U16)
+U32 = Primitive("u32", "I", MAX_U32)
+U64 = Primitive("u64", "Q", MAX_U64)
+# Packed as two u64s, the low half first
+U128 = Primitive("u128", "QQ", MAX_U128)
+U256 = Primitive("u256", maximum=MAX_U256)
+ULEB128 = Primitive("uleb128", maximum=MAX_U32)
+STR = Primitive("str")
+BYTES = Primitive("bytes")
+
+
+class FixedBytes:
+    length: int
+
+    def __init__(self, length: int):
+        self.length = length
+
+    def __repr__(self) -> str:
+        return f"FixedBytes({self.length})"
+
+
+class Sequence:
+    element: Any
+
+    def __init__(self, element: Any):
+        self.element = element
+
+    def __repr__(self) -> str:
+        return f"Sequence({self.element!r})"
+
+
+class Schema:
+    """The fields of a struct, compiled into an encoder and a decoder on first use."""
+
+    fields: List[Tuple[str, Any]]
+    owner: Optional[type]
+    encode: Callable[[Serializer, Any], None]
+    decode: Callable[[Deserializer], Any]
+
+    def __init__(self, **fields: Any):
+        self.fields = list(fields.items())
+        self.owner = None
+        self.encode = self._compile_encode
+        self.decode = self._compile_decode
+
+    def __set_name__(self, owner: type, name: str):
+        self.owner = owner
+
+    def _compile_encode(self, serializer: Serializer, value: Any):
+        self.compile()
+        self.encode(serializer, value)
+
+    def _compile_decode(self, deserializer: Deserializer) -> Any:
+        self.compile()
+        return self.decode(deserializer)
+
+    def compile(self):
+        """Generates the encoder and decoder, which otherwise happens on first use."""
+        self.encode = _Compiler(self).encoder()
+        self.decode = _Compiler(self).decoder()
+
+    def resolve(self, field_type: Any) -> Any:
+        """Resolves a class named by a, possibly dotted, string in the module of the owner."""
+        if isinstance(field_type, str):
+            assert self.owner is not None, "Schema must be a class attribute"
+            resolved: Any = sys.modules[self.owner.__module__]
+            for name in field_type.split("."):
+                resolved = getattr(resolved, name)
+            return resolved
+        return field_type
+
+
+class Enum(Schema):
+    """
+    An enum, represented by a class that wraps the value of one of its variants in `field`, e.g.,
+    TransactionPayload wrapping an EntryFunction. `variants` maps each variant index to the class
+    of its value, or to None for variants that are not supported. The variant of a value is
+    looked up by its class when encoding, and decoding calls the enum class with the value.
+    """
+
+    field: str
+    variants: Dict[int, Any]
+
+    def __init__(self, field: str, variants: Dict[int, Any]):
+        super().__init__()
+        self.field = field
+        self.variants = variants
+
+
+def _schema(field_type: Any) -> Optional[Schema]:
+    schema = getattr(field_type, "schema", None)
+    if isinstance(schema, Schema) and schema.owner is field_type:
+        return schema
+    return None
+
+
+class _Compiler:
+    schema: Schema
+    lines: List[str]
+    namespace: Dict[str, Any]
+    names: int
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.lines = []
+        self.namespace = {}
+        self.names = 0
+
+    def name(self, prefix: str) -> str:
+        self.names += 1
+        return f"{prefix}{self.names}"
+
+    def bind(self, value: Any, prefix: str) -> str:
+        """Makes value available to the generated code under a fresh name."""
+        name = self.name(prefix)
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def function(self, name: str) -> Callable:
+        source = "\n".join(self.lines)
+        owner = self.schema.owner
+        filename = f"<bcs schema {owner.__qualname__ if owner else 'anonymous'}>"
+        exec(compile(source, filename, "exec"), self.namespace)
+        function = self.namespace[name]
+        function.__source__ = source
+        return function
+
+    # Encoding
+
+    def encoder(self) -> Callable[[Serializer, Any], None]:
+        self.emit(0, "def encode(serializer, value):")
+        self.emit(1, "output = serializer.buffer()")
+        self.encode_schema(self.schema, "value", 1, [self.schema])
+        return self.function("encode")
+
+    def encode_schema(self, schema: Schema, value: str, indent: int, stack: List):
+        if isinstance(schema, Enum):
+            self.encode_variants(schema, value, indent, stack)
+        else:
+            self.encode_fields(schema, value, indent, stack)
+
+    def encode_variants(self, schema: Enum, value: str, indent: int, stack: List):
+        inner = self.name("v")
+        kind = self.name("t")
+        self.emit(indent, f"{inner} = {value}.{schema.field}")
+        self.emit(indent, f"{kind} = type({inner})")
+        keyword = "if"
+        for index, variant in schema.variants.items():
+            if variant is None:
+                continue
+            variant = schema.resolve(variant)
+            self.emit(indent, f"{keyword} {kind} is {self.bind(variant, 'c')}:")
+            ser = Serializer()
+            ser.uleb128(index)
+            self.emit(indent + 1, f"output += {ser.output()!r}")
+            self.encode_value(variant, schema, inner, indent + 1, stack)
+            keyword = "elif"
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f'raise Exception(f"Invalid type: {{{kind}}}")')
+
+    def encode_fields(self, schema: Schema, value: str, indent: int, stack: List):
+        integers: List[Tuple[str, Primitive]] = []
+        for field, field_type in schema.fields:
+            field_type = schema.resolve(field_type)
+            if isinstance(field_type, Primitive) and field_type.format is not None:
+                integers.append((f"{value}.{field}", field_type))
+                continue
+            self.pack(integers, indent)
+            integers = []
+            self.encode_value(field_type, schema, f"{value}.{field}", indent, stack)
+        self.pack(integers, indent)
+
+    def pack(self, integers: List[Tuple[str, Primitive]], indent: int):
+        if not integers:
+            return
+        arguments = []
+        for expression, primitive in integers:
+            name = self.name("i")
+            self.emit(indent, f"{name} = {expression}")
+            self.check(name, primitive, indent)
+            if primitive is U128:
+                arguments += [f"{name} & {MAX_U64}", f"{name} >> 64"]
+            else:
+                arguments.append(name)
+        if len(integers) == 1 and integers[0][1] is U8:
+            self.emit(indent, f"output.append({arguments[0]})")
+            return
+        format = struct.Struct("<" + "".join(p.format or "" for _, p in integers))
+        packer = self.bind(format.pack, "pack")
+        self.emit(indent, f"output += {packer}({', '.join(arguments)})")
+
+    def check(self, name: str, primitive: Primitive, indent: int):
+        self.emit(indent, f"if not 0 <= {name} <= {primitive.maximum}:")
+        self.emit(
+            indent + 1,
+            f'raise Exception(f"Cannot encode {{{name}}} into {primitive.name}")',
+        )
+
+    def length(self, name: str, indent: int):
+        self.emit(indent, f"if {name} < 0x80:")
+        self.emit(indent + 1, f"output.append({name})")
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f"serializer.uleb128({name})")
+
+    def encode_value(
+        self, field_type: Any, schema: Schema, value: str, indent: int, stack: List
+    ):
+        if field_type is BOOL:
+            self.emit(indent, f"output.append(int({value}))")
+        elif field_type is U256:
+            self.emit(indent, f"serializer.u256({value})")
+        elif field_type is ULEB128:
+            name = self.name("n")
+            self.emit(indent, f"{name} = {value}")
+            self.check(name, ULEB128, indent)
+            self.length(name, indent)
+        elif field_type is STR or field_type is BYTES:
+            name = self.name("b")
+            length = self.name("n")
+            encoded = ".encode()" if field_type is STR else ""
+            self.emit(indent, f"{name} = {value}{encoded}")
+            self.emit(indent, f"{length} = len({name})")
+            self.length(length, indent)
+            self.emit(indent, f"output += {name}")
+        elif isinstance(field_type, FixedBytes):
+            self.emit(indent, f"output += {value}")
+        elif isinstance(field_type, Sequence):
+            element_type = schema.resolve(field_type.element)
+            if isinstance(element_type, Primitive) and element_type.format is not None:
+                # Packed whole by Serializer.sequence
+                encode = self.bind(getattr(Serializer, element_type.name), "e")
+                self.emit(indent, f"serializer.sequence({value}, {encode})")
+                return
+            values = self.name("s")
+            length = self.name("n")
+            element = self.name("e")
+            self.emit(indent, f"{values} = {value}")
+            self.emit(indent, f"{length} = len({values})")
+            self.length(length, indent)
+            self.emit(indent, f"for {element} in {values}:")
+            self.encode_value(element_type, schema, element, indent + 1, stack)
+        else:
+            nested = _schema(field_type)
+            if nested is None or nested in stack:
+                self.emit(indent, f"{value}.serialize(serializer)")
+            else:
+                name = self.name("v")
+                self.emit(indent, f"{name} = {value}")
+                self.encode_schema(nested, name, indent, stack + [nested])
+
+    # Decoding
+
+    def decoder(self) -> Callable[[Deserializer], Any]:
+        self.emit(0, "def decode(deserializer):")
+        self.emit(1, "data = deserializer.buffer()")
+        result = self.decode_schema(self.schema, 1, [self.schema])
+        self.emit(1, f"return {result}")
+        return self.function("decode")
+
+    def decode_schema(self, schema: Schema, indent: int, stack: List) -> str:
+        if isinstance(schema, Enum):
+            return self.decode_variants(schema, indent, stack)
+        return self.decode_fields(schema, indent, stack)
+
+    def decode_variants(self, schema: Enum, indent: int, stack: List) -> str:
+        variant = self.name("n")
+        inner = self.name("v")
+        self.emit(indent, f"{variant} = deserializer.uleb128()")
+        keyword = "if"
+        for index, variant_type in schema.variants.items():
+            self.emit(indent, f"{keyword} {variant} == {index}:")
+            if variant_type is None:
+                self.emit(indent + 1, "raise NotImplementedError")
+            else:
+                variant_type = schema.resolve(variant_type)
+                self.decode_value(variant_type, schema, inner, indent + 1, stack)
+            keyword = "elif"
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f'raise Exception(f"Invalid type: {{{variant}}}")')
+        return self.construct(schema, [inner], indent)
+
+    def construct(self, schema: Schema, values: List[str], indent: int) -> str:
+        assert schema.owner is not None, "Schema must be a class attribute"
+        owner = self.bind(schema.owner, "c")
+        name = self.name("o")
+        self.emit(indent, f"{name} = {owner}({', '.join(values)})")
+        return name
+
+    def decode_fields(self, schema: Schema, indent: int, stack: List) -> str:
+        values = []
+        integers: List[Tuple[str, Primitive]] = []
+        for _, field_type in schema.fields:
+            field_type = schema.resolve(field_type)
+            name = self.name("f")
+            values.append(name)
+            if isinstance(field_type, Primitive) and field_type.format is not None:
+                integers.append((name, field_type))
+                continue
+            self.unpack(integers, indent)
+            integers = []
+            self.decode_value(field_type, schema, name, indent, stack)
+        self.unpack(integers, indent)
+        return self.construct(schema, values, indent)
+
+    def unpack(self, integers: List[Tuple[str, Primitive]], indent: int):
+        if not integers:
+            return
+        format = struct.Struct("<" + "".join(p.format or "" for _, p in integers))
+        unpacker = self.bind(format.unpack_from, "unpack")
+        targets = []
+        for name, primitive in integers:
+            if primitive is U128:
+                targets += [f"{name}_low", f"{name}_high"]
+            else:
+                targets.append(name)
+        offset = f"deserializer.advance({format.size})"
+        self.emit(indent, f"{', '.join(targets)}, = {unpacker}(data, {offset})")
+        for name, primitive in integers:
+            if primitive is U128:
+                self.emit(indent, f"{name} = {name}_low | {name}_high << 64")
+
+    def decode_value(
+        self, field_type: Any, schema: Schema, target: str, indent: int, stack: List
+    ):
+        if isinstance(field_type, Primitive):
+            method = {BYTES: "to_bytes"}.get(field_type, field_type.name)
+            self.emit(indent, f"{target} = deserializer.{method}()")
+        elif isinstance(field_type, FixedBytes):
+            self.emit(
+                indent, f"{target} = deserializer.fixed_bytes({field_type.length})"
+            )
+        elif isinstance(field_type, Sequence):
+            element_type = schema.resolve(field_type.element)
+            if isinstance(element_type, Primitive) and element_type.format is not None:
+                # Unpacked whole by Deserializer.sequence
+                decode = self.bind(getattr(Deserializer, element_type.name), "d")
+                self.emit(indent, f"{target} = deserializer.sequence({decode})")
+                return
+            element = self.name("e")
+            self.emit(indent, f"{target} = []")
+            self.emit(indent, "for _ in range(deserializer.uleb128()):")
+            self.decode_value(element_type, schema, element, indent + 1, stack)
+            self.emit(indent + 1, f"{target}.append({element})")
+        else:
+            nested = _schema(field_type)
+            if nested is None or nested in stack:
+                decode = self.bind(field_type.deserialize, "d")
+                self.emit(indent, f"{target} = {decode}(deserializer)")
+            else:
+                result = self.decode_schema(nested, indent, stack + [nested])
+                self.emit(indent, f"{target} = {result}")
+
+
+class Test(unittest.TestCase):
+    class Point:
+        schema = Schema(x=U8, y=U128, z=U64)
+
+        def __init__(self, x: int, y: int, z: int):
+            self.x = x
+            self.y = y
+            self.z = z
+
+    class Shape:
+        schema = Schema(
+            name=STR,
+            closed=BOOL,
+            points=Sequence("Test.Point"),
+            weights=Sequence(U16),
+            tag=FixedBytes(4),
+            data=BYTES,
+            kind=ULEB128,
+            area=U256,
+            edges=U32,
+        )
+
+        def __init__(self, name, closed, points, weights, tag, data, kind, area, edges):
+            self.name = name
+            self.closed = closed
+            self.points = points
+            self.weights = weights
+            self.tag = tag
+            self.data = data
+            self.kind = kind
+            self.area = area
+            self.edges = edges
+
+    def shape(self) -> Any:
+        points = [Test.Point(1, 2**100, 3), Test.Point(255, 0, 2**64 - 1)]
+        return Test.Shape(
+            "triangle", True, points, [1, 2], b"abcd", b"x" * 200, 300, 2**200, 3
+        )
+
+    def handwritten(self, shape: Any) -> bytes:
+        ser = Serializer()
+        ser.str(shape.name)
+        ser.bool(shape.closed)
+        ser.uleb128(len(shape.points))
+        for point in shape.points:
+            ser.u8(point.x)
+            ser.u128(point.y)
+            ser.u64(point.z)
+        ser.sequence(shape.weights, Serializer.u16)
+        ser.fixed_bytes(shape.tag)
+        ser.to_bytes(shape.data)
+        ser.uleb128(shape.kind)
+        ser.u256(shape.area)
+        ser.u32(shape.edges)
+        return ser.output()
+
+    def test_round_trip(self):
+        shape = self.shape()
+        ser = Serializer()
+        Test.Shape.schema.encode(ser, shape)
+        self.assertEqual(ser.output(), self.handwritten(shape))
+
+        decoded = Test.Shape.schema.decode(Deserializer(ser.output()))
+        for field, _ in Test.Shape.schema.fields:
+            if field != "points":
+                self.assertEqual(getattr(decoded, field), getattr(shape, field))
+        self.assertEqual(
+            [vars(point) for point in decoded.points],
+            [vars(point) for point in shape.points],
+        )
+
+    def test_errors(self):
+        shape = self.shape()
+        shape.points[1].y = -1
+        with self.assertRaises(Exception):
+            Test.Shape.schema.encode(Serializer(), shape)
+
+        data = self.handwritten(self.shape())
+        with self.assertRaises(UnexpectedEndOfInput):
+            Test.Shape.schema.decode(Deserializer(data[:20]))
+        with self.assertRaises(UnexpectedEndOfInput):
+            Test.Shape.schema.decode(Deserializer(data[:-1]))
+
+    def test_transactions(self):
+        from . import ed25519
+        from .account_address import AccountAddress
+        from .transactions import (
+            EntryFunction,
+            RawTransaction,
+            SignedTransaction,
+            TransactionArgument,
+            TransactionPayload,
+        )
+        from .type_tag import StructTag, TypeTag
+
+        coin_store = "0x1::coin::CoinStore<0x1::endless_coin::EndlessCoin>"
+        payload = TransactionPayload(
+            EntryFunction.natural(
+                "0x1::coin",
+                "transfer",
+                [TypeTag(StructTag.from_str(coin_store))],
+                [
+                    TransactionArgument(
+                        AccountAddress.from_str("0x2"), Serializer.struct
+                    ),
+                    TransactionArgument(1000, Serializer.u64),
+                ],
+            )
+        )
+        raw = RawTransaction(
+            AccountAddress.from_str("0x1"), 7, payload, 2000, 100, 2**32, 4
+        )
+        key = ed25519.PrivateKey.from_str("ed25519-priv-0x" + "11" * 32)
+        transaction = SignedTransaction(raw, raw.sign(key))
+
+        address = "00" * 31
+        expected = bytes.fromhex(
+            # Sender and sequence number
+            f"{address}01 0700000000000000"
+            # Entry function 0x1::coin::transfer
+            f"02 {address}01 04636f696e 087472616e73666572"
+            # Type arguments: CoinStore<EndlessCoin>
+            f"01 07 {address}01 04636f696e 09436f696e53746f7265"
+            f"01 07 {address}01 0c656e646c6573735f636f696e 0b456e646c657373436f696e 00"
+            # Arguments: 0x2 and 1000u64
+            f"02 20 {address}02 08 e803000000000000"
+            # Max gas amount, gas unit price, expiration timestamp and chain id
+            "d007000000000000 6400000000000000 0000000001000000 04"
+            # Ed25519 authenticator
+            "00 20 d04ab232742bb4ab3a1368bd4615e4e6d0224ab71a016baf8520a332c9778737"
+            "40 7260b7a77bd8ec09ad63ee2a52665747329265f7eb139642d45ae15299b5c398"
+            "1c3b08c7a68934c3af40e63c2b400c7c97a80f0da5a17acd3cdd40cbca75240e"
+        )
+        self.assertEqual(transaction.bytes(), expected)
+
+        der = Deserializer(expected)
+        decoded = SignedTransaction.deserialize(der)
+        self.assertEqual(der.remaining(), 0)
+        self.assertEqual(decoded.bytes(), expected)
+        self.assertEqual(decoded, transaction)
+        self.assertEqual(str(decoded.transaction.payload.value.ty_args[0]), coin_store)
+        self.assertTrue(decoded.verify())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,342 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Deserializes BCS incrementally from a file, mmap or asyncio.StreamReader, yielding each top-level
+item, e.g., a SignedTransaction of a transaction dump, as soon as it is complete:
+
+    with open("transactions.bcs", "rb") as dump:
+        for transaction in read_items(dump, SignedTransaction.deserialize):
+            ...
+
+Input is read in chunks into a buffer that holds only the item being decoded, so memory is bounded
+by the largest item rather than by the size of the input. An item is decoded from the buffer with
+an ordinary Deserializer and, if the buffer ends first, decoded again once more input has been
+read. Each read gathers at least as much as is already buffered, waiting for more data from an
+asyncio stream rather than returning what has arrived so far, so an item that spans many chunks is
+decoded a logarithmic number of times.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+import unittest
+from typing import Any, AsyncIterator, Callable, Iterator, Tuple
+
+from typing_extensions import Protocol
+
+from .bcs import Deserializer, UnexpectedEndOfInput
+
+T = typing.TypeVar("T")
+
+# Bytes requested per read while the buffer holds no partial item
+CHUNK_SIZE: int = 65_536
+
+
+class Readable(Protocol):
+    """A binary file, mmap or any other object that reads up to `size` bytes at a time."""
+
+    def read(self, __size: int) -> bytes: ...
+
+
+class _Buffer:
+    """The input that has been read but not yet decoded."""
+
+    chunk_size: int
+    eof: bool
+    _deserializer: Deserializer
+
+    def __init__(self, chunk_size: int):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.chunk_size = chunk_size
+        self.eof = False
+        self._deserializer = Deserializer(b"")
+
+    def read_size(self) -> int:
+        return max(self.chunk_size, self._deserializer.remaining())
+
+    def extend(self, chunk: bytes):
+        if not chunk:
+            self.eof = True
+            return
+        deserializer = self._deserializer
+        remaining = deserializer.buffer()[deserializer.position() :]
+        self._deserializer = Deserializer(bytes(remaining) + chunk)
+
+    def decode(self, decoder: Callable[[Deserializer], T]) -> Tuple[bool, T]:
+        """
+        Returns whether an item was decoded, and the item. Raises UnexpectedEndOfInput if the input
+        has ended within an item.
+        """
+        deserializer = self._deserializer
+        position = deserializer.position()
+        try:
+            return True, decoder(deserializer)
+        except UnexpectedEndOfInput:
+            deserializer.seek(position)
+            if self.eof and deserializer.remaining() > 0:
+                raise
+            return False, typing.cast(T, None)
+
+
+async def _read_async(reader: asyncio.StreamReader, size: int) -> bytes:
+    """Reads `size` bytes, or fewer only at the end of the stream."""
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+
+def read_items(
+    source: Readable,
+    decoder: Callable[[Deserializer], T],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[T]:
+    """Yields the items decoded one after another until the end of the source."""
+    buffer = _Buffer(chunk_size)
+    while True:
+        complete, item = buffer.decode(decoder)
+        if complete:
+            yield item
+        elif buffer.eof:
+            return
+        else:
+            buffer.extend(source.read(buffer.read_size()))
+
+
+def read_sequence(
+    source: Readable,
+    decoder: Callable[[Deserializer], T],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[T]:
+    """
+    Yields the items of a BCS sequence, i.e., a uleb128 length followed by that many items, as
+    serialized by Serializer.sequence. Input after the sequence is left unread in the buffer.
+    """
+    buffer = _Buffer(chunk_size)
+
+    def read(decoder: Callable[[Deserializer], Any]) -> Any:
+        while True:
+            complete, item = buffer.decode(decoder)
+            if complete:
+                return item
+            if buffer.eof:
+                raise UnexpectedEndOfInput(1, 0)
+            buffer.extend(source.read(buffer.read_size()))
+
+    for _ in range(read(Deserializer.uleb128)):
+        yield read(decoder)
+
+
+async def read_items_async(
+    reader: asyncio.StreamReader,
+    decoder: Callable[[Deserializer], T],
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[T]:
+    """Yields the items decoded one after another until the reader reaches the end of its stream."""
+    buffer = _Buffer(chunk_size)
+    while True:
+        complete, item = buffer.decode(decoder)
+        if complete:
+            yield item
+        elif buffer.eof:
+            return
+        else:
+            buffer.extend(await _read_async(reader, buffer.read_size()))
+
+
+async def read_sequence_async(
+    reader: asyncio.StreamReader,
+    decoder: Callable[[Deserializer], T],
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[T]:
+    """Yields the items of a BCS sequence, as read_sequence does, from an asyncio stream."""
+    buffer = _Buffer(chunk_size)
+
+    async def read(decoder: Callable[[Deserializer], Any]) -> Any:
+        while True:
+            complete, item = buffer.decode(decoder)
+            if complete:
+                return item
+            if buffer.eof:
+                raise UnexpectedEndOfInput(1, 0)
+            buffer.extend(await _read_async(reader, buffer.read_size()))
+
+    for _ in range(await read(Deserializer.uleb128)):
+        yield await read(decoder)
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    class Reader:
+        """Records the size of every read from the wrapped source."""
+
+        def __init__(self, source: Readable):
+            self.source = source
+            self.sizes: typing.List[int] = []
+
+        def read(self, size: int) -> bytes:
+            self.sizes.append(size)
+            return self.source.read(size)
+
+    transactions: typing.List[Any]
+
+    @classmethod
+    def setUpClass(cls):
+        from . import ed25519
+        from .account_address import AccountAddress
+        from .bcs import Serializer
+        from .transactions import (
+            EntryFunction,
+            RawTransaction,
+            SignedTransaction,
+            TransactionArgument,
+            TransactionPayload,
+        )
+
+        key = ed25519.PrivateKey.random()
+        transactions = []
+        for index in range(20):
+            payload = TransactionPayload(
+                EntryFunction.natural(
+                    "0x1::endless_account",
+                    "transfer",
+                    [],
+                    [
+                        TransactionArgument(
+                            AccountAddress.from_str("0x2"), Serializer.struct
+                        ),
+                        # Items of very different sizes, some larger than a chunk
+                        TransactionArgument(
+                            b"\x07" * (index % 4) * 1000, Serializer.to_bytes
+                        ),
+                    ],
+                )
+            )
+            raw = RawTransaction(
+                AccountAddress.from_str("0x1"), index, payload, 2_000, 100, 0, 4
+            )
+            transactions.append(SignedTransaction(raw, raw.sign(key)))
+        cls.transactions = transactions
+
+    def test_read_items(self):
+        import io
+        import mmap
+        import tempfile
+
+        from .transactions import SignedTransaction
+
+        transactions = self.transactions
+        encoded = [transaction.bytes() for transaction in transactions]
+        dump = b"".join(encoded)
+
+        reader = Test.Reader(io.BytesIO(dump))
+        items = list(read_items(reader, SignedTransaction.deserialize, chunk_size=64))
+        self.assertEqual([item.bytes() for item in items], encoded)
+        # Reads grow with the item being decoded, not with the input
+        self.assertLessEqual(max(reader.sizes), 2 * max(len(item) for item in encoded))
+
+        with tempfile.TemporaryFile() as file:
+            file.write(dump)
+            file.flush()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                items = list(read_items(mapped, SignedTransaction.deserialize))
+        self.assertEqual([item.bytes() for item in items], encoded)
+
+        self.assertEqual(list(read_items(io.BytesIO(b""), Deserializer.u64)), [])
+        with self.assertRaises(UnexpectedEndOfInput):
+            list(read_items(io.BytesIO(dump[:-1]), SignedTransaction.deserialize, 100))
+        with self.assertRaises(ValueError):
+            list(read_items(io.BytesIO(dump), SignedTransaction.deserialize, 0))
+
+    def test_read_sequence(self):
+        import io
+
+        from .bcs import Serializer
+        from .transactions import SignedTransaction
+
+        transactions = self.transactions
+        serializer = Serializer()
+        serializer.sequence(transactions, Serializer.struct)
+        serializer.u8(1)
+        dump = serializer.output()
+
+        items = read_sequence(io.BytesIO(dump), SignedTransaction.deserialize, 64)
+        self.assertEqual(
+            [item.bytes() for item in items], [t.bytes() for t in transactions]
+        )
+
+        with self.assertRaises(UnexpectedEndOfInput):
+            list(
+                read_sequence(io.BytesIO(dump[:-2]), SignedTransaction.deserialize, 64)
+            )
+        with self.assertRaises(UnexpectedEndOfInput):
+            list(read_sequence(io.BytesIO(b""), SignedTransaction.deserialize))
+
+    async def test_read_async(self):
+        from .bcs import Serializer
+        from .transactions import SignedTransaction
+
+        transactions = self.transactions
+        encoded = [transaction.bytes() for transaction in transactions]
+
+        async def feed(reader: asyncio.StreamReader, data: bytes):
+            for start in range(0, len(data), 100):
+                reader.feed_data(data[start : start + 100])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        reader = asyncio.StreamReader()
+        feeding = asyncio.ensure_future(feed(reader, b"".join(encoded)))
+        items = [
+            item.bytes()
+            async for item in read_items_async(
+                reader, SignedTransaction.deserialize, 64
+            )
+        ]
+        await feeding
+        self.assertEqual(items, encoded)
+
+        serializer = Serializer()
+        serializer.sequence(transactions, Serializer.struct)
+        reader = asyncio.StreamReader()
+        feeding = asyncio.ensure_future(feed(reader, serializer.output()))
+        items = [
+            item.bytes()
+            async for item in read_sequence_async(reader, SignedTransaction.deserialize)
+        ]
+        await feeding
+        self.assertEqual(items, encoded)
+
+    async def test_read_async_large_item(self):
+        from .bcs import Serializer
+
+        serializer = Serializer()
+        serializer.to_bytes(b"\x07" * 1_000_000)
+        encoded = serializer.output()
+        decoded = []
+
+        def decoder(deserializer: Deserializer) -> bytes:
+            decoded.append(deserializer.remaining())
+            return deserializer.to_bytes()
+
+        async def feed(reader: asyncio.StreamReader):
+            for start in range(0, len(encoded), 100):
+                reader.feed_data(encoded[start : start + 100])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        reader = asyncio.StreamReader()
+        feeding = asyncio.ensure_future(feed(reader))
+        items = [item async for item in read_items_async(reader, decoder, 64)]
+        await feeding
+        self.assertEqual(items, [b"\x07" * 1_000_000])
+        # Each attempt decodes twice as much input as the one before, even though the stream only
+        # ever has 100 bytes ready at a time: about log2(1_000_000 / 64) attempts, not 10_000
+        attempts = decoded[: decoded.index(len(encoded)) + 1]
+        self.assertLessEqual(len(attempts), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
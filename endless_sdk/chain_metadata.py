@@ -0,0 +1,313 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Caches the chain metadata needed to build transactions, so that building one does not require a
+round trip to the node.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import typing
+import unittest
+from typing import Dict, List, Optional
+
+from .single_flight import SingleFlight
+
+if typing.TYPE_CHECKING:
+    from .async_client import RestClient
+
+
+class LedgerTimestampUnavailable(Exception):
+    """The node info does not include a ledger timestamp"""
+
+
+class GasPriceTier:
+    """The gas price estimates published by nodes, from cheapest to fastest to be committed."""
+
+    LOW: str = "deprioritized_gas_estimate"
+    MEDIAN: str = "gas_estimate"
+    PRIORITIZED: str = "prioritized_gas_estimate"
+
+
+class ChainMetadata:
+    """
+    Holds the chain id, the offset between the local clock and the ledger timestamp, and the gas
+    price estimates of a node.
+
+    * The first caller loads the metadata and concurrent callers share that load.
+    * Once loaded, callers are always served the cached values. Metadata older than
+      `refresh_interval` seconds is reloaded by a task started by the next caller, which does not
+      wait for it. With `background` set, a task refreshes it every `refresh_interval` seconds
+      instead, until close() is called. A failed refresh in a task is logged and the previous
+      values are kept.
+    * Nodes that do not report a ledger timestamp still provide the chain id, but
+      ledger_timestamp() raises LedgerTimestampUnavailable for them.
+    * Gas price estimates are only fetched once they have been asked for, clients that use a
+      static gas price never request them.
+    """
+
+    client: RestClient
+    refresh_interval: float
+    background: bool
+    chain_id: Optional[int]
+    # Ledger timestamp minus local time, in seconds
+    clock_offset: Optional[float]
+    gas_estimates: Optional[Dict[str, int]]
+    _track_gas: bool
+    # time.monotonic() of the last successful refresh
+    _refreshed_at: Optional[float]
+    _single_flight: SingleFlight
+    _task: Optional[asyncio.Task]
+    # The reload of stale metadata started by load()
+    _reload: Optional[asyncio.Task]
+
+    def __init__(
+        self,
+        client: RestClient,
+        refresh_interval: float = 10.0,
+        background: bool = False,
+    ):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.background = background
+        self.chain_id = None
+        self.clock_offset = None
+        self.gas_estimates = None
+        self._track_gas = False
+        self._refreshed_at = None
+        self._single_flight = SingleFlight()
+        self._task = None
+        self._reload = None
+
+    async def _refresh(self):
+        sent = time.time()
+        if self._track_gas:
+            # Both requests are sent at once, so tracking gas prices costs no extra round trip
+            info_response, estimates_response = await asyncio.gather(
+                self.client.info(), self.client.estimate_gas_price()
+            )
+            estimates = self.client.parsed(estimates_response)
+        else:
+            info_response = await self.client.info()
+        info = self.client.parsed(info_response)
+        # The ledger timestamp is taken somewhere between sending and receiving
+        local_time = (sent + time.time()) / 2
+        self.chain_id = int(info["chain_id"])
+        if "ledger_timestamp" in info:
+            timestamp = float(info["ledger_timestamp"]) / 1_000_000
+            self.clock_offset = timestamp - local_time
+        if self._track_gas:
+            self.gas_estimates = {key: int(value) for key, value in estimates.items()}
+        self._refreshed_at = time.monotonic()
+
+    async def refresh(self):
+        """Reloads the metadata now, sharing the request with concurrent refreshes."""
+        await self._single_flight.do("refresh", self._refresh)
+        if self.background and self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._try_refresh()
+
+    async def _try_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logging.warning(f"Failed to refresh chain metadata: {e}")
+
+    def _stale(self) -> bool:
+        if self._refreshed_at is None:
+            return True
+        if self.background or self.refresh_interval <= 0:
+            return False
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    async def load(self):
+        """
+        Loads the metadata if it has not been loaded yet. Stale metadata is reloaded by a task, the
+        cached values are used meanwhile.
+        """
+        if self._refreshed_at is None or (
+            self._track_gas and self.gas_estimates is None
+        ):
+            await self.refresh()
+        elif self._stale() and (self._reload is None or self._reload.done()):
+            self._reload = asyncio.create_task(self._try_refresh())
+
+    async def ledger_timestamp(self) -> float:
+        """The current ledger timestamp in seconds, approximated from the local clock."""
+        await self.load()
+        if self.clock_offset is None:
+            raise LedgerTimestampUnavailable(
+                "The node info does not include a ledger timestamp"
+            )
+        return time.time() + self.clock_offset
+
+    async def gas_estimate(self, tier: str = GasPriceTier.MEDIAN) -> int:
+        """The most recent gas unit price estimate for a GasPriceTier."""
+        self._track_gas = True
+        await self.load()
+        assert self.gas_estimates is not None
+        return self.gas_estimates[tier]
+
+    def close(self):
+        for task in [self._task, self._reload]:
+            if task is not None:
+                task.cancel()
+        self._task = None
+        self._reload = None
+        self._reload = None
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def client(
+        self,
+        requests: List[str],
+        gas_estimate: List[int],
+        timestamp: bool = True,
+        gate: Optional[asyncio.Event] = None,
+    ):
+        import httpx
+
+        from .async_client import ClientConfig, RestClient
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            await asyncio.sleep(0.01)
+            if gate is not None:
+                # Responses are held back while the gate is cleared
+                await gate.wait()
+            if request.url.path == "/v1/estimate_gas_price":
+                return httpx.Response(
+                    200,
+                    json={
+                        "deprioritized_gas_estimate": 100,
+                        "gas_estimate": gas_estimate[0],
+                        "prioritized_gas_estimate": 300,
+                    },
+                )
+            info: Dict[str, typing.Any] = {"chain_id": 4}
+            if timestamp:
+                # The ledger is an hour ahead of the local clock
+                info["ledger_timestamp"] = str(int((time.time() + 3600) * 1_000_000))
+            return httpx.Response(200, json=info)
+
+        config = ClientConfig(gas_price_tier=GasPriceTier.MEDIAN)
+        client = RestClient("http://node/v1", config)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    async def test_metadata(self):
+        requests: List[str] = []
+        gas_estimate = [150]
+        client = self.client(requests, gas_estimate)
+        metadata = ChainMetadata(client, refresh_interval=0.05, background=True)
+
+        # Concurrent first uses share a single load
+        timestamps = await asyncio.gather(
+            *[metadata.ledger_timestamp() for _ in range(10)]
+        )
+        self.assertEqual(requests, ["/v1"])
+        for timestamp in timestamps:
+            self.assertAlmostEqual(timestamp, time.time() + 3600, delta=1)
+        self.assertEqual(metadata.chain_id, 4)
+
+        # Served from the cache afterwards
+        await metadata.ledger_timestamp()
+        self.assertEqual(await metadata.gas_estimate(), 150)
+        self.assertEqual(await metadata.gas_estimate(GasPriceTier.PRIORITIZED), 300)
+        self.assertEqual(requests, ["/v1", "/v1", "/v1/estimate_gas_price"])
+
+        # And refreshed in the background
+        gas_estimate[0] = 200
+        await asyncio.sleep(0.1)
+        self.assertEqual(await metadata.gas_estimate(), 200)
+        task = metadata._task
+        assert task is not None
+        metadata.close()
+        await asyncio.sleep(0)
+        self.assertTrue(task.cancelled())
+        await client.close()
+
+    async def test_refresh_on_demand(self):
+        requests: List[str] = []
+        client = self.client(requests, [150])
+        metadata = ChainMetadata(client, refresh_interval=0.05)
+
+        await metadata.ledger_timestamp()
+        await metadata.ledger_timestamp()
+        self.assertEqual(requests, ["/v1"])
+        # Without background refreshes, nothing is requested until the metadata is used again
+        await asyncio.sleep(0.1)
+        self.assertEqual(requests, ["/v1"])
+        self.assertIsNone(metadata._task)
+        # The stale values are served while a task reloads them
+        await metadata.ledger_timestamp()
+        await metadata.ledger_timestamp()
+        reload = metadata._reload
+        assert reload is not None
+        await reload
+        self.assertEqual(requests, ["/v1", "/v1"])
+        await client.close()
+
+    async def test_no_ledger_timestamp(self):
+        client = self.client([], [150], timestamp=False)
+
+        self.assertEqual(await client.chain_id(), 4)
+        with self.assertRaises(LedgerTimestampUnavailable):
+            await client.approximate_timestamp()
+        await client.close()
+
+    async def test_gas_price_tiers(self):
+        from .account import Account
+        from .bcs import Serializer
+        from .transactions import EntryFunction, TransactionArgument, TransactionPayload
+
+        requests: List[str] = []
+        gate = asyncio.Event()
+        gate.set()
+        client = self.client(requests, [150], gate=gate)
+        client.metadata.refresh_interval = 0.01
+        sender = Account.generate()
+        payload = TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [TransactionArgument(sender.address(), Serializer.struct)],
+            )
+        )
+
+        transaction = await client.create_bcs_transaction(sender, payload, 0)
+        self.assertEqual(transaction.gas_unit_price, 150)
+        self.assertEqual(transaction.chain_id, 4)
+        # The node info and the gas estimates are loaded together
+        self.assertEqual(sorted(requests), ["/v1", "/v1/estimate_gas_price"])
+
+        # Every tier is served from the cache, even once it is stale and the node does not
+        # respond, without waiting for a request
+        gate.clear()
+        await asyncio.sleep(0.02)
+        for tier, price in [(GasPriceTier.LOW, 100), (GasPriceTier.PRIORITIZED, 300)]:
+            transaction = await asyncio.wait_for(
+                client.create_bcs_transaction(sender, payload, 0, gas_price_tier=tier),
+                1,
+            )
+            self.assertEqual(transaction.gas_unit_price, price)
+        gate.set()
+
+        # Without a tier, the static price is used
+        client.client_config.gas_price_tier = None
+        transaction = await client.create_bcs_transaction(sender, payload, 0)
+        self.assertEqual(transaction.gas_unit_price, 100)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,11 +5,12 @@
 from __future__ import annotations
 
 import unittest
-from typing import List, Tuple, cast
+from typing import List, Optional, Tuple, cast
 
 from nacl.signing import SigningKey, VerifyKey
 
 from . import asymmetric_crypto
+from .batch_verify import SignatureCheck
 from .bcs import Deserializer, Serializer
 
 
@@ -155,22 +156,25 @@ class MultiPublicKey(asymmetric_crypto.PublicKey):
         return f"{self.threshold}-of-{len(self.keys)} Multi-Ed25519 public key"
 
     def verify(self, data: bytes, signature: asymmetric_crypto.Signature) -> bool:
-        try:
-            signatures = cast(MultiSignature, signature)
-            assert self.threshold <= len(
-                signatures.signatures
-            ), f"Insufficient signatures, {self.threshold} > {len(signatures.signatures)}"
-
-            for idx, signature in signatures.signatures:
-                assert (
-                    len(self.keys) > idx
-                ), f"Signature index exceeds available keys {len(self.keys)} < {idx}"
-                assert self.keys[idx].verify(
-                    data, signature
-                ), "Unable to verify signature"
-        except Exception:
-            return False
-        return True
+        checks = self.signature_checks(data, signature)
+        return checks is not None and all(k.verify(d, s) for (d, k, s) in checks)
+
+    def signature_checks(
+        self, data: bytes, signature: asymmetric_crypto.Signature
+    ) -> Optional[List[SignatureCheck]]:
+        """
+        The individual signatures to verify, see batch_verify, or None if there are fewer
+        signatures than the threshold or signatures for keys that do not exist.
+        """
+        signatures = cast(MultiSignature, signature)
+        if len(signatures.signatures) < self.threshold:
+            return None
+        checks: List[SignatureCheck] = []
+        for idx, signature in signatures.signatures:
+            if idx >= len(self.keys):
+                return None
+            checks.append((data, self.keys[idx], signature))
+        return checks
 
     @staticmethod
     def from_crypto_bytes(indata: bytes) -> MultiPublicKey:
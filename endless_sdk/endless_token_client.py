@@ -332,7 +332,9 @@ class EndlessTokenClient:
     async def read_object(self, address: AccountAddress) -> ReadObject:
         resources = {}
 
-        read_resources = await self.client.account_resources(address)
+        read_resources = self.client.parsed(
+            await self.client.account_resources(address)
+        )
         for resource in read_resources:
             if resource["type"] in ReadObject.resource_map:
                 resource_obj = ReadObject.resource_map[resource["type"]]
@@ -622,7 +624,7 @@ class EndlessTokenClient:
     async def tokens_minted_from_transaction(
         self, txn_hash: str
     ) -> List[AccountAddress]:
-        output = await self.client.transaction_by_hash(txn_hash)
+        output = self.client.parsed(await self.client.transaction_by_hash(txn_hash))
         mints = []
         for event in output["events"]:
             if event["type"] not in (
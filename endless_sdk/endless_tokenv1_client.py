@@ -308,7 +308,11 @@ class EndlessTokenV1Client:
         token_name: str,
         property_version: int,
     ) -> Any:
-        resource = await self._client.account_resource(owner, "0x4::collection::ConcurrentSupply")
+        resource = self._client.parsed(
+            await self._client.account_resource(
+                owner, "0x4::collection::ConcurrentSupply"
+            )
+        )
         # resource = await self._client.account_resource(owner, "0x4::token::Token")
         return resource["data"]
 
@@ -0,0 +1,255 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Health tracking for a set of equivalent fullnode REST endpoints. The RestClient consults the pool
+to decide which node serves each request and reports back how the node behaved.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+
+class Endpoint:
+    """A single fullnode REST endpoint along with its observed health."""
+
+    url: str
+    latency: Optional[float]
+    error_rate: float
+    consecutive_failures: int
+    unhealthy_until: float
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def __str__(self) -> str:
+        return self.url
+
+    def healthy(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self.unhealthy_until <= now
+
+    def score(self) -> float:
+        """Lower is better: the smoothed latency, inflated by the smoothed error rate."""
+        latency = 0.0 if self.latency is None else self.latency
+        return latency * (1.0 + EndpointPool.ERROR_PENALTY * self.error_rate)
+
+
+class EndpointPool:
+    """
+    Ranks endpoints by an exponentially weighted moving average of their latency and error rate.
+
+    * Endpoints that have not been measured yet are tried first, so every node gets a sample.
+    * A failure (connection error or 5xx) puts an endpoint into a cool down that doubles with each
+      consecutive failure, up to max_cooldown. A success clears the cool down.
+    * If every endpoint is cooling down, they are still returned, earliest recovery first, so that a
+      request is never refused outright.
+
+    This is co-routine safe in that all updates are synchronous and never yield.
+    """
+
+    ERROR_PENALTY: float = 10.0
+
+    endpoints: List[Endpoint]
+    decay: float
+    cooldown: float
+    max_cooldown: float
+
+    def __init__(
+        self,
+        urls: List[str],
+        decay: float = 0.3,
+        cooldown: float = 1.0,
+        max_cooldown: float = 30.0,
+    ):
+        if len(urls) == 0:
+            raise ValueError("At least one endpoint url is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.decay = decay
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def ranked(self) -> List[Endpoint]:
+        """Returns all endpoints ordered from most to least preferred."""
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.healthy(now)]
+        unhealthy = [e for e in self.endpoints if not e.healthy(now)]
+        healthy.sort(key=lambda e: (e.latency is not None, e.score()))
+        unhealthy.sort(key=lambda e: e.unhealthy_until)
+        return healthy + unhealthy
+
+    def record_success(self, endpoint: Endpoint, latency: float):
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency += self.decay * (latency - endpoint.latency)
+        endpoint.error_rate -= self.decay * endpoint.error_rate
+        endpoint.consecutive_failures = 0
+        endpoint.unhealthy_until = 0.0
+
+    def record_failure(self, endpoint: Endpoint):
+        endpoint.error_rate += self.decay * (1.0 - endpoint.error_rate)
+        endpoint.consecutive_failures += 1
+        backoff = self.cooldown * 2 ** (endpoint.consecutive_failures - 1)
+        endpoint.unhealthy_until = time.monotonic() + min(backoff, self.max_cooldown)
+
+
+class StubNode:
+    """A minimal REST node running in a background thread, used to exercise failover."""
+
+    server: ThreadingHTTPServer
+    thread: threading.Thread
+    requests: List[Tuple[str, str]]
+
+    def __init__(self, handler: Callable[[str, str], Tuple[int, object]]):
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                stub.requests.append((self.command, self.path))
+                status, body = handler(self.command, self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.nodes: List[StubNode] = []
+
+    def tearDown(self):
+        for node in self.nodes:
+            node.close()
+
+    def node(self, handler: Callable[[str, str], Tuple[int, object]]) -> StubNode:
+        stub = StubNode(handler)
+        self.nodes.append(stub)
+        return stub
+
+    def test_ranking(self):
+        pool = EndpointPool(["http://a/v1", "http://b/v1/", "http://c/v1"])
+        a, b, c = pool.endpoints
+        self.assertEqual(b.url, "http://b/v1")
+
+        pool.record_success(a, 0.5)
+        pool.record_success(b, 0.1)
+        # c has not been measured yet, so it goes first
+        self.assertEqual(pool.ranked(), [c, b, a])
+
+        pool.record_failure(c)
+        self.assertFalse(c.healthy())
+        self.assertEqual(pool.ranked(), [b, a, c])
+
+        pool.record_success(c, 0.01)
+        self.assertTrue(c.healthy())
+        self.assertEqual(pool.ranked()[0], c)
+
+    async def test_failover(self):
+        from .account_address import AccountAddress
+        from .async_client import RestClient
+
+        account = {"sequence_number": "7", "authentication_key": "0x1"}
+        broken = self.node(lambda method, path: (503, {"message": "unavailable"}))
+        healthy = self.node(lambda method, path: (200, account))
+        # Nothing listens here, so this will fail to connect.
+        closed = StubNode(lambda method, path: (200, {}))
+        closed.close()
+
+        client = RestClient([closed.url(), broken.url(), healthy.url()])
+        address = AccountAddress.from_str("0x1")
+        self.assertEqual(await client.account(address), account)
+        self.assertEqual(len(broken.requests), 1)
+        self.assertEqual(len(healthy.requests), 1)
+
+        closed_endpoint, broken_endpoint, healthy_endpoint = client.endpoints.endpoints
+        self.assertFalse(closed_endpoint.healthy())
+        self.assertFalse(broken_endpoint.healthy())
+        self.assertTrue(healthy_endpoint.healthy())
+
+        # The failed endpoints are cooling down, so the next read goes straight to the healthy node
+        self.assertEqual(await client.account(address), account)
+        self.assertEqual(len(broken.requests), 1)
+        self.assertEqual(len(healthy.requests), 2)
+        await client.close()
+
+    async def test_all_endpoints_failing(self):
+        from .async_client import ApiError, RestClient
+
+        first = self.node(lambda method, path: (500, {"message": "first"}))
+        second = self.node(lambda method, path: (502, {"message": "second"}))
+
+        client = RestClient([first.url(), second.url()])
+        with self.assertRaises(ApiError) as error:
+            await client.info()
+        self.assertEqual(error.exception.status_code, 502)
+        await client.close()
+
+    async def test_submission_not_replayed_after_server_error(self):
+        from .async_client import RestClient
+
+        broken = self.node(lambda method, path: (500, {"message": "unknown"}))
+        healthy = self.node(lambda method, path: (202, {"hash": "0xff"}))
+        client = RestClient([broken.url(), healthy.url()])
+
+        # A 5xx after the node has received a submission is ambiguous, so it must not be
+        # silently sent to another node.
+        response = await client._request(
+            "POST", "transactions", content=b"\x00", idempotent=False
+        )
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(healthy.requests), 0)
+        await client.close()
+
+    async def test_single_endpoint(self):
+        from .async_client import RestClient
+
+        node = self.node(
+            lambda method, path: (200, {"chain_id": 4, "ledger_timestamp": "0"})
+        )
+        client = RestClient(node.url())
+        self.assertEqual(client.base_url, node.url())
+        self.assertEqual(await client.chain_id(), 4)
+        self.assertEqual(node.requests, [("GET", "/v1")])
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Learns how much gas entry functions use, so that transactions reserve a max gas amount sized to the
+function they call rather than one global amount.
+"""
+
+from __future__ import annotations
+
+import math
+import unittest
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from .response_cache import CacheStats, ResponseCache
+from .single_flight import SingleFlight
+from .transactions import EntryFunction, TransactionPayload
+
+
+class GasAmountCache:
+    """
+    Caches the max gas amount to use per entry function, derived from simulating a transaction.
+
+    * Entries are keyed by the function id, its type arguments and the shape of its arguments,
+      i.e., the order of magnitude of each argument's size in bytes, since gas usage grows with the
+      size of vectors and strings passed in.
+    * The cached amount is the simulated gas used times `multiplier`, leaving headroom for state
+      that changes between the simulation and the execution, capped at the maximum the node
+      estimates the sender can afford.
+    * Entries expire after `ttl` seconds, after which the next transaction is simulated again.
+      Concurrent transactions with the same key share a single simulation.
+    """
+
+    multiplier: float
+    _amounts: ResponseCache
+    _single_flight: SingleFlight
+
+    def __init__(
+        self, multiplier: float = 1.5, ttl: float = 600.0, max_entries: int = 1024
+    ):
+        if multiplier < 1:
+            raise ValueError("multiplier must be at least 1")
+        self.multiplier = multiplier
+        self._amounts = ResponseCache(max_entries, ttl)
+        self._single_flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    @staticmethod
+    def key(payload: TransactionPayload) -> Optional[Hashable]:
+        """The cache key for a payload, or None if its gas usage is not cached."""
+        if not isinstance(payload.value, EntryFunction):
+            return None
+        function = payload.value
+        return (
+            str(function.module),
+            function.function,
+            tuple(str(ty_arg) for ty_arg in function.ty_args),
+            tuple(len(arg).bit_length() for arg in function.args),
+        )
+
+    def get(self, key: Hashable) -> Optional[int]:
+        return self._amounts.get(key)
+
+    def record(self, key: Hashable, gas_used: int, max_gas_amount: int) -> int:
+        """Caches the gas amount for a simulation that used gas_used of max_gas_amount."""
+        amount = min(math.ceil(gas_used * self.multiplier), max_gas_amount)
+        self._amounts.put(key, amount)
+        return amount
+
+    async def gas_amount(
+        self,
+        key: Hashable,
+        simulate: Callable[[], Awaitable[Optional[Tuple[int, int]]]],
+    ) -> Optional[int]:
+        """
+        Returns the cached amount for key, calling simulate if there is none. simulate returns the
+        gas used and the max gas amount, or None if the simulation failed, in which case nothing
+        is cached and None is returned.
+        """
+        amount = self.get(key)
+        if amount is not None:
+            return amount
+
+        async def fill() -> Optional[int]:
+            result = await simulate()
+            if result is None:
+                return None
+            return self.record(key, *result)
+
+        return await self._single_flight.do(key, fill)
+
+    def stats(self) -> CacheStats:
+        return self._amounts.stats()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def payload(self, amount: int, data: bytes = b"") -> TransactionPayload:
+        from .account_address import AccountAddress
+        from .bcs import Serializer
+        from .transactions import TransactionArgument
+
+        return TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [
+                    TransactionArgument(
+                        AccountAddress.from_str("0x2"), Serializer.struct
+                    ),
+                    TransactionArgument(amount, Serializer.u64),
+                    TransactionArgument(data, Serializer.to_bytes),
+                ],
+            )
+        )
+
+    def test_key(self):
+        key = GasAmountCache.key
+        # Values of the same shape share an entry, larger arguments do not
+        self.assertEqual(key(self.payload(1)), key(self.payload(2)))
+        self.assertEqual(key(self.payload(1, b"a")), key(self.payload(1, b"b")))
+        self.assertNotEqual(key(self.payload(1)), key(self.payload(1, b"a" * 1000)))
+
+    async def test_gas_amount(self):
+        import asyncio
+
+        cache = GasAmountCache(multiplier=1.5)
+        simulations = []
+
+        async def simulate() -> Optional[Tuple[int, int]]:
+            simulations.append(1)
+            await asyncio.sleep(0.01)
+            return (100, 1_000)
+
+        key = GasAmountCache.key(self.payload(1))
+        amounts = await asyncio.gather(
+            *[cache.gas_amount(key, simulate) for _ in range(5)]
+        )
+        self.assertEqual(amounts, [150] * 5)
+        self.assertEqual(len(simulations), 1)
+        self.assertEqual(await cache.gas_amount(key, simulate), 150)
+        self.assertEqual(len(simulations), 1)
+
+        # Capped at what the sender can afford, and failed simulations are not cached
+        self.assertEqual(cache.record("capped", 900, 1_000), 1_000)
+
+        async def failed() -> Optional[Tuple[int, int]]:
+            return None
+
+        self.assertIsNone(await cache.gas_amount("failed", failed))
+        self.assertIsNone(cache.get("failed"))
+
+        # Stale entries are simulated again
+        cache = GasAmountCache(ttl=0.01)
+        await cache.gas_amount(key, simulate)
+        await asyncio.sleep(0.02)
+        await cache.gas_amount(key, simulate)
+        self.assertEqual(len(simulations), 3)
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account import Account
+        from .async_client import ClientConfig, RestClient
+        from .bcs import Deserializer
+        from .transactions import SignedTransaction
+
+        simulated = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/transactions/simulate":
+                self.assertEqual(request.url.params["estimate_max_gas_amount"], "true")
+                transaction = SignedTransaction.deserialize(
+                    Deserializer(request.content)
+                )
+                simulated.append(transaction)
+                return httpx.Response(
+                    200,
+                    json=[
+                        {"success": True, "gas_used": "40", "max_gas_amount": "5000"}
+                    ],
+                )
+            return httpx.Response(
+                200, json={"chain_id": 4, "ledger_timestamp": "2000000"}
+            )
+
+        config = ClientConfig(gas_amount_cache=GasAmountCache(multiplier=2.0))
+        client = RestClient("http://node/v1", config)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        sender = Account.generate()
+
+        for amount in range(3):
+            transaction = await client.create_bcs_transaction(
+                sender, self.payload(amount), 0
+            )
+            self.assertEqual(transaction.max_gas_amount, 80)
+        self.assertEqual(len(simulated), 1)
+        self.assertEqual(simulated[0].transaction.max_gas_amount, config.max_gas_amount)
+
+        # Without an account to simulate with, the configured amount is used
+        transaction = await client.create_bcs_transaction(
+            sender.address(), self.payload(1, b"a" * 100), 0
+        )
+        self.assertEqual(transaction.max_gas_amount, config.max_gas_amount)
+        await client.close()
+
+    async def test_simulation_errors(self):
+        import httpx
+
+        from .account import Account
+        from .async_client import ClientConfig, RestClient
+
+        simulations = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/transactions/simulate":
+                simulations.append(request)
+                if len(simulations) == 1:
+                    return httpx.Response(500, text="internal error")
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(
+                200, json={"chain_id": 4, "ledger_timestamp": "2000000"}
+            )
+
+        config = ClientConfig(gas_amount_cache=GasAmountCache())
+        client = RestClient("http://node/v1", config)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        sender = Account.generate()
+
+        # Neither a failed response nor a failed connection stops the transaction from being
+        # built, with the configured amount, and neither is cached
+        for _ in range(2):
+            transaction = await client.create_bcs_transaction(
+                sender, self.payload(1), 0
+            )
+            self.assertEqual(transaction.max_gas_amount, config.max_gas_amount)
+        self.assertEqual(len(simulations), 2)
+        self.assertEqual(len(config.gas_amount_cache), 0)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+JSON codecs used by the RestClient and IndexerClient to decode responses and encode request bodies.
+
+The standard library codec is the default. Faster codecs are used when their optional dependency
+is installed and the client is configured with them, see `fastest`.
+"""
+
+from __future__ import annotations
+
+import json
+import unittest
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+class JsonCodec:
+    """Encodes and decodes JSON with the standard library."""
+
+    def loads(self, data: bytes) -> Any:
+        """Decodes a response body into the value returned to callers."""
+        return json.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode()
+
+    def parsed(self, value: Any) -> Any:
+        """
+        Turns a value returned by loads into decoded JSON. This is the identity for every codec
+        except the RawCodec.
+        """
+        return value
+
+
+class OrjsonCodec(JsonCodec):
+    """Encodes and decodes JSON with orjson, which is several times faster than the standard library."""
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires the orjson package")
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+
+class RawCodec(JsonCodec):
+    """
+    Skips decoding altogether, so that reads return the undecoded response body as bytes. This is
+    meant for callers that only forward responses, e.g., proxies and archivers. Request bodies are
+    still encoded, and helpers that need to inspect responses, such as waiting for transactions,
+    decode them with the `inner` codec.
+    """
+
+    inner: JsonCodec
+
+    def __init__(self, inner: Optional[JsonCodec] = None):
+        self.inner = fastest() if inner is None else inner
+
+    def loads(self, data: bytes) -> Any:
+        return bytes(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return self.inner.dumps(value)
+
+    def parsed(self, value: Any) -> Any:
+        if isinstance(value, bytes):
+            return self.inner.loads(value)
+        return value
+
+
+def fastest() -> JsonCodec:
+    """The fastest codec available in this environment."""
+    if orjson is not None:
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def test_codecs(self):
+        value = {"version": "1", "changes": [{"type": "write_resource"}], "ok": True}
+        codecs = [JsonCodec(), fastest(), RawCodec(JsonCodec())]
+        for codec in codecs:
+            self.assertEqual(json.loads(codec.dumps(value)), value)
+
+        data = json.dumps(value).encode()
+        self.assertEqual(JsonCodec().loads(data), value)
+        self.assertEqual(fastest().loads(data), value)
+
+        raw = RawCodec()
+        self.assertEqual(raw.loads(data), data)
+        self.assertEqual(raw.parsed(raw.loads(data)), value)
+        self.assertEqual(JsonCodec().parsed(value), value)
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account_address import AccountAddress
+        from .async_client import ClientConfig, RestClient
+        from .endless_token_client import EndlessTokenClient
+
+        bodies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "POST":
+                bodies.append(json.loads(request.content))
+                self.assertEqual(request.headers["Content-Type"], "application/json")
+                return httpx.Response(200, json={"value": "5"})
+            if request.url.path == "/v1":
+                return httpx.Response(
+                    200, json={"chain_id": 4, "ledger_timestamp": "2000000"}
+                )
+            if request.url.path.endswith("/resources"):
+                return httpx.Response(
+                    200, json=[{"type": "0x1::account::Account", "data": {}}]
+                )
+            return httpx.Response(200, json={"sequence_number": "3"})
+
+        address = AccountAddress.from_str("0x1")
+        for codec in [JsonCodec(), fastest()]:
+            client = RestClient("http://node/v1", ClientConfig(json_codec=codec))
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            self.assertEqual(await client.account(address), {"sequence_number": "3"})
+            item = await client.get_table_item("0x2", "u8", "u64", 1)
+            self.assertEqual(item, {"value": "5"})
+            self.assertEqual(
+                bodies.pop(), {"key_type": "u8", "value_type": "u64", "key": 1}
+            )
+            await client.close()
+
+        # Raw mode returns the body untouched, but helpers still see decoded values
+        client = RestClient("http://node/v1", ClientConfig(json_codec=RawCodec()))
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        account = await client.account(address)
+        self.assertIsInstance(account, bytes)
+        self.assertEqual(client.parsed(account), {"sequence_number": "3"})
+        self.assertEqual(await client.current_timestamp(), 2.0)
+        self.assertEqual(await client.chain_id(), 4)
+        token_client = EndlessTokenClient(client)
+        self.assertEqual((await token_client.read_object(address)).resources, {})
+        await client.close()
+
+    async def test_indexer_client(self):
+        import httpx
+
+        from .async_client import IndexerClient
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            self.assertEqual(request.headers["Authorization"], "Bearer token")
+            return httpx.Response(200, json={"data": body["variables"]})
+
+        client = IndexerClient("http://indexer/v1/graphql", "token", fastest())
+        client.http_client = httpx.AsyncClient(
+            headers=client.http_client.headers,
+            transport=httpx.MockTransport(handler),
+        )
+        result = await client.query("query { x }", {"a": 1})
+        self.assertEqual(result, {"data": {"a": 1}})
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
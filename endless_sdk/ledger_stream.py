@@ -0,0 +1,248 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Follows the head of the ledger, streaming new blocks and transactions as they are committed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import AsyncIterator, List, Optional, Union
+
+from .async_client import RestClient
+
+
+class MissingTransactions(Exception):
+    """The node returned fewer transactions than a block contains, e.g., as they were pruned"""
+
+    block_height: int
+
+    def __init__(self, message: str, block_height: int):
+        super().__init__(message)
+        self.block_height = block_height
+
+
+class LedgerStream:
+    """
+    Tails the ledger block by block, starting at the block containing `start_version`, or at the
+    next block to be committed if no version is given.
+
+    * Blocks are fetched with their transactions. Blocks that the node truncates are completed via
+      the transactions API, so every block yielded holds all of its transactions. If the node does
+      not return them, the stream raises MissingTransactions.
+    * The node is polled every `min_interval` seconds while new blocks arrive. Every idle poll
+      multiplies the interval by `backoff`, up to `max_interval`.
+    * A producer task fetches blocks into a queue holding at most `queue_size` blocks. When the
+      consumer falls behind, the producer waits for room rather than buffering without bound.
+    """
+
+    client: RestClient
+    start_version: Optional[int]
+    min_interval: float
+    max_interval: float
+    backoff: float
+    queue_size: int
+
+    def __init__(
+        self,
+        client: RestClient,
+        start_version: Optional[int] = None,
+        min_interval: float = 0.1,
+        max_interval: float = 5.0,
+        backoff: float = 2.0,
+        queue_size: int = 100,
+    ):
+        if min_interval <= 0 or max_interval < min_interval or backoff < 1:
+            raise ValueError("Invalid poll interval configuration")
+        self.client = client
+        self.start_version = start_version
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.queue_size = queue_size
+
+    async def _complete(self, block: dict) -> dict:
+        first_version = int(block["first_version"])
+        last_version = int(block["last_version"])
+        transactions = block.get("transactions") or []
+        expected = last_version - first_version + 1
+        while len(transactions) < expected:
+            page = await self.client.transactions(
+                limit=expected - len(transactions),
+                start=first_version + len(transactions),
+            )
+            page = self.client.parsed(page)
+            if len(page) == 0:
+                height = int(block["block_height"])
+                raise MissingTransactions(
+                    f"Missing transactions for block {height}", height
+                )
+            transactions.extend(page)
+        block["transactions"] = transactions
+        return block
+
+    async def _first_height(self) -> int:
+        if self.start_version is None:
+            info = self.client.parsed(await self.client.info())
+            return int(info["block_height"]) + 1
+        block = await self.client.blocks_by_version(self.start_version)
+        block = self.client.parsed(block)
+        return int(block["block_height"])
+
+    async def _produce(self, queue: asyncio.Queue[Union[dict, Exception]]):
+        try:
+            height = await self._first_height()
+            interval = self.min_interval
+            while True:
+                info = self.client.parsed(await self.client.info())
+                latest = int(info["block_height"])
+                if latest < height:
+                    await asyncio.sleep(interval)
+                    interval = min(self.max_interval, interval * self.backoff)
+                    continue
+                interval = self.min_interval
+                while height <= latest:
+                    block = await self.client.blocks_by_height(height, True)
+                    block = self.client.parsed(block)
+                    await queue.put(await self._complete(block))
+                    height += 1
+        except Exception as e:
+            await queue.put(e)
+
+    async def blocks(self) -> AsyncIterator[dict]:
+        """Yields blocks in order of height, each with its complete list of transactions."""
+        queue: asyncio.Queue[Union[dict, Exception]] = asyncio.Queue(self.queue_size)
+        producer = asyncio.create_task(self._produce(queue))
+        try:
+            while True:
+                block = await queue.get()
+                if isinstance(block, Exception):
+                    raise block
+                if self.start_version is not None:
+                    block["transactions"] = [
+                        transaction
+                        for transaction in block["transactions"]
+                        if int(transaction["version"]) >= self.start_version
+                    ]
+                yield block
+        finally:
+            producer.cancel()
+
+    async def transactions(self) -> AsyncIterator[dict]:
+        """Yields transactions in order of version."""
+        async for block in self.blocks():
+            for transaction in block["transactions"]:
+                yield transaction
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def client(self, block_sizes: List[int], truncate: int = 3):
+        import httpx
+
+        from .async_client import RestClient
+
+        self.block_sizes = block_sizes
+        self.polls = 0
+        self.block_requests = 0
+        self.pruned = False
+
+        def block(height: int, with_transactions: bool) -> dict:
+            first = sum(self.block_sizes[:height])
+            last = first + self.block_sizes[height] - 1
+            transactions = [{"version": str(v)} for v in range(first, last + 1)]
+            return {
+                "block_height": str(height),
+                "first_version": str(first),
+                "last_version": str(last),
+                "transactions": transactions[:truncate] if with_transactions else None,
+            }
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/v1":
+                self.polls += 1
+                return httpx.Response(
+                    200, json={"block_height": str(len(self.block_sizes) - 1)}
+                )
+            if path.startswith("/v1/blocks/by_height/"):
+                self.block_requests += 1
+                height = int(path.split("/")[-1])
+                with_transactions = request.url.params["with_transactions"] == "true"
+                return httpx.Response(200, json=block(height, with_transactions))
+            if path.startswith("/v1/blocks/by_version/"):
+                version = int(path.split("/")[-1])
+                height = 0
+                while sum(self.block_sizes[: height + 1]) <= version:
+                    height += 1
+                return httpx.Response(200, json=block(height, False))
+            start = int(request.url.params["start"])
+            limit = int(request.url.params["limit"])
+            end = start if self.pruned else min(start + limit, sum(self.block_sizes))
+            return httpx.Response(
+                200, json=[{"version": str(v)} for v in range(start, end)]
+            )
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    async def test_resume(self):
+        client = self.client([2, 5, 1, 4])
+        stream = LedgerStream(client, start_version=3, min_interval=0.001)
+        versions = []
+        async for transaction in stream.transactions():
+            versions.append(int(transaction["version"]))
+            if len(versions) == 9:
+                break
+        # Starts within the second block, whose transactions are truncated by the node
+        self.assertEqual(versions, list(range(3, 12)))
+        await client.close()
+
+    async def test_tail(self):
+        client = self.client([1, 1])
+        stream = LedgerStream(client, min_interval=0.001, max_interval=0.004)
+        blocks = stream.blocks()
+
+        async def append():
+            # Let the stream idle, then commit a block
+            await asyncio.sleep(0.02)
+            self.block_sizes.append(2)
+
+        committer = asyncio.create_task(append())
+        block = await blocks.__anext__()
+        await committer
+        self.assertEqual(block["block_height"], "2")
+        self.assertEqual([t["version"] for t in block["transactions"]], ["2", "3"])
+        # Backed off to the max interval while idle, rather than polling every millisecond
+        self.assertLess(self.polls, 12)
+        await blocks.aclose()  # type: ignore
+        await client.close()
+
+    async def test_backpressure(self):
+        client = self.client([1] * 20)
+        stream = LedgerStream(client, start_version=0, queue_size=2)
+        blocks = stream.blocks()
+        self.assertEqual((await blocks.__anext__())["block_height"], "0")
+        await asyncio.sleep(0.02)
+        # The producer is blocked on the full queue instead of fetching the whole ledger
+        self.assertLessEqual(self.block_requests, 4)
+        await blocks.aclose()  # type: ignore
+        await client.close()
+
+    async def test_missing_transactions(self):
+        client = self.client([2, 5])
+        self.pruned = True
+        stream = LedgerStream(client, start_version=0, min_interval=0.001)
+        blocks = stream.blocks()
+        self.assertEqual((await blocks.__anext__())["block_height"], "0")
+        # The second block is truncated and the node no longer serves the rest of it
+        with self.assertRaises(MissingTransactions) as context:
+            await blocks.__anext__()
+        self.assertEqual(context.exception.block_height, 1)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,5 +9,9 @@ class Metadata:
 
     @staticmethod
     def get_endless_header_val():
-        version = metadata.version(PACKAGE_NAME)
+        try:
+            version = metadata.version(PACKAGE_NAME)
+        except metadata.PackageNotFoundError:
+            # Running from a source checkout rather than an installed package
+            version = "unknown"
         return f"endless-python-sdk/{version}"
@@ -0,0 +1,283 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Streams paginated REST API results one item at a time, fetching the following pages in the
+background while the current one is consumed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+import unittest
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, Tuple
+
+T = typing.TypeVar("T")
+
+# Fetches up to `limit` items starting at the given offset, e.g., a version or sequence number.
+PageFetcher = Callable[[int, int], Awaitable[List[T]]]
+# Fetches up to `limit` items starting at the given cursor and returns the cursor of the next page,
+# if there is one.
+CursorPageFetcher = Callable[
+    [Optional[str], int], Awaitable[Tuple[List[T], Optional[str]]]
+]
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_MAX_IN_FLIGHT = 2
+
+
+async def paginate(
+    fetch: PageFetcher[T],
+    start: int = 0,
+    end: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> AsyncIterator[T]:
+    """
+    Yields the items from `start` up to, but excluding, `end`, or until there are no more items.
+
+    As offsets are known upfront, up to `max_in_flight` pages are fetched concurrently. Only the
+    pages in flight are held in memory, so arbitrarily long ranges can be consumed. Pages that are
+    still in flight when the iteration stops, early or at the end of the data, are cancelled.
+
+    Nodes cap the number of items per request, so a page shorter than requested either ends the
+    data or reveals a cap below `page_size`. The first short page is taken to be the cap: the
+    pages prefetched after it are refetched from where it ended, with its length as the page
+    size, one at a time until a full page confirms the cap. Later pages shorter than the cap,
+    including empty ones, end the data.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+
+    pages: Deque[Tuple[int, int, asyncio.Task]] = deque()
+    next_offset = start
+    capped = False
+    # Whether the cap is yet to be confirmed by a full page
+    probing = False
+
+    def schedule():
+        nonlocal next_offset
+        in_flight = 1 if probing else max_in_flight
+        while len(pages) < in_flight and (end is None or next_offset < end):
+            limit = page_size if end is None else min(page_size, end - next_offset)
+            task = asyncio.ensure_future(fetch(next_offset, limit))
+            pages.append((next_offset, limit, task))
+            next_offset += limit
+
+    try:
+        schedule()
+        while pages:
+            offset, limit, task = pages.popleft()
+            page = await task
+            if len(page) < limit:
+                if capped or not page:
+                    # The end of the data, so any later pages are empty
+                    for item in page:
+                        yield item
+                    return
+                # The node's cap, so the pages in flight would skip items
+                capped = probing = True
+                page_size = len(page)
+                for _, _, pending in pages:
+                    pending.cancel()
+                pages.clear()
+                next_offset = offset + page_size
+            else:
+                probing = False
+            schedule()
+            for item in page:
+                yield item
+    finally:
+        for _, _, task in pages:
+            task.cancel()
+
+
+async def paginate_cursor(
+    fetch: CursorPageFetcher[T],
+    max_items: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> AsyncIterator[T]:
+    """
+    Yields up to `max_items` items from an API that returns the cursor of the next page along with
+    each page. The next page is fetched while the current one is consumed, but as its cursor is
+    only known once the current page arrives, at most one page is ever in flight.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+
+    remaining = max_items
+
+    def request(cursor: Optional[str]) -> asyncio.Task:
+        limit = page_size if remaining is None else min(page_size, remaining)
+        return asyncio.ensure_future(fetch(cursor, limit))
+
+    if remaining is not None and remaining <= 0:
+        return
+    task: Optional[asyncio.Task] = request(None)
+    try:
+        while task is not None:
+            page, cursor = await task
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+            more = cursor is not None and (remaining is None or remaining > 0)
+            task = request(cursor) if more else None
+            for item in page:
+                yield item
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    async def test_paginate(self):
+        requests = []
+        in_flight = 0
+        max_seen = 0
+
+        async def fetch(start: int, limit: int) -> List[int]:
+            nonlocal in_flight, max_seen
+            requests.append((start, limit))
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return list(range(start, min(start + limit, 25)))
+
+        items = [item async for item in paginate(fetch, page_size=10, max_in_flight=3)]
+        self.assertEqual(items, list(range(25)))
+        # The short last page could be a cap, which the empty page after it rules out
+        self.assertEqual(requests, [(0, 10), (10, 10), (20, 10), (25, 5)])
+        self.assertEqual(max_seen, 3)
+
+        # A bound trims the last page and stops without probing further
+        requests.clear()
+        items = [item async for item in paginate(fetch, start=3, end=15, page_size=5)]
+        self.assertEqual(items, list(range(3, 15)))
+        self.assertEqual(requests, [(3, 5), (8, 5), (13, 2)])
+
+        # Without a bound, the end is only found by a short page, so the pages prefetched beyond it
+        # are wasted
+        requests.clear()
+        items = [item async for item in paginate(fetch, start=5, page_size=10)]
+        self.assertEqual(items, list(range(5, 25)))
+        self.assertEqual(requests, [(5, 10), (15, 10), (25, 10), (35, 10)])
+
+    async def test_paginate_capped(self):
+        requests = []
+
+        async def fetch(start: int, limit: int) -> List[int]:
+            requests.append((start, limit))
+            await asyncio.sleep(0.001)
+            # The node returns at most 7 items per request
+            return list(range(start, min(start + limit, start + 7, 30)))
+
+        items = [item async for item in paginate(fetch, page_size=10, max_in_flight=3)]
+        self.assertEqual(items, list(range(30)))
+        # The pages prefetched at 10 and 20 are refetched from 7 on, 7 items at a time. Pages
+        # prefetched beyond the end may also have been requested before being cancelled.
+        self.assertEqual(
+            requests[:7],
+            [(0, 10), (10, 10), (20, 10), (7, 7), (14, 7), (21, 7), (28, 7)],
+        )
+        self.assertTrue(all(start >= 35 for start, _ in requests[7:]))
+
+        requests.clear()
+        items = [item async for item in paginate(fetch, end=16, page_size=10)]
+        self.assertEqual(items, list(range(16)))
+        self.assertEqual(requests, [(0, 10), (10, 6), (7, 7), (14, 2)])
+
+    async def test_paginate_stops_early(self):
+        cancelled = []
+
+        async def fetch(start: int, limit: int) -> List[int]:
+            try:
+                await asyncio.sleep(0 if start == 0 else 10)
+            except asyncio.CancelledError:
+                cancelled.append(start)
+                raise
+            return list(range(start, start + limit))
+
+        iterator = paginate(fetch, page_size=2, max_in_flight=3)
+        async for item in iterator:
+            break
+        await iterator.aclose()  # type: ignore
+        await asyncio.sleep(0)
+        self.assertEqual(sorted(cancelled), [2, 4])
+
+    async def test_paginate_cursor(self):
+        data = list(range(7))
+        requests = []
+
+        async def fetch(
+            cursor: Optional[str], limit: int
+        ) -> Tuple[List[int], Optional[str]]:
+            requests.append((cursor, limit))
+            start = 0 if cursor is None else int(cursor)
+            end = start + limit
+            return data[start:end], (str(end) if end < len(data) else None)
+
+        items = [item async for item in paginate_cursor(fetch, page_size=3)]
+        self.assertEqual(items, data)
+        self.assertEqual(requests, [(None, 3), ("3", 3), ("6", 3)])
+
+        requests.clear()
+        items = [item async for item in paginate_cursor(fetch, 4, page_size=3)]
+        self.assertEqual(items, data[:4])
+        self.assertEqual(requests, [(None, 3), ("3", 1)])
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account_address import AccountAddress
+        from .async_client import RestClient
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            start = int(request.url.params.get("start", 0))
+            limit = int(request.url.params["limit"])
+            if request.url.path.endswith("/modules"):
+                end = min(start + limit, 5)
+                headers = {"x-endless-cursor": str(end)} if end < 5 else {}
+                modules = [{"bytecode": str(i)} for i in range(start, end)]
+                return httpx.Response(200, json=modules, headers=headers)
+            end = min(start + limit, 12)
+            return httpx.Response(
+                200, json=[{"version": str(i)} for i in range(start, end)]
+            )
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        address = AccountAddress.from_str("0x1")
+
+        transactions = [t async for t in client.iter_transactions(page_size=5)]
+        self.assertEqual([int(t["version"]) for t in transactions], list(range(12)))
+        transactions = [
+            t async for t in client.iter_transactions_by_account(address, start=10)
+        ]
+        self.assertEqual(len(transactions), 2)
+        events = [
+            e
+            async for e in client.iter_events_by_creation_number(
+                address, 0, start=2, end=6
+            )
+        ]
+        self.assertEqual(len(events), 4)
+        events = [
+            e
+            async for e in client.iter_events_by_event_handle(
+                address, "0x1::account::Account", "coin_register_events"
+            )
+        ]
+        self.assertEqual(len(events), 12)
+
+        modules = [m async for m in client.iter_account_modules(address, page_size=2)]
+        self.assertEqual([m["bytecode"] for m in modules], ["0", "1", "2", "3", "4"])
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Poll schedules for waiting on state that changes on chain, such as the commitment of a transaction.
+"""
+
+from __future__ import annotations
+
+import unittest
+from typing import Iterator
+
+
+class PollSchedule:
+    """
+    Polls every `first_interval` seconds for the first `fast_polls` polls, which covers the
+    typical confirmation time of a transaction, then multiplies the interval by `backoff` on every
+    poll, up to `max_interval`.
+    """
+
+    first_interval: float
+    fast_polls: int
+    backoff: float
+    max_interval: float
+
+    def __init__(
+        self,
+        first_interval: float = 0.1,
+        fast_polls: int = 5,
+        backoff: float = 1.5,
+        max_interval: float = 1.0,
+    ):
+        if first_interval <= 0 or max_interval < first_interval or backoff < 1:
+            raise ValueError("Invalid poll interval configuration")
+        self.first_interval = first_interval
+        self.fast_polls = fast_polls
+        self.backoff = backoff
+        self.max_interval = max_interval
+
+    def intervals(self) -> Iterator[float]:
+        """Yields the seconds to wait before each poll after the first, without end."""
+        for _ in range(self.fast_polls):
+            yield self.first_interval
+        interval = self.first_interval
+        while True:
+            interval = min(self.max_interval, interval * self.backoff)
+            yield interval
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def test_intervals(self):
+        schedule = PollSchedule(0.1, fast_polls=2, backoff=2.0, max_interval=0.5)
+        intervals = schedule.intervals()
+        self.assertEqual(
+            [next(intervals) for _ in range(6)], [0.1, 0.1, 0.2, 0.4, 0.5, 0.5]
+        )
+        with self.assertRaises(ValueError):
+            PollSchedule(first_interval=2.0, max_interval=1.0)
+
+    async def test_wait_for_transaction(self):
+        import httpx
+
+        from .async_client import (
+            ClientConfig,
+            RestClient,
+            TransactionFailed,
+            TransactionTimeout,
+        )
+
+        polls = {"0xok": 0, "0xfailed": 0, "0xlost": 0}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            txn_hash = request.url.path.split("/")[-1]
+            polls[txn_hash] += 1
+            if txn_hash == "0xlost" or polls[txn_hash] == 1:
+                return httpx.Response(404, json={})
+            if polls[txn_hash] == 2:
+                return httpx.Response(200, json={"type": "pending_transaction"})
+            success = txn_hash == "0xok"
+            return httpx.Response(
+                200, json={"type": "user_transaction", "success": success}
+            )
+
+        config = ClientConfig()
+        config.transaction_wait_in_seconds = 0.1  # type: ignore[assignment]
+        config.poll_schedule = PollSchedule(first_interval=0.001, max_interval=0.01)
+        client = RestClient("http://node/v1", config)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # The committed transaction comes from the last poll, without fetching it again
+        transaction = await client.wait_for_transaction("0xok")
+        self.assertEqual(transaction, {"type": "user_transaction", "success": True})
+        self.assertEqual(polls["0xok"], 3)
+
+        with self.assertRaises(TransactionFailed) as failed:
+            await client.wait_for_transaction("0xfailed")
+        self.assertEqual(failed.exception.transaction["success"], False)
+
+        with self.assertRaises(TransactionTimeout) as timeout:
+            await client.wait_for_transaction("0xlost")
+        self.assertEqual(timeout.exception.txn_hash, "0xlost")
+        # Polled at the sub-second intervals rather than once a second
+        self.assertGreater(polls["0xlost"], 5)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
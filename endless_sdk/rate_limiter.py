@@ -0,0 +1,213 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Client side rate limiting for the RestClient, so that bursts are smoothed out locally rather than
+being rejected by the node with a 429.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class WaitStats:
+    """How long acquirers had to wait on a TokenBucket."""
+
+    requests: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def mean_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket that refills at `rate` tokens per second up to `capacity`.
+
+    Acquirers reserve their tokens immediately, possibly driving the balance negative, and then
+    sleep until the reservation is covered. This grants tokens in first-come, first-served order
+    without a lock, and as no state is bound to an event loop, a bucket can be shared by any number
+    of clients within a process.
+    """
+
+    rate: float
+    capacity: float
+    _tokens: float
+    _last_refill: float
+    _stats: WaitStats
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._stats = WaitStats()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Waits until `tokens` are available and returns the number of seconds spent waiting."""
+        self._refill()
+        self._tokens -= tokens
+        wait = max(0.0, -self._tokens / self.rate)
+
+        self._stats.requests += 1
+        if wait > 0:
+            self._stats.delayed += 1
+            self._stats.total_wait += wait
+            self._stats.max_wait = max(self._stats.max_wait, wait)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Return the reservation so that later acquirers do not pay for it
+                self._tokens += tokens
+                raise
+        return wait
+
+    def stats(self) -> WaitStats:
+        """A snapshot of the wait statistics since creation or the last reset."""
+        return WaitStats(
+            self._stats.requests,
+            self._stats.delayed,
+            self._stats.total_wait,
+            self._stats.max_wait,
+        )
+
+    def reset_stats(self):
+        self._stats = WaitStats()
+
+
+class RateLimiter:
+    """
+    Maps classes of requests to token buckets. Classes without a dedicated bucket share the default
+    bucket, and if there is no default either, they are not limited at all. Attach a single
+    RateLimiter to the ClientConfig of several RestClients to limit them jointly.
+    """
+
+    READ: str = "read"
+    SUBMIT: str = "submit"
+    VIEW: str = "view"
+
+    default: Optional[TokenBucket]
+    buckets: Dict[str, TokenBucket]
+
+    def __init__(
+        self,
+        default: Optional[TokenBucket] = None,
+        read: Optional[TokenBucket] = None,
+        submit: Optional[TokenBucket] = None,
+        view: Optional[TokenBucket] = None,
+    ):
+        self.default = default
+        self.buckets = {}
+        for request_class, bucket in (
+            (RateLimiter.READ, read),
+            (RateLimiter.SUBMIT, submit),
+            (RateLimiter.VIEW, view),
+        ):
+            if bucket is not None:
+                self.buckets[request_class] = bucket
+
+    def bucket(self, request_class: str) -> Optional[TokenBucket]:
+        return self.buckets.get(request_class, self.default)
+
+    async def acquire(self, request_class: str) -> float:
+        bucket = self.bucket(request_class)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire()
+
+    def stats(self) -> Dict[str, WaitStats]:
+        """Wait statistics per request class, classes sharing a bucket report the same values."""
+        stats = {}
+        for request_class in (RateLimiter.READ, RateLimiter.SUBMIT, RateLimiter.VIEW):
+            bucket = self.bucket(request_class)
+            if bucket is not None:
+                stats[request_class] = bucket.stats()
+        return stats
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    async def test_token_bucket(self):
+        bucket = TokenBucket(rate=100.0, capacity=2.0)
+        start = time.monotonic()
+        waits = await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        elapsed = time.monotonic() - start
+
+        # Two tokens are available upfront, then one every 10ms
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[-1], 0.04, delta=0.005)
+        self.assertGreaterEqual(elapsed, 0.035)
+
+        stats = bucket.stats()
+        self.assertEqual(stats.requests, 6)
+        self.assertEqual(stats.delayed, 4)
+        self.assertAlmostEqual(stats.max_wait, 0.04, delta=0.005)
+        self.assertAlmostEqual(stats.mean_wait(), 0.1 / 6, delta=0.005)
+
+        bucket.reset_stats()
+        self.assertEqual(bucket.stats(), WaitStats())
+
+    async def test_cancellation_refunds(self):
+        bucket = TokenBucket(rate=10.0, capacity=1.0)
+        await bucket.acquire()
+        task = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLessEqual(await bucket.acquire(), 0.1)
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account_address import AccountAddress
+        from .async_client import ClientConfig, RestClient
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/view"):
+                return httpx.Response(200, json=["5"])
+            return httpx.Response(200, json={"sequence_number": "1"})
+
+        # Reads run in a task of their own, shared by identical concurrent reads, so the second
+        # read may acquire a few milliseconds after the first. A slow refill keeps it delayed.
+        reads = TokenBucket(rate=20.0, capacity=1.0)
+        views = TokenBucket(rate=1000.0, capacity=1.0)
+        limiter = RateLimiter(read=reads, view=views)
+        config = ClientConfig(rate_limiter=limiter)
+
+        # Two clients share the limiter
+        clients = [RestClient("http://node/v1", config) for _ in range(2)]
+        for client in clients:
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        address = AccountAddress.from_str("0x1")
+        await asyncio.gather(*[client.account(address) for client in clients])
+        await clients[0].account_balance(address)
+
+        stats = limiter.stats()
+        self.assertEqual(stats[RateLimiter.READ].requests, 2)
+        self.assertEqual(stats[RateLimiter.READ].delayed, 1)
+        self.assertEqual(stats[RateLimiter.VIEW].requests, 1)
+        self.assertNotIn(RateLimiter.SUBMIT, stats)
+        for client in clients:
+            await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
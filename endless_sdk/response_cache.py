@@ -0,0 +1,177 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+An in-memory cache for RestClient read responses, distinguishing between responses that can never
+change and responses that reflect the latest ledger state.
+"""
+
+from __future__ import annotations
+
+import time
+import unittest
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Lookup counters of a ResponseCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    A least recently used cache holding at most `max_entries` values.
+
+    * Pinned values, i.e., those read at an explicit ledger version or describing committed
+      transactions and blocks, are immutable and therefore never expire. They only leave the cache
+      when evicted.
+    * All other values describe the latest ledger state and expire after `ttl` seconds.
+
+    This is co-routine safe in that all operations are synchronous and never yield.
+    """
+
+    max_entries: int
+    ttl: float
+    _entries: OrderedDict[Hashable, Tuple[Any, Optional[float]]]
+    _stats: CacheStats
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 1.0):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return value
+            del self._entries[key]
+        self._stats.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any, pinned: bool = False):
+        if not pinned and self.ttl <= 0:
+            return
+        expires_at = None if pinned else time.monotonic() + self.ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """A snapshot of the counters since creation or the last reset."""
+        return CacheStats(self._stats.hits, self._stats.misses, self._stats.evictions)
+
+    def reset_stats(self):
+        self._stats = CacheStats()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def test_lru(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", 1, pinned=True)
+        cache.put("b", 2, pinned=True)
+        self.assertEqual(cache.get("a"), 1)
+        # b is now the least recently used entry
+        cache.put("c", 3, pinned=True)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats(), CacheStats(hits=3, misses=1, evictions=1))
+
+        cache.reset_stats()
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats(), CacheStats())
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put("latest", 1)
+        cache.put("pinned", 2, pinned=True)
+        self.assertEqual(cache.get("latest"), 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("latest"))
+        self.assertEqual(cache.get("pinned"), 2)
+        self.assertEqual(len(cache), 1)
+
+        # Without a TTL, only pinned values are cached
+        cache = ResponseCache(ttl=0)
+        cache.put("latest", 1)
+        self.assertIsNone(cache.get("latest"))
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account_address import AccountAddress
+        from .async_client import ApiError, ClientConfig, RestClient
+
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            if "missing" in request.url.path:
+                return httpx.Response(404, json={})
+            return httpx.Response(200, json={"data": request.url.path})
+
+        cache = ResponseCache(ttl=60.0)
+        client = RestClient("http://node/v1", ClientConfig(response_cache=cache))
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        address = AccountAddress.from_str("0x1")
+        resource = "0x1::account::Account"
+
+        for _ in range(3):
+            await client.account_resource(address, resource, ledger_version=5)
+            await client.account_resource(address, resource)
+            await client.account_module(address, "coin", ledger_version=5)
+            await client.account_modules(address, ledger_version=5)
+            await client.blocks_by_height(7)
+            await client.transaction_by_version(9)
+            await client.get_table_item("0x2", "u8", "u8", 1, ledger_version=5)
+        self.assertEqual(len(requests), 7)
+        self.assertEqual(cache.stats().hits, 14)
+
+        # Responses for different arguments are cached separately
+        await client.blocks_by_height(7, with_transactions=True)
+        await client.get_table_item("0x2", "u8", "u8", 2, ledger_version=5)
+        self.assertEqual(len(requests), 9)
+
+        # Errors are not cached
+        for _ in range(2):
+            with self.assertRaises(ApiError):
+                await client.transaction_by_version("missing")  # type: ignore
+        self.assertEqual(len(requests), 11)
+
+        # Latest reads expire
+        cache.ttl = 0.0
+        cache.clear()
+        await client.account_resource(address, resource)
+        await client.account_resource(address, resource)
+        self.assertEqual(len(requests), 13)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,288 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Retry policies for the RestClient. A policy decides whether a failed request may be attempted again
+and how long to wait before doing so.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import random
+import time
+import unittest
+from typing import FrozenSet, Optional
+
+import httpx
+
+# Errors raised before any bytes of the request reached the node, so retrying cannot duplicate work.
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of the overall request volume, so that an outage does not multiply
+    the load on the nodes. Every request deposits `ratio` tokens and every retry withdraws one. A
+    small allowance of `min_per_second` tokens accrues regardless of traffic so that low volume
+    clients can still retry. The balance never exceeds `max_balance`.
+
+    A budget may be shared by many RestClients to bound the retries of a whole process.
+    """
+
+    ratio: float
+    min_per_second: float
+    max_balance: float
+    balance: float
+    _last_refill: float
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 10.0,
+        max_balance: float = 100.0,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self.balance = max_balance
+        self._last_refill = time.monotonic()
+
+    def _deposit(self, amount: float):
+        self.balance = min(self.max_balance, self.balance + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._deposit((now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+
+    def record_request(self):
+        self._refill()
+        self._deposit(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Takes a token for a retry, returning False if the budget is exhausted."""
+        self._refill()
+        if self.balance < 1.0:
+            return False
+        self.balance -= 1.0
+        return True
+
+
+class RetryPolicy:
+    """
+    Retries requests that failed with a transient error using exponential backoff with full jitter.
+
+    * Responses with a status in `retry_statuses` and transport errors are considered transient.
+    * A Retry-After header on the response takes precedence over the computed backoff, up to
+      `max_retry_after` seconds.
+    * Requests that are not idempotent, such as transaction submission, are only retried when the
+      node provably did not process them, i.e., the connection was never established or the node
+      answered 429. The RestClient additionally resolves ambiguous submissions by looking up the
+      transaction hash before resubmitting.
+    * Every retry must be paid for by the budget, if one is set.
+    """
+
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    max_retry_after: float
+    retry_statuses: FrozenSet[int]
+    budget: Optional[RetryBudget]
+
+    DEFAULT_RETRY_STATUSES: FrozenSet[int] = frozenset({429, 502, 503, 504})
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        max_retry_after: float = 30.0,
+        retry_statuses: FrozenSet[int] = DEFAULT_RETRY_STATUSES,
+        budget: Optional[RetryBudget] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+        self.budget = budget
+
+    def transient(
+        self, response: Optional[httpx.Response], error: Optional[Exception]
+    ) -> bool:
+        """Whether the outcome of an attempt might be different if it were attempted again."""
+        if error is not None:
+            return isinstance(error, httpx.TransportError)
+        return response is not None and response.status_code in self.retry_statuses
+
+    def rejected(
+        self, response: Optional[httpx.Response], error: Optional[Exception]
+    ) -> bool:
+        """Whether the node provably did not process the request."""
+        if error is not None:
+            return isinstance(error, NOT_SENT_ERRORS)
+        return response is not None and response.status_code == 429
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Seconds to wait after the given zero-based attempt failed."""
+        retry_after = None if response is None else self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> Optional[float]:
+        """Parses a Retry-After header given either in seconds or as an HTTP date."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, date.timestamp() - time.time())
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+        for attempt in range(5):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4.0, 2**attempt))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_retry_after=10.0)
+        response = httpx.Response(503, headers={"Retry-After": "2"})
+        self.assertEqual(policy.delay(0, response), 2.0)
+        response = httpx.Response(503, headers={"Retry-After": "120"})
+        self.assertEqual(policy.delay(0, response), 10.0)
+        date = email.utils.formatdate(time.time() + 5, usegmt=True)
+        response = httpx.Response(503, headers={"Retry-After": date})
+        self.assertAlmostEqual(policy.delay(0, response), 5.0, delta=1.5)
+        response = httpx.Response(503, headers={"Retry-After": "soon"})
+        self.assertIsNone(RetryPolicy.retry_after(response))
+
+    def test_classification(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.transient(httpx.Response(503), None))
+        self.assertFalse(policy.transient(httpx.Response(500), None))
+        self.assertFalse(policy.transient(httpx.Response(404), None))
+        self.assertTrue(policy.transient(None, httpx.ReadTimeout("")))
+        self.assertTrue(policy.rejected(None, httpx.ConnectError("")))
+        self.assertFalse(policy.rejected(None, httpx.ReadTimeout("")))
+        self.assertTrue(policy.rejected(httpx.Response(429), None))
+        self.assertFalse(policy.rejected(httpx.Response(503), None))
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0.0, max_balance=1.0)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.record_request()
+        self.assertFalse(budget.withdraw())
+        budget.record_request()
+        self.assertTrue(budget.withdraw())
+
+    async def test_rest_client_retries(self):
+        from .account_address import AccountAddress
+        from .async_client import ApiError, ClientConfig, RestClient
+
+        statuses = [503, 429, 200]
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            status = statuses[len(calls) - 1]
+            return httpx.Response(status, json={"sequence_number": "3"})
+
+        config = ClientConfig(retry_policy=RetryPolicy(base_delay=0.001))
+        client = RestClient("http://node/v1", config)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        account = await client.account(AccountAddress.from_str("0x1"))
+        self.assertEqual(account["sequence_number"], "3")
+        self.assertEqual(len(calls), 3)
+
+        # Out of attempts, the last response is surfaced
+        calls.clear()
+        statuses = [503, 503, 503, 200]
+        with self.assertRaises(ApiError) as error:
+            await client.account(AccountAddress.from_str("0x1"))
+        self.assertEqual(error.exception.status_code, 503)
+        self.assertEqual(len(calls), 3)
+
+        # An exhausted budget stops retries altogether
+        calls.clear()
+        budget = RetryBudget(min_per_second=0.0, max_balance=0.0)
+        config.retry_policy = RetryPolicy(base_delay=0.001, budget=budget)
+        with self.assertRaises(ApiError):
+            await client.account(AccountAddress.from_str("0x1"))
+        self.assertEqual(len(calls), 1)
+        await client.close()
+
+    async def test_rest_client_submission(self):
+        from .account import Account
+        from .async_client import ClientConfig, RestClient
+        from .bcs import Serializer
+        from .transactions import EntryFunction, TransactionArgument, TransactionPayload
+
+        sender = Account.generate()
+        payload = EntryFunction.natural(
+            "0x1::endless_account",
+            "transfer",
+            [],
+            [TransactionArgument(sender.address(), Serializer.struct)],
+        )
+
+        config = ClientConfig(retry_policy=RetryPolicy(base_delay=0.001))
+        client = RestClient("http://node/v1", config)
+        client._chain_id = 4
+        signed_transaction = await client.create_bcs_signed_transaction(
+            sender, TransactionPayload(payload), sequence_number=0
+        )
+        txn_hash = signed_transaction.hash()
+
+        submissions = []
+        lookups = []
+        landed = False
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                lookups.append(request.url.path)
+                if landed:
+                    return httpx.Response(200, json={"hash": txn_hash})
+                return httpx.Response(404, json={})
+            submissions.append(request.content)
+            if len(submissions) == 1:
+                return httpx.Response(503, json={})
+            return httpx.Response(202, json={"hash": txn_hash})
+
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        # The 503 is ambiguous, the hash is unknown to the node, so it is safe to resubmit
+        self.assertEqual(
+            await client.submit_bcs_transaction(signed_transaction), txn_hash
+        )
+        self.assertEqual(len(submissions), 2)
+        self.assertEqual(lookups, [f"/v1/transactions/by_hash/{txn_hash}"])
+
+        # The node knows the hash, so the submission landed and is not repeated
+        submissions.clear()
+        lookups.clear()
+        landed = True
+        self.assertEqual(
+            await client.submit_bcs_transaction(signed_transaction), txn_hash
+        )
+        self.assertEqual(len(submissions), 1)
+        self.assertEqual(len(lookups), 1)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,13 +6,92 @@ from __future__ import annotations
 
 import hashlib
 import unittest
-from typing import cast
+import unittest.mock
+from typing import List, cast
 
-from ecdsa import SECP256k1, SigningKey, VerifyingKey, util
+from ecdsa import SECP256k1, SigningKey, VerifyingKey, rfc6979, util
 
 from . import asymmetric_crypto
 from .bcs import Deserializer, Serializer
 
+try:
+    import coincurve
+except ImportError:
+    coincurve = None  # type: ignore[assignment]
+
+
+class EcdsaBackend:
+    """Signs and verifies with the pure Python ecdsa package."""
+
+    def sign(self, key: SigningKey, data: bytes) -> bytes:
+        """Returns the 64 byte r || s of the RFC 6979 deterministic signature over data."""
+        return key.sign_deterministic(data, hashfunc=hashlib.sha3_256)
+
+    def verify(self, key: VerifyingKey, data: bytes, signature: bytes) -> bool:
+        try:
+            key.verify(signature, data)
+        except Exception:
+            return False
+        return True
+
+
+class CoincurveBackend(EcdsaBackend):
+    """
+    Signs and verifies with libsecp256k1 via coincurve.
+
+    libsecp256k1 derives nonces with HMAC-SHA256, whereas signatures have always been derived with
+    HMAC-SHA3-256. To produce byte for byte the same signatures as the EcdsaBackend, the nonce is
+    derived as the ecdsa package does and only the scalar multiplication, which dominates the cost,
+    runs in libsecp256k1. The remaining arithmetic is on Python integers.
+    """
+
+    def __init__(self):
+        if coincurve is None:
+            raise ImportError("CoincurveBackend requires the coincurve package")
+
+    def sign(self, key: SigningKey, data: bytes) -> bytes:
+        n = SECP256k1.order
+        secret = key.privkey.secret_multiplier
+        digest = hashlib.sha3_256(data).digest()
+        z = int.from_bytes(digest, "big")
+        retry_gen = 0
+        while True:
+            k = rfc6979.generate_k(n, secret, hashlib.sha3_256, digest, retry_gen)
+            point = coincurve.PublicKey.from_secret(k.to_bytes(32, "big"))
+            r = point.point()[0] % n
+            s = pow(k, -1, n) * (z + r * secret) % n
+            if r != 0 and s != 0:
+                return util.sigencode_string(r, s, n)
+            retry_gen += 1
+
+    def verify(self, key: VerifyingKey, data: bytes, signature: bytes) -> bool:
+        n = SECP256k1.order
+        try:
+            r, s = util.sigdecode_string(signature, n)
+            # libsecp256k1 only accepts low s signatures, the ecdsa package accepts both forms
+            s = min(s, n - s)
+            public_key = coincurve.PublicKey(b"\x04" + key.to_string())
+            return public_key.verify(
+                util.sigencode_der(r, s, n),
+                data,
+                hasher=lambda m: hashlib.sha3_256(m).digest(),
+            )
+        except Exception:
+            return False
+
+
+def available_backends() -> List[EcdsaBackend]:
+    """The backends usable in this environment, fastest first."""
+    backends: List[EcdsaBackend] = []
+    if coincurve is not None:
+        backends.append(CoincurveBackend())
+    backends.append(EcdsaBackend())
+    return backends
+
+
+# The backend used for all signatures and verifications
+backend: EcdsaBackend = available_backends()[0]
+
 
 class PrivateKey(asymmetric_crypto.PrivateKey):
     LENGTH: int = 32
@@ -77,7 +156,7 @@ class PrivateKey(asymmetric_crypto.PrivateKey):
         )
 
     def sign(self, data: bytes) -> Signature:
-        sig = self.key.sign_deterministic(data, hashfunc=hashlib.sha3_256)
+        sig = backend.sign(self.key, data)
         n = SECP256k1.generator.order()
         r, s = util.sigdecode_string(sig, n)
         # The signature is valid for both s and -s, normalization ensures that only s < n // 2 is valid
@@ -133,12 +212,8 @@ class PublicKey(asymmetric_crypto.PublicKey):
         return f"0x04{self.key.to_string().hex()}"
 
     def verify(self, data: bytes, signature: asymmetric_crypto.Signature) -> bool:
-        try:
-            signature = cast(Signature, signature)
-            self.key.verify(signature.data(), data)
-        except Exception:
-            return False
-        return True
+        signature = cast(Signature, signature)
+        return backend.verify(self.key, data, signature.data())
 
     def to_crypto_bytes(self) -> bytes:
         return b"\x04" + self.key.to_string()
@@ -202,6 +277,13 @@ class Signature(asymmetric_crypto.Signature):
 
 
 class Test(unittest.TestCase):
+    def run(self, result=None):
+        # Every test runs against every backend available
+        for candidate in available_backends():
+            with unittest.mock.patch(f"{__name__}.backend", candidate):
+                super().run(result)
+        return result
+
     def test_private_key_from_str(self):
         private_key_hex = PrivateKey.from_str(
             "0x306fa009600e27c09d2659145ce1785249360dd5fb992da01a578fe67ed607f4", False
@@ -240,6 +322,21 @@ class Test(unittest.TestCase):
         original_signature = Signature.from_str(signature_hex)
         self.assertTrue(original_public_key.verify(data, original_signature))
 
+    def test_backends_agree(self):
+        private_key = PrivateKey.random()
+        public_key = private_key.public_key()
+        data = b"Hello world"
+        n = SECP256k1.order
+        signatures = [b.sign(private_key.key, data) for b in available_backends()]
+        self.assertEqual(len(set(signatures)), 1)
+
+        # The high s form of a signature is accepted as before, tampered data is not
+        r, s = util.sigdecode_string(signatures[0], n)
+        for signature in [(r, s), (r, n - s)]:
+            encoded = Signature(util.sigencode_string(*signature, n))
+            self.assertTrue(public_key.verify(data, encoded))
+            self.assertFalse(public_key.verify(b"Hello world!", encoded))
+
     def test_sign_and_verify(self):
         in_value = b"test_message"
 
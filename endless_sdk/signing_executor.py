@@ -0,0 +1,205 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Signs transactions in executors, so that signing does not block the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import typing
+import unittest
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from . import asymmetric_crypto, secp256k1_ecdsa
+from .authenticator import AccountAuthenticator
+from .bcs import Deserializer, Serializer
+from .transactions import RawTransactionInternal
+
+if typing.TYPE_CHECKING:
+    from .account import Account
+
+
+def _sign_secp256k1(key: bytes, data: bytes) -> bytes:
+    """Runs in the worker processes, hence keys and signatures cross as bytes."""
+    private_key = secp256k1_ecdsa.PrivateKey.deserialize(Deserializer(key))
+    return private_key.sign(data).signature
+
+
+class SigningExecutor:
+    """
+    Offloads signatures from the event loop.
+
+    * Ed25519 signatures are computed by libsodium, which releases the GIL, so they run on a pool
+      of `threads` threads.
+    * Secp256k1 signatures run on the same threads when the CoincurveBackend is in use, as the
+      scalar multiplication runs in libsecp256k1 without the GIL. The pure Python ecdsa fallback
+      holds the GIL for the whole signature, so it runs on a pool of `processes` processes.
+    * At most `max_pending` signatures are queued or running at any time. Further callers wait for
+      a slot, so a burst of transactions cannot queue unbounded work in the pools.
+
+    Pools are started on first use and default to one worker per core. An executor may be shared
+    by many clients, and must be shut down by its owner.
+    """
+
+    threads: int
+    processes: int
+    max_pending: int
+    _thread_pool: Optional[ThreadPoolExecutor]
+    _process_pool: Optional[ProcessPoolExecutor]
+    _slots: Optional[asyncio.Semaphore]
+
+    def __init__(
+        self,
+        threads: Optional[int] = None,
+        processes: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        cores = os.cpu_count() or 1
+        self.threads = cores if threads is None else threads
+        self.processes = cores if processes is None else processes
+        if self.threads < 1 or self.processes < 1:
+            raise ValueError("threads and processes must be at least 1")
+        if max_pending is None:
+            max_pending = 2 * (self.threads + self.processes)
+        self.max_pending = max_pending
+        self._thread_pool = None
+        self._process_pool = None
+        self._slots = None
+
+    def _threads(self) -> Executor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                self.threads, thread_name_prefix="signing"
+            )
+        return self._thread_pool
+
+    def _processes(self) -> Executor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(self.processes)
+        return self._process_pool
+
+    async def sign(
+        self, key: asymmetric_crypto.PrivateKey, data: bytes
+    ) -> asymmetric_crypto.Signature:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            if isinstance(key, secp256k1_ecdsa.PrivateKey) and not isinstance(
+                secp256k1_ecdsa.backend, secp256k1_ecdsa.CoincurveBackend
+            ):
+                serializer = Serializer()
+                key.serialize(serializer)
+                signature = await loop.run_in_executor(
+                    self._processes(), _sign_secp256k1, serializer.output(), data
+                )
+                return secp256k1_ecdsa.Signature(signature)
+            return await loop.run_in_executor(self._threads(), key.sign, data)
+
+    async def sign_transaction(
+        self, account: Account, transaction: RawTransactionInternal
+    ) -> AccountAuthenticator:
+        """The equivalent of Account.sign_transaction."""
+        signature = await self.sign(account.private_key, transaction.keyed())
+        return transaction.authenticator(account.public_key(), signature)
+
+    def shutdown(self, wait: bool = True):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait)
+            self._process_pool = None
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def encoded(authenticator: AccountAuthenticator) -> bytes:
+        serializer = Serializer()
+        authenticator.serialize(serializer)
+        return serializer.output()
+
+    def payload(self, account: Account):
+        from .transactions import EntryFunction, TransactionArgument, TransactionPayload
+
+        return TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [TransactionArgument(account.address(), Serializer.struct)],
+            )
+        )
+
+    async def test_signatures(self):
+        from .account import Account
+        from .transactions import RawTransaction
+
+        executor = SigningExecutor(threads=2, processes=2, max_pending=4)
+        for account in [Account.generate(), Account.generate_secp256k1_ecdsa()]:
+            transactions = [
+                RawTransaction(
+                    account.address(), n, self.payload(account), 1_000, 100, 0, 4
+                )
+                for n in range(10)
+            ]
+            authenticators = await asyncio.gather(
+                *[executor.sign_transaction(account, t) for t in transactions]
+            )
+            # Both signature schemes are deterministic
+            for transaction, authenticator in zip(transactions, authenticators):
+                self.assertEqual(
+                    self.encoded(authenticator),
+                    self.encoded(account.sign_transaction(transaction)),
+                )
+        executor.shutdown()
+
+    async def test_rest_client(self):
+        from .account import Account
+        from .async_client import ClientConfig, RestClient
+        from .transactions import SignedTransaction
+
+        executor = SigningExecutor(threads=1, processes=1)
+        client = RestClient("http://node/v1", ClientConfig(signing_executor=executor))
+        client._chain_id = 4
+        for account in [Account.generate(), Account.generate_secp256k1_ecdsa()]:
+            signed_transaction = await client.create_bcs_signed_transaction(
+                account, self.payload(account), sequence_number=0
+            )
+            transaction = signed_transaction.transaction
+            authenticator = account.sign_transaction(transaction)
+            self.assertEqual(
+                signed_transaction.bytes(),
+                SignedTransaction(transaction, authenticator).bytes(),
+            )
+        await client.close()
+        executor.shutdown()
+
+    async def test_secp256k1_pools(self):
+        from unittest import mock
+
+        from .account import Account
+
+        account = Account.generate_secp256k1_ecdsa()
+        data = b"\x01" * 32
+        expected = account.private_key.sign(data)
+        # Only the pure Python fallback needs worker processes
+        backends = [(secp256k1_ecdsa.EcdsaBackend(), True)]
+        if secp256k1_ecdsa.coincurve is not None:
+            backends.append((secp256k1_ecdsa.CoincurveBackend(), False))
+        for backend, uses_processes in backends:
+            with mock.patch.object(secp256k1_ecdsa, "backend", backend):
+                executor = SigningExecutor(threads=1, processes=1)
+                signature = await executor.sign(account.private_key, data)
+                self.assertEqual(signature, expected)
+                self.assertEqual(executor._process_pool is not None, uses_processes)
+                self.assertEqual(executor._thread_pool is None, uses_processes)
+                executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Coalesces identical concurrent calls, so that only the first caller performs the work and all
+others wait on and share its result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import typing
+import unittest
+from typing import Awaitable, Callable, Dict, Hashable
+
+T = typing.TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Tracks in-flight calls by key. A call made while another with the same key is in flight does
+    not start new work but awaits the existing call, receiving the same result or exception. Once
+    a call completes, the next call with that key starts fresh, so nothing is cached.
+
+    The work runs in its own task, so cancelling one waiter does not affect the others.
+    """
+
+    _calls: Dict[Hashable, asyncio.Future]
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._complete(key, done))
+        return await asyncio.shield(future)
+
+    def _complete(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesce(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            *[single_flight.do("a", lambda: work(1)) for _ in range(10)],
+            single_flight.do("b", lambda: work(2)),
+        )
+        self.assertEqual(results, [1] * 10 + [2])
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(len(single_flight), 0)
+
+        # Once complete, the next call does the work again
+        self.assertEqual(await single_flight.do("a", lambda: work(3)), 3)
+        self.assertEqual(calls, [1, 2, 3])
+
+    async def test_exception(self):
+        single_flight = SingleFlight()
+
+        async def work() -> int:
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(
+            *[single_flight.do("a", work) for _ in range(3)], return_exceptions=True
+        )
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    async def test_cancelled_waiter(self):
+        single_flight = SingleFlight()
+
+        async def work() -> int:
+            await asyncio.sleep(0.01)
+            return 5
+
+        first = asyncio.create_task(single_flight.do("a", work))
+        second = asyncio.create_task(single_flight.do("a", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 5)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+    async def test_rest_client(self):
+        import httpx
+
+        from .account_address import AccountAddress
+        from .async_client import RestClient
+
+        requests = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            await asyncio.sleep(0.01)
+            if request.url.path.endswith("/view"):
+                return httpx.Response(200, json=["100"])
+            if request.url.path.endswith("/accounts/0x1"):
+                return httpx.Response(200, json={"sequence_number": "9"})
+            return httpx.Response(200, json={"chain_id": 4, "ledger_timestamp": "0"})
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        first = AccountAddress.from_str("0x1")
+        second = AccountAddress.from_str("0x2")
+
+        chain_ids = await asyncio.gather(*[client.chain_id() for _ in range(20)])
+        self.assertEqual(chain_ids, [4] * 20)
+        self.assertEqual(len(requests), 1)
+
+        requests.clear()
+        accounts = await asyncio.gather(*[client.account(first) for _ in range(20)])
+        self.assertEqual(accounts, [{"sequence_number": "9"}] * 20)
+        self.assertEqual(len(requests), 1)
+
+        # Different arguments are different requests
+        requests.clear()
+        balances = await asyncio.gather(
+            *[client.account_balance(first) for _ in range(5)],
+            *[client.account_balance(second) for _ in range(5)],
+            client.account_balance(first, ledger_version=10),
+        )
+        self.assertEqual(balances, [100] * 11)
+        self.assertEqual(len(requests), 3)
+
+        # Coalescing can be disabled
+        requests.clear()
+        client.client_config = copy.copy(client.client_config)
+        client.client_config.coalesce_reads = False
+        await asyncio.gather(*[client.account(first) for _ in range(3)])
+        self.assertEqual(len(requests), 3)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,316 @@
+# Copyright © Endless Foundation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Waits for many submitted transactions at once, sharing the polling between them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .account_address import AccountAddress
+from .async_client import ApiError, RestClient, TransactionTimeout
+from .pagination import DEFAULT_PAGE_SIZE
+
+
+class _Pending:
+    txn_hash: str
+    sender: Optional[AccountAddress]
+    sequence_number: Optional[int]
+    deadline: float
+
+    def __init__(
+        self,
+        txn_hash: str,
+        sender: Optional[AccountAddress],
+        sequence_number: Optional[int],
+        deadline: float,
+    ):
+        self.txn_hash = txn_hash
+        self.sender = sender
+        self.sequence_number = sequence_number
+        self.deadline = deadline
+
+
+class TransactionWaiter:
+    """
+    Tracks a set of transaction hashes and yields each transaction once it is committed.
+
+    * Transactions added along with their sender and sequence number are resolved in bulk, by
+      paging through the transactions of their sender. Pending sequence numbers more than
+      `page_size` apart are fetched as separate ranges, so the gaps between them are not, and
+      ranges after the first one that is not fully committed are skipped, as sequence numbers are
+      committed in order.
+    * Other transactions are looked up by hash, at most `max_concurrency` at a time.
+    * All pending transactions are polled together, every `min_interval` seconds while
+      transactions are being committed. Every poll that commits nothing multiplies the interval by
+      `backoff`, up to `max_interval`.
+    * A transaction that is not committed within `timeout` seconds of being added is reported with
+      a TransactionTimeout. One whose sequence number is taken by another transaction can never be
+      committed and is reported with an ApiError.
+    """
+
+    client: RestClient
+    timeout: float
+    min_interval: float
+    max_interval: float
+    backoff: float
+    max_concurrency: int
+    page_size: int
+    _pending: Dict[str, _Pending]
+
+    def __init__(
+        self,
+        client: RestClient,
+        timeout: Optional[float] = None,
+        min_interval: float = 0.2,
+        max_interval: float = 2.0,
+        backoff: float = 1.5,
+        max_concurrency: int = 16,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        self.client = client
+        if timeout is None:
+            timeout = client.client_config.transaction_wait_in_seconds
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.page_size = page_size
+        self._pending = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        txn_hash: str,
+        sender: Optional[AccountAddress] = None,
+        sequence_number: Optional[int] = None,
+    ):
+        """Starts waiting for a transaction. Transactions may be added while iterating results."""
+        if (sender is None) != (sequence_number is None):
+            raise ValueError("sender and sequence_number must be provided together")
+        deadline = time.monotonic() + self.timeout
+        self._pending[txn_hash] = _Pending(txn_hash, sender, sequence_number, deadline)
+
+    async def _by_account(
+        self, sender: AccountAddress, pending: List[_Pending]
+    ) -> List[Tuple[str, Optional[dict], Optional[Exception]]]:
+        resolved: List[Tuple[str, Optional[dict], Optional[Exception]]] = []
+        by_sequence_number = {
+            p.sequence_number: p for p in pending if p.sequence_number is not None
+        }
+        # Ranges from a first sequence number up to, but excluding, a last one
+        ranges: List[List[int]] = []
+        for sequence_number in sorted(by_sequence_number):
+            if ranges and sequence_number - ranges[-1][1] < self.page_size:
+                ranges[-1][1] = sequence_number + 1
+            else:
+                ranges.append([sequence_number, sequence_number + 1])
+
+        for start, end in ranges:
+            committed = 0
+            async for transaction in self.client.iter_transactions_by_account(
+                sender, start, end, self.page_size
+            ):
+                committed += 1
+                entry = by_sequence_number.get(int(transaction["sequence_number"]))
+                if entry is None:
+                    continue
+                if transaction["hash"] == entry.txn_hash:
+                    resolved.append((entry.txn_hash, transaction, None))
+                else:
+                    error = ApiError(
+                        f"transaction {entry.txn_hash} was superseded by "
+                        f"{transaction['hash']}",
+                        400,
+                    )
+                    resolved.append((entry.txn_hash, None, error))
+            if committed < end - start:
+                break
+        return resolved
+
+    async def _by_hash(
+        self, pending: _Pending, semaphore: asyncio.Semaphore
+    ) -> List[Tuple[str, Optional[dict], Optional[Exception]]]:
+        async with semaphore:
+            try:
+                transaction = await self.client.transaction_by_hash(pending.txn_hash)
+            except ApiError as e:
+                if e.status_code == 404:
+                    return []
+                raise
+        transaction = self.client.parsed(transaction)
+        if transaction["type"] == "pending_transaction":
+            return []
+        return [(pending.txn_hash, transaction, None)]
+
+    async def _poll(self) -> List[Tuple[str, Optional[dict], Optional[Exception]]]:
+        accounts: Dict[str, Tuple[AccountAddress, List[_Pending]]] = {}
+        singles: List[_Pending] = []
+        for pending in self._pending.values():
+            if pending.sender is None:
+                singles.append(pending)
+            else:
+                entry = accounts.setdefault(str(pending.sender), (pending.sender, []))
+                entry[1].append(pending)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        lookups = [self._by_account(s, p) for (s, p) in accounts.values()]
+        lookups += [self._by_hash(p, semaphore) for p in singles]
+        resolved = []
+        for result in await asyncio.gather(*lookups, return_exceptions=True):
+            # Lookup errors are transient as far as the waiter is concerned, the affected
+            # transactions are polled again until they time out.
+            if not isinstance(result, BaseException):
+                resolved.extend(result)
+        return resolved
+
+    async def results(
+        self,
+    ) -> AsyncIterator[Tuple[str, Optional[dict], Optional[Exception]]]:
+        """
+        Yields (hash, transaction, error) for each added transaction as soon as it is committed,
+        fails or times out, until no transaction is left pending.
+        """
+        interval = self.min_interval
+        while self._pending:
+            resolved = await self._poll()
+            for txn_hash, transaction, error in resolved:
+                if self._pending.pop(txn_hash, None) is not None:
+                    yield (txn_hash, transaction, error)
+
+            now = time.monotonic()
+            for pending in list(self._pending.values()):
+                if pending.deadline <= now:
+                    del self._pending[pending.txn_hash]
+                    error = TransactionTimeout(
+                        f"transaction {pending.txn_hash} timed out", pending.txn_hash
+                    )
+                    yield (pending.txn_hash, None, error)
+
+            if resolved:
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, interval * self.backoff)
+            if self._pending:
+                await asyncio.sleep(interval)
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    async def test_waiter(self):
+        import httpx
+
+        sender = AccountAddress.from_str("0xa")
+        # Sequence number to hash, as committed on chain
+        committed: Dict[int, str] = {}
+        by_hash: Dict[str, dict] = {}
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            requests.append(path)
+            if path.startswith("/v1/transactions/by_hash/"):
+                txn_hash = path.split("/")[-1]
+                if txn_hash not in by_hash:
+                    return httpx.Response(404, json={})
+                return httpx.Response(200, json=by_hash[txn_hash])
+            start = int(request.url.params["start"])
+            limit = int(request.url.params["limit"])
+            transactions = [
+                {"hash": committed[n], "sequence_number": str(n), "success": True}
+                for n in range(start, start + limit)
+                if n in committed
+            ]
+            return httpx.Response(200, json=transactions)
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        waiter = TransactionWaiter(
+            client, timeout=0.2, min_interval=0.005, max_interval=0.01
+        )
+        for sequence_number in range(10):
+            waiter.add(f"0x{sequence_number}", sender, sequence_number)
+        waiter.add("0xother")
+        waiter.add("0xpending")
+        waiter.add("0xlost")
+        by_hash["0xpending"] = {"type": "pending_transaction"}
+
+        async def commit():
+            await asyncio.sleep(0.02)
+            for sequence_number in range(10):
+                committed[sequence_number] = f"0x{sequence_number}"
+            # Another transaction took this sequence number
+            committed[7] = "0xreplacement"
+            by_hash["0xother"] = {"type": "user_transaction", "success": True}
+            await asyncio.sleep(0.02)
+            by_hash["0xpending"] = {"type": "user_transaction", "success": True}
+
+        committer = asyncio.create_task(commit())
+        results = {}
+        async for txn_hash, transaction, error in waiter.results():
+            results[txn_hash] = (transaction, error)
+        await committer
+
+        self.assertEqual(len(results), 13)
+        self.assertEqual(len(waiter), 0)
+        self.assertEqual(results["0x3"][0]["sequence_number"], "3")
+        self.assertIsInstance(results["0x7"][1], ApiError)
+        self.assertEqual(results["0xother"][0]["success"], True)
+        self.assertEqual(results["0xpending"][0]["success"], True)
+        self.assertIsInstance(results["0xlost"][1], TimeoutError)
+
+        # The sender's transactions are only ever polled in bulk
+        for sequence_number in range(10):
+            self.assertNotIn(f"/v1/transactions/by_hash/0x{sequence_number}", requests)
+        await client.close()
+
+    async def test_capped_pages(self):
+        import httpx
+
+        sender = AccountAddress.from_str("0xa")
+        sequence_numbers = list(range(40)) + list(range(100_000, 100_005))
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            start = int(request.url.params["start"])
+            limit = int(request.url.params["limit"])
+            requests.append((start, limit))
+            if limit > 2**16 - 1:
+                return httpx.Response(400, json={"message": "limit is a u16"})
+            # The node returns at most 7 transactions per request
+            transactions = [
+                {"hash": f"0x{n}", "sequence_number": str(n), "success": True}
+                for n in range(start, start + min(limit, 7))
+                if n in sequence_numbers
+            ]
+            return httpx.Response(200, json=transactions)
+
+        client = RestClient("http://node/v1")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        waiter = TransactionWaiter(
+            client, timeout=5, min_interval=0.005, max_interval=0.01, page_size=20
+        )
+        for sequence_number in sequence_numbers:
+            waiter.add(f"0x{sequence_number}", sender, sequence_number)
+
+        # Every transaction resolves in the first poll, paging around the cap and the gap
+        results = [result async for result in waiter.results()]
+        self.assertEqual(
+            sorted(txn_hash for txn_hash, _, _ in results),
+            sorted(f"0x{n}" for n in sequence_numbers),
+        )
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertTrue(all(limit <= 20 for _, limit in requests))
+        self.assertEqual([start for start, _ in requests].count(0), 1)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,14 @@ class TransactionWorker:
     then submits the transaction. In another task, it waits for resolution of the submission
     process or get pre-execution validation error.
 
+    If batch_size is greater than one, signed transactions are accumulated and submitted together
+    via the batch endpoint, once batch_size transactions are ready or batch_wait_ms milliseconds
+    have passed since the first transaction of the batch was ready, whichever happens first.
+
+    Generators that build transactions through the RestClient sign them with the client_config's
+    signing_executor, if any, so that workers sharing an executor sign on all cores rather than
+    on the event loop.
+
     Note: This is not a particularly robust solution, as it lacks any framework to handle failed
     transactions with functionality like retries or checking whether the framework is online.
     This is the responsibility of a higher-level framework.
@@ -45,6 +53,8 @@ class TransactionWorker:
     _outstanding_transactions_task: typing.Optional[asyncio.Task]
     _processed_transactions: asyncio.Queue
     _process_transactions_task: typing.Optional[asyncio.Task]
+    _batch_size: int
+    _batch_wait_ms: float
 
     def __init__(
         self,
@@ -53,7 +63,11 @@ class TransactionWorker:
         transaction_generator: typing.Callable[
             [Account, int], typing.Awaitable[SignedTransaction]
         ],
+        batch_size: int = 1,
+        batch_wait_ms: float = 10.0,
     ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
         self._account = account
         self._account_sequence_number = AccountSequenceNumber(
             rest_client, account.address()
@@ -63,6 +77,8 @@ class TransactionWorker:
         )
         self._rest_client = rest_client
         self._transaction_generator = transaction_generator
+        self._batch_size = batch_size
+        self._batch_wait_ms = batch_wait_ms
 
         self._started = False
         self._stopped = False
@@ -72,7 +88,103 @@ class TransactionWorker:
     def address(self) -> AccountAddress:
         return self._account.address()
 
+    async def _next_transaction(
+        self,
+    ) -> typing.Tuple[typing.Union[SignedTransaction, Exception], int]:
+        """
+        Acquires a sequence number and generates its transaction. A generator error is returned in
+        place of the transaction, to be reported for that sequence number.
+        """
+        sequence_number = await self._account_sequence_number.next_sequence_number()
+        # Only non-blocking calls may come back without a sequence number
+        assert sequence_number is not None
+        try:
+            transaction = await self._transaction_generator(
+                self._account, sequence_number
+            )
+        except Exception as e:
+            return (e, sequence_number)
+        return (transaction, sequence_number)
+
+    async def _next_batch(self, pending: typing.Optional[asyncio.Task]) -> typing.Tuple[
+        typing.List[typing.Tuple[typing.Union[SignedTransaction, Exception], int]],
+        typing.Optional[asyncio.Task],
+    ]:
+        """
+        Collects up to batch_size transactions. A transaction still being generated when the batch
+        closes is returned as pending and leads the next batch, so that no sequence number is lost.
+        """
+        batch: typing.List[
+            typing.Tuple[typing.Union[SignedTransaction, Exception], int]
+        ] = []
+        deadline = 0.0
+        loop = asyncio.get_running_loop()
+        while len(batch) < self._batch_size:
+            if pending is None:
+                pending = asyncio.create_task(self._next_transaction())
+            timeout = None if len(batch) == 0 else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                break
+            batch.append(pending.result())
+            pending = None
+            if len(batch) == 1:
+                deadline = loop.time() + self._batch_wait_ms / 1000
+        return (batch, pending)
+
+    async def _submit_batches(self):
+        """
+        Errors that belong to a sequence number, from generating or submitting its transaction,
+        are reported as its processed transaction. Any other error, e.g., failing to acquire a
+        sequence number, fails this task rather than leaving callers waiting for transactions that
+        will never be processed.
+        """
+        pending: typing.Optional[asyncio.Task] = None
+        try:
+            while True:
+                batch, pending = await self._next_batch(pending)
+                transactions = [
+                    transaction
+                    for (transaction, _) in batch
+                    if not isinstance(transaction, Exception)
+                ]
+                submission = None
+                if transactions:
+                    submission = asyncio.create_task(
+                        self._rest_client.submit_bcs_transactions_batch(transactions)
+                    )
+                index = 0
+                for transaction, sequence_number in batch:
+                    if isinstance(transaction, Exception):
+                        result = self._failed(transaction)
+                    else:
+                        assert submission is not None
+                        result = self._batch_result(submission, index)
+                        index += 1
+                    await self._outstanding_transactions.put((result, sequence_number))
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    @staticmethod
+    async def _batch_result(submission: asyncio.Task, index: int) -> str:
+        result = (await submission)[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    @staticmethod
+    async def _failed(error: Exception) -> str:
+        raise error
+
     async def _submit_transactions(self):
+        if self._batch_size > 1:
+            return await self._submit_batches()
         try:
             while True:
                 sequence_number = (
@@ -229,3 +341,129 @@ class Test(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(processed_txn[2], exception)
 
         txn_worker.stop()
+
+    async def test_batching(self):
+        import httpx
+
+        from endless_sdk.async_client import ApiError
+        from endless_sdk.bcs import Deserializer
+
+        batches = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1":
+                return httpx.Response(
+                    200, json={"chain_id": 4, "ledger_timestamp": "0"}
+                )
+            if request.url.path.endswith("/transactions/batch"):
+                der = Deserializer(request.content)
+                transactions = der.sequence(SignedTransaction.deserialize)
+                batches.append(
+                    [txn.transaction.sequence_number for txn in transactions]
+                )
+                # Reject the transaction with sequence number 3
+                failures = [
+                    {
+                        "error": {"message": "SEQUENCE_NUMBER_TOO_OLD"},
+                        "transaction_index": i,
+                    }
+                    for i, txn in enumerate(transactions)
+                    if txn.transaction.sequence_number == 3
+                ]
+                status = 206 if failures else 202
+                return httpx.Response(status, json={"transaction_failures": failures})
+            return httpx.Response(200, json={"sequence_number": "0"})
+
+        rest_client = RestClient("http://node/v1")
+        rest_client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        payload = EntryFunction.natural(
+            "0x1::endless_accounts",
+            "transfer",
+            [],
+            [TransactionArgument(AccountAddress.from_str("0xf"), Serializer.struct)],
+        )
+        txn_queue = TransactionQueue(rest_client)
+        txn_worker = TransactionWorker(
+            Account.generate(),
+            rest_client,
+            txn_queue.next,
+            batch_size=4,
+            batch_wait_ms=20,
+        )
+        txn_worker.start()
+
+        # A full batch is submitted right away, the remainder once the wait expires
+        for _ in range(6):
+            await txn_queue.push(TransactionPayload(payload))
+        processed = [await txn_worker.next_processed_transaction() for _ in range(6)]
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5]])
+
+        for sequence_number, txn_hash, error in processed:
+            if sequence_number == 3:
+                self.assertIsNone(txn_hash)
+                self.assertIsInstance(error, ApiError)
+            else:
+                self.assertTrue(txn_hash.startswith("0x"))
+                self.assertIsNone(error)
+
+        txn_worker.stop()
+        await rest_client.close()
+
+    async def test_batching_errors(self):
+        import httpx
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1":
+                return httpx.Response(
+                    200, json={"chain_id": 4, "ledger_timestamp": "0"}
+                )
+            return httpx.Response(200, json={"sequence_number": "0"})
+
+        rest_client = RestClient("http://node/v1")
+        rest_client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        payload = EntryFunction.natural(
+            "0x1::endless_accounts",
+            "transfer",
+            [],
+            [TransactionArgument(AccountAddress.from_str("0xf"), Serializer.struct)],
+        )
+        txn_queue = TransactionQueue(rest_client)
+        generate_error = Exception("Cannot generate")
+
+        async def generate(sender: Account, sequence_number: int) -> SignedTransaction:
+            transaction = await txn_queue.next(sender, sequence_number)
+            if sequence_number == 1:
+                raise generate_error
+            return transaction
+
+        submit_error = Exception("Cannot submit")
+        submit_patcher = unittest.mock.patch(
+            "endless_sdk.async_client.RestClient.submit_bcs_transactions_batch",
+            side_effect=submit_error,
+        )
+        submit_patcher.start()
+        txn_worker = TransactionWorker(
+            Account.generate(), rest_client, generate, batch_size=4, batch_wait_ms=20
+        )
+        txn_worker.start()
+
+        # Every sequence number is reported, with the error that befell its transaction
+        for _ in range(4):
+            await txn_queue.push(TransactionPayload(payload))
+        processed = [
+            await asyncio.wait_for(txn_worker.next_processed_transaction(), 5)
+            for _ in range(4)
+        ]
+        self.assertEqual(
+            processed,
+            [
+                (0, None, submit_error),
+                (1, None, generate_error),
+                (2, None, submit_error),
+                (3, None, submit_error),
+            ],
+        )
+
+        submit_patcher.stop()
+        txn_worker.stop()
+        await rest_client.close()
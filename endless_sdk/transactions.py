@@ -9,12 +9,14 @@ This translates Endless transactions to and from BCS for signing and submitting
 from __future__ import annotations
 
 import hashlib
+import typing
 import unittest
+from concurrent.futures import Executor
 from typing import Any, Callable, List, Optional, Union, cast
 
 from typing_extensions import Protocol
 
-from . import asymmetric_crypto, ed25519, secp256k1_ecdsa
+from . import asymmetric_crypto, batch_verify, ed25519, secp256k1_ecdsa
 from .account_address import AccountAddress
 from .authenticator import (
     AccountAuthenticator,
@@ -26,30 +28,41 @@ from .authenticator import (
     SingleSenderAuthenticator,
 )
 from .bcs import Deserializable, Deserializer, Serializable, Serializer
+from .bcs_schema import BYTES, STR, U8, U64, Enum, Schema, Sequence
 from .type_tag import StructTag, TypeTag
 
+# The domain separators prepended to signed messages and hashed transactions, which never change
+RAW_TRANSACTION_PREHASH: bytes = hashlib.sha3_256(b"ENDLESS::RawTransaction").digest()
+RAW_TRANSACTION_WITH_DATA_PREHASH: bytes = hashlib.sha3_256(
+    b"ENDLESS::RawTransactionWithData"
+).digest()
+TRANSACTION_PREHASH: bytes = hashlib.sha3_256(b"ENDLESS::Transaction").digest()
+
 
 class RawTransactionInternal(Protocol):
     def keyed(self) -> bytes:
+        """The message to sign, the domain prehash followed by the BCS encoded transaction."""
         ser = Serializer()
+        ser.fixed_bytes(self.prehash())
         self.serialize(ser)
-        prehash = bytearray(self.prehash())
-        prehash.extend(ser.output())
-        return bytes(prehash)
+        return ser.output()
 
     def prehash(self) -> bytes: ...
 
     def serialize(self, serializer: Serializer) -> None: ...
 
     def sign(self, key: asymmetric_crypto.PrivateKey) -> AccountAuthenticator:
-        signature = key.sign(self.keyed())
+        return self.authenticator(key.public_key(), key.sign(self.keyed()))
+
+    def authenticator(
+        self, key: asymmetric_crypto.PublicKey, signature: asymmetric_crypto.Signature
+    ) -> AccountAuthenticator:
+        """Wraps a signature over keyed() into the authenticator matching the key type."""
         if isinstance(signature, ed25519.Signature):
             return AccountAuthenticator(
-                Ed25519Authenticator(
-                    cast(ed25519.PublicKey, key.public_key()), signature
-                )
+                Ed25519Authenticator(cast(ed25519.PublicKey, key), signature)
             )
-        return AccountAuthenticator(SingleKeyAuthenticator(key.public_key(), signature))
+        return AccountAuthenticator(SingleKeyAuthenticator(key, signature))
 
     def sign_simulated(self, key: asymmetric_crypto.PublicKey) -> AccountAuthenticator:
         if isinstance(key, ed25519.PublicKey):
@@ -74,9 +87,7 @@ class RawTransactionWithData(RawTransactionInternal, Protocol):
         return self.raw_transaction
 
     def prehash(self) -> bytes:
-        hasher = hashlib.sha3_256()
-        hasher.update(b"ENDLESS::RawTransactionWithData")
-        return hasher.digest()
+        return RAW_TRANSACTION_WITH_DATA_PREHASH
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> RawTransactionWithData:
@@ -106,6 +117,16 @@ class RawTransaction(Deserializable, RawTransactionInternal, Serializable):
     # Chain ID of the Endless network this transaction is intended for.
     chain_id: int
 
+    schema = Schema(
+        sender=AccountAddress,
+        sequence_number=U64,
+        payload="TransactionPayload",
+        max_gas_amount=U64,
+        gas_unit_price=U64,
+        expiration_timestamps_secs=U64,
+        chain_id=U8,
+    )
+
     def __init__(
         self,
         sender: AccountAddress,
@@ -149,30 +170,14 @@ class RawTransaction(Deserializable, RawTransactionInternal, Serializable):
 """
 
     def prehash(self) -> bytes:
-        hasher = hashlib.sha3_256()
-        hasher.update(b"ENDLESS::RawTransaction")
-        return hasher.digest()
+        return RAW_TRANSACTION_PREHASH
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> RawTransaction:
-        return RawTransaction(
-            AccountAddress.deserialize(deserializer),
-            deserializer.u64(),
-            TransactionPayload.deserialize(deserializer),
-            deserializer.u64(),
-            deserializer.u64(),
-            deserializer.u64(),
-            deserializer.u8(),
-        )
+        return RawTransaction.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer) -> None:
-        self.sender.serialize(serializer)
-        serializer.u64(self.sequence_number)
-        self.payload.serialize(serializer)
-        serializer.u64(self.max_gas_amount)
-        serializer.u64(self.gas_unit_price)
-        serializer.u64(self.expiration_timestamps_secs)
-        serializer.u8(self.chain_id)
+        RawTransaction.schema.encode(serializer, self)
 
 
 class MultiAgentRawTransaction(RawTransactionWithData):
@@ -258,6 +263,15 @@ class TransactionPayload:
     variant: int
     value: Any
 
+    schema = Enum(
+        "value",
+        {
+            SCRIPT: "Script",
+            MODULE_BUNDLE: "ModuleBundle",
+            SCRIPT_FUNCTION: "EntryFunction",
+        },
+    )
+
     def __init__(self, payload: Any):
         # pdb.set_trace()
         if isinstance(payload, Script):
@@ -280,22 +294,10 @@ class TransactionPayload:
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> TransactionPayload:
-        variant = deserializer.uleb128()
-
-        if variant == TransactionPayload.SCRIPT:
-            payload: Any = Script.deserialize(deserializer)
-        elif variant == TransactionPayload.MODULE_BUNDLE:
-            payload = ModuleBundle.deserialize(deserializer)
-        elif variant == TransactionPayload.SCRIPT_FUNCTION:
-            payload = EntryFunction.deserialize(deserializer)
-        else:
-            raise Exception("Invalid type")
-
-        return TransactionPayload(payload)
+        return TransactionPayload.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer) -> None:
-        serializer.uleb128(self.variant)
-        self.value.serialize(serializer)
+        TransactionPayload.schema.encode(serializer, self)
 
 
 class ModuleBundle:
@@ -429,6 +431,10 @@ class EntryFunction:
     ty_args: List[TypeTag]
     args: List[bytes]
 
+    schema = Schema(
+        module="ModuleId", function=STR, ty_args=Sequence(TypeTag), args=Sequence(BYTES)
+    )
+
     def __init__(
         self, module: ModuleId, function: str, ty_args: List[TypeTag], args: List[bytes]
     ):
@@ -468,23 +474,18 @@ class EntryFunction:
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> EntryFunction:
-        module = ModuleId.deserialize(deserializer)
-        function = deserializer.str()
-        ty_args = deserializer.sequence(TypeTag.deserialize)
-        args = deserializer.sequence(Deserializer.to_bytes)
-        return EntryFunction(module, function, ty_args, args)
+        return EntryFunction.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer) -> None:
-        self.module.serialize(serializer)
-        serializer.str(self.function)
-        serializer.sequence(self.ty_args, Serializer.struct)
-        serializer.sequence(self.args, Serializer.to_bytes)
+        EntryFunction.schema.encode(serializer, self)
 
 
 class ModuleId:
     address: AccountAddress
     name: str
 
+    schema = Schema(address=AccountAddress, name=STR)
+
     def __init__(self, address: AccountAddress, name: str):
         self.address = address
         self.name = name
@@ -505,13 +506,10 @@ class ModuleId:
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> ModuleId:
-        addr = AccountAddress.deserialize(deserializer)
-        name = deserializer.str()
-        return ModuleId(addr, name)
+        return ModuleId.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer) -> None:
-        self.address.serialize(serializer)
-        serializer.str(self.name)
+        ModuleId.schema.encode(serializer, self)
 
 
 class TransactionArgument:
@@ -536,6 +534,8 @@ class SignedTransaction:
     transaction: RawTransaction
     authenticator: Authenticator
 
+    schema = Schema(transaction=RawTransaction, authenticator=Authenticator)
+
     def __init__(
         self,
         transaction: RawTransaction,
@@ -564,12 +564,8 @@ class SignedTransaction:
     def __str__(self) -> str:
         return f"Transaction: {self.transaction}Authenticator: {self.authenticator}"
 
-    def bytes(self) -> bytes:
-        ser = Serializer()
-        ser.struct(self)
-        return ser.output()
-
-    def verify(self) -> bool:
+    def signed_data(self) -> bytes:
+        """The message signed by every signer of this transaction."""
         auth = self.authenticator.authenticator
         if isinstance(auth, MultiAgentAuthenticator):
             transaction: RawTransactionInternal = MultiAgentRawTransaction(
@@ -586,17 +582,47 @@ class SignedTransaction:
             )
         else:
             transaction = self.transaction
-        return self.authenticator.verify(transaction.keyed())
+        return transaction.keyed()
+
+    def bytes(self) -> bytes:
+        ser = Serializer()
+        ser.struct(self)
+        return ser.output()
+
+    def hash(self) -> str:
+        """
+        The hash that the node reports for this transaction once submitted. This allows looking up
+        a transaction without relying on the submission response.
+        """
+        hasher = hashlib.sha3_256()
+        hasher.update(TRANSACTION_PREHASH)
+        # The UserTransaction variant of Transaction
+        hasher.update(b"\x00")
+        hasher.update(self.bytes())
+        return f"0x{hasher.hexdigest()}"
+
+    def verify(self) -> bool:
+        return self.authenticator.verify(self.signed_data())
+
+    @staticmethod
+    def verify_many(
+        signed_transactions: typing.Sequence[SignedTransaction],
+        executor: Optional[Executor] = None,
+    ) -> List[bool]:
+        """
+        Returns whether each transaction verifies, like verify, checking the signatures of all
+        transactions as a single batch. See batch_verify.verify_signatures for the executor.
+        """
+        return batch_verify.verify_many(
+            [(t.authenticator, t.signed_data()) for t in signed_transactions], executor
+        )
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> SignedTransaction:
-        transaction = RawTransaction.deserialize(deserializer)
-        authenticator = Authenticator.deserialize(deserializer)
-        return SignedTransaction(transaction, authenticator)
+        return SignedTransaction.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer) -> None:
-        self.transaction.serialize(serializer)
-        self.authenticator.serialize(serializer)
+        SignedTransaction.schema.encode(serializer, self)
 
 
 class Test(unittest.TestCase):
@@ -635,6 +661,75 @@ class Test(unittest.TestCase):
         signed_transaction = SignedTransaction(raw_transaction, authenticator)
         self.assertTrue(signed_transaction.verify())
 
+    def test_keyed(self):
+        payload = TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [TransactionArgument(AccountAddress.from_str("0x2"), Serializer.struct)],
+            )
+        )
+        raw_transaction = RawTransaction(
+            AccountAddress.from_str("0x1"), 7, payload, 2000, 100, 0, 4
+        )
+        multi_agent = MultiAgentRawTransaction(
+            raw_transaction, [AccountAddress.from_str("0x3")]
+        )
+        for transaction, domain in [
+            (raw_transaction, b"ENDLESS::RawTransaction"),
+            (multi_agent, b"ENDLESS::RawTransactionWithData"),
+        ]:
+            ser = Serializer()
+            transaction.serialize(ser)
+            self.assertEqual(
+                transaction.keyed(),
+                hashlib.sha3_256(domain).digest() + ser.output(),
+            )
+
+    def test_verify_many(self):
+        payload = TransactionPayload(
+            EntryFunction.natural(
+                "0x1::endless_account",
+                "transfer",
+                [],
+                [TransactionArgument(AccountAddress.from_str("0x2"), Serializer.struct)],
+            )
+        )
+        keys = [ed25519.PrivateKey.random(), secp256k1_ecdsa.PrivateKey.random()]
+        signed_transactions = []
+        for sequence_number in range(80):
+            key = keys[sequence_number % 2]
+            sender = AccountAddress.from_str(f"0x{sequence_number % 2 + 1}")
+            raw_transaction = RawTransaction(
+                sender, sequence_number, payload, 2000, 100, 0, 4
+            )
+            if sequence_number % 4 == 2:
+                # A multi-agent transaction with a secondary signer of the other key type
+                secondary = keys[(sequence_number + 1) % 2]
+                secondary_address = AccountAddress.from_str("0x3")
+                multi_agent = MultiAgentRawTransaction(
+                    raw_transaction, [secondary_address]
+                )
+                authenticator = Authenticator(
+                    MultiAgentAuthenticator(
+                        multi_agent.sign(key),
+                        [(secondary_address, multi_agent.sign(secondary))],
+                    )
+                )
+            else:
+                authenticator = raw_transaction.sign(key)
+            signed_transactions.append(
+                SignedTransaction(raw_transaction, authenticator)
+            )
+
+        # Tamper with a transaction after signing it
+        signed_transactions[5].transaction.sequence_number += 1000
+        signed_transactions[6].transaction.sequence_number += 1000
+        expected = [i not in (5, 6) for i in range(80)]
+        self.assertEqual([t.verify() for t in signed_transactions], expected)
+        self.assertEqual(SignedTransaction.verify_many(signed_transactions), expected)
+
     def test_entry_function_with_corpus(self):
         # Define common inputs
         sender_key_input = (
@@ -10,6 +10,7 @@ from typing import List, Tuple
 
 from .account_address import AccountAddress
 from .bcs import Deserializable, Deserializer, Serializable, Serializer
+from .bcs_schema import STR, Enum, Schema, Sequence
 
 
 class TypeTag(Deserializable, Serializable):
@@ -29,6 +30,23 @@ class TypeTag(Deserializable, Serializable):
 
     value: typing.Any
 
+    schema = Enum(
+        "value",
+        {
+            BOOL: "BoolTag",
+            U8: "U8Tag",
+            U64: "U64Tag",
+            U128: "U128Tag",
+            ACCOUNT_ADDRESS: "AccountAddressTag",
+            SIGNER: None,
+            VECTOR: None,
+            STRUCT: "StructTag",
+            U16: "U16Tag",
+            U32: "U32Tag",
+            U256: "U256Tag",
+        },
+    )
+
     def __init__(self, value: typing.Any):
         self.value = value
 
@@ -47,34 +65,10 @@ class TypeTag(Deserializable, Serializable):
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> TypeTag:
-        variant = deserializer.uleb128()
-        if variant == TypeTag.BOOL:
-            return TypeTag(BoolTag.deserialize(deserializer))
-        elif variant == TypeTag.U8:
-            return TypeTag(U8Tag.deserialize(deserializer))
-        elif variant == TypeTag.U16:
-            return TypeTag(U16Tag.deserialize(deserializer))
-        elif variant == TypeTag.U32:
-            return TypeTag(U32Tag.deserialize(deserializer))
-        elif variant == TypeTag.U64:
-            return TypeTag(U64Tag.deserialize(deserializer))
-        elif variant == TypeTag.U128:
-            return TypeTag(U128Tag.deserialize(deserializer))
-        elif variant == TypeTag.U256:
-            return TypeTag(U256Tag.deserialize(deserializer))
-        elif variant == TypeTag.ACCOUNT_ADDRESS:
-            return TypeTag(AccountAddressTag.deserialize(deserializer))
-        elif variant == TypeTag.SIGNER:
-            raise NotImplementedError
-        elif variant == TypeTag.VECTOR:
-            raise NotImplementedError
-        elif variant == TypeTag.STRUCT:
-            return TypeTag(StructTag.deserialize(deserializer))
-        raise NotImplementedError
+        return TypeTag.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        serializer.uleb128(self.value.variant())
-        serializer.struct(self.value)
+        TypeTag.schema.encode(serializer, self)
 
 
 class BoolTag(Deserializable, Serializable):
@@ -283,6 +277,10 @@ class StructTag(Deserializable, Serializable):
     name: str
     type_args: List[TypeTag]
 
+    schema = Schema(
+        address=AccountAddress, module=STR, name=STR, type_args=Sequence(TypeTag)
+    )
+
     def __init__(self, address, module, name, type_args):
         self.address = address
         self.module = module
@@ -299,6 +297,9 @@ class StructTag(Deserializable, Serializable):
             and self.type_args == other.type_args
         )
 
+    def __hash__(self) -> int:
+        return hash(str(self))
+
     def __str__(self) -> str:
         value = f"{self.address}::{self.module}::{self.name}"
         if len(self.type_args) > 0:
@@ -362,17 +363,10 @@ class StructTag(Deserializable, Serializable):
 
     @staticmethod
     def deserialize(deserializer: Deserializer) -> StructTag:
-        address = deserializer.struct(AccountAddress)
-        module = deserializer.str()
-        name = deserializer.str()
-        type_args = deserializer.sequence(TypeTag.deserialize)
-        return StructTag(address, module, name, type_args)
+        return StructTag.schema.decode(deserializer)
 
     def serialize(self, serializer: Serializer):
-        self.address.serialize(serializer)
-        serializer.str(self.module)
-        serializer.str(self.name)
-        serializer.sequence(self.type_args, Serializer.struct)
+        StructTag.schema.encode(serializer, self)
 
 
 class Test(unittest.TestCase):
@@ -388,6 +382,20 @@ class Test(unittest.TestCase):
         from_bytes = StructTag.from_bytes(in_bytes)
         self.assertEqual(derived, from_bytes)
 
+    def test_resources_map(self):
+        coin = StructTag.from_str(
+            "0x1::coin::CoinStore<0x1::endless_coin::EndlessCoin>"
+        )
+        account = StructTag.from_str("0x1::account::Account")
+        resources = {coin: b"\x01\x02", account: b"\x03"}
+
+        ser = Serializer()
+        ser.map(resources, Serializer.struct, Serializer.to_bytes)
+        der = Deserializer(ser.output())
+        out = der.map(StructTag.deserialize, Deserializer.to_bytes)
+        self.assertEqual(out, resources)
+        self.assertEqual(out[StructTag.from_str("0x1::account::Account")], b"\x03")
+
 
 if __name__ == "__main__":
     unittest.main()
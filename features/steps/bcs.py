@@ -2,8 +2,8 @@ import typing
 
 from behave import then, use_step_matcher, when
 
-from aptos_sdk.account_address import AccountAddress
-from aptos_sdk.bcs import Deserializer, Serializer
+from endless_sdk.account_address import AccountAddress
+from endless_sdk.bcs import Deserializer, Serializer
 
 # Use regular expressions
 use_step_matcher("re")